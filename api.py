@@ -0,0 +1,530 @@
+## SmartHire HTTP API
+##
+## Resume parsing, ATS scoring, skill matching and document Q&A without the Streamlit UI:
+##   uvicorn api:app --host 0.0.0.0 --port 8000
+## Interactive docs are served at /docs. Set SMARTHIRE_API_KEY to require an X-API-Key header.
+##
+## Resumes and documents are sent as JSON, either as base64 PDF bytes or as plain text.
+## Identical requests that arrive while one is already being answered share its result, every
+## endpoint with LLM output has a /stream variant, and /batch variants run their items concurrently.
+import asyncio
+import base64
+import binascii
+import contextlib
+import functools
+import json
+import math
+import os
+import secrets
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from fastapi import Depends, FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from scripts import metrics
+from scripts.cache import DiskCache, RESUME_CACHE_PATH, content_hash
+
+load_dotenv()
+
+API_KEY = os.getenv("SMARTHIRE_API_KEY")
+QA_MODEL = "Gemma2-9b-It"
+MAX_BATCH = int(os.getenv("SMARTHIRE_API_MAX_BATCH", "100"))
+
+
+# Request coalescing: concurrent calls with the same key share one execution of the blocking
+# function (run on a worker thread). Only in-flight work is shared; caches handle the rest.
+class Coalescer:
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+
+    async def run(self, key, fn, *args):
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            metrics.incr("api_coalesced_total", endpoint=self.name)
+        # A client that disconnects must not cancel work other requests are waiting on
+        return await asyncio.shield(future)
+
+
+parse_calls = Coalescer("parse")
+ats_calls = Coalescer("ats")
+qa_calls = Coalescer("qa")
+
+
+def require_api_key(x_api_key: Optional[str] = Header(None)):
+    if API_KEY and not secrets.compare_digest(x_api_key or "", API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-API-Key")
+
+
+# The metrics server (SMARTHIRE_METRICS_PORT) is started here rather than on import
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    metrics.serve_metrics_from_env()
+    yield
+
+
+app = FastAPI(title="SmartHire API", dependencies=[Depends(require_api_key)], lifespan=lifespan)
+
+
+class Document(BaseModel):
+    pdf_base64: Optional[str] = Field(None, description="PDF file contents, base64 encoded")
+    text: Optional[str] = Field(None, description="Plain text, used when no PDF is given")
+    name: str = ""
+
+
+class ParseRequest(BaseModel):
+    document: Document
+    requisition: Optional[str] = None
+    store: bool = Field(False, description="Also save the parsed resume in the candidate store")
+
+
+class ParseBatchRequest(BaseModel):
+    documents: List[Document]
+    requisition: Optional[str] = None
+    store: bool = False
+
+
+class AskRequest(BaseModel):
+    document: Document
+    question: str
+
+
+class ValidateRequest(BaseModel):
+    raw: str = Field(..., description="Model output that should be a resume JSON object")
+
+
+class AtsRequest(BaseModel):
+    document: Document
+    job_description: str
+    prompt: str = Field("match", description="'match', 'review' or a custom prompt")
+
+
+class AtsBatchRequest(BaseModel):
+    documents: List[Document]
+    job_description: str
+    prompt: str = "match"
+
+
+class Candidate(BaseModel):
+    id: str = ""
+    skills: Optional[List[str]] = None
+    text: Optional[str] = Field(None, description="Free text to search for the skills when no skill list is given")
+
+
+class SkillsRequest(BaseModel):
+    required_skills: List[str]
+    candidate: Candidate
+
+
+class SkillsBatchRequest(BaseModel):
+    required_skills: List[str]
+    candidates: List[Candidate]
+    weights: Optional[List[float]] = None
+
+
+class IndexRequest(BaseModel):
+    workspace: str = "default"
+    documents: List[Document]
+
+
+class ChatMessage(BaseModel):
+    role: str = Field(..., description="'human' or 'ai'")
+    content: str
+
+
+class QaRequest(BaseModel):
+    question: str
+    workspace: str = "default"
+    file_hashes: Optional[List[str]] = Field(None, description="Restrict the search to these files; default is the whole workspace")
+    chat_history: List[ChatMessage] = []
+
+
+class QaBatchRequest(BaseModel):
+    questions: List[str]
+    workspace: str = "default"
+    file_hashes: Optional[List[str]] = None
+
+
+## Shared resources, created on first use
+
+@functools.lru_cache(maxsize=None)
+def get_parse_cache():
+    return DiskCache(RESUME_CACHE_PATH)
+
+
+@functools.lru_cache(maxsize=None)
+def get_store():
+    from scripts.candidate_store import get_candidate_store
+    return get_candidate_store()
+
+
+@functools.lru_cache(maxsize=None)
+def get_embeddings():
+    from scripts.embeddings import CachedEmbeddings
+    return CachedEmbeddings()
+
+
+@functools.lru_cache(maxsize=32)
+def get_document_index(workspace):
+    from scripts.rag import DocumentIndex, tenant_directory
+    return DocumentIndex(get_embeddings(), persist_directory=tenant_directory(workspace))
+
+
+@functools.lru_cache(maxsize=64)
+def get_rag_chain(workspace, file_hashes):
+    from scripts.clients import chat_groq
+    from scripts.rag import build_rag_chain
+
+    retriever = get_document_index(workspace).as_retriever(None if file_hashes is None else set(file_hashes))
+    return build_rag_chain(chat_groq(os.getenv("GROQ_API_KEY"), QA_MODEL), retriever)
+
+
+## Helpers
+
+def _check_batch(items):
+    if not items:
+        raise HTTPException(status_code=422, detail="The batch is empty")
+    if len(items) > MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH} items per batch")
+
+
+# (pdf bytes or None, hash identifying the content)
+def _document_source(document):
+    if document.pdf_base64:
+        try:
+            pdf_bytes = base64.b64decode(document.pdf_base64, validate=True)
+        except (binascii.Error, ValueError):
+            raise HTTPException(status_code=422, detail="pdf_base64 is not valid base64")
+        return pdf_bytes, content_hash(pdf_bytes)
+    if document.text:
+        return None, content_hash("text", document.text)
+    raise HTTPException(status_code=422, detail="Send either pdf_base64 or text")
+
+
+def _document_text(document, pdf_bytes):
+    if pdf_bytes is None:
+        return document.text
+    from scripts.pdf_utils import extract_text
+    return extract_text(pdf_bytes)
+
+
+# Run one coroutine per batch item; failures are reported per item instead of failing the batch
+async def _gather_items(coroutines):
+    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    return [
+        {"error": result.detail if isinstance(result, HTTPException) else f"{type(result).__name__}: {result}"}
+        if isinstance(result, Exception) else result
+        for result in results
+    ]
+
+
+def _chat_history(messages):
+    from langchain_core.messages import AIMessage, HumanMessage
+    return [
+        AIMessage(content=message.content) if message.role in ("ai", "assistant") else HumanMessage(content=message.content)
+        for message in messages
+    ]
+
+
+# Streamed chunks are pulled from worker threads one at a time, so they are counted rather than traced with a span
+def _text_stream(chunks, endpoint):
+    metrics.incr("api_streams_total", endpoint=endpoint)
+    return StreamingResponse(chunks, media_type="text/plain; charset=utf-8")
+
+
+## Resume parsing
+
+def _parse_blocking(document, pdf_bytes, file_hash, requisition, store):
+    from scripts.llm import extract_resume, resume_cache_key
+
+    cache = get_parse_cache()
+    cache_key = resume_cache_key(file_hash)
+    data = cache.get(cache_key)
+    cached = data is not None
+    if not cached:
+        with metrics.span("api.parse"):
+            data, cacheable = extract_resume(_document_text(document, pdf_bytes))
+        if cacheable:
+            cache.set(cache_key, data)
+        else:
+            cache_key = None
+    if store:
+        get_store().upsert_resume(file_hash, data, file_name=document.name, requisition=requisition, cache_key=cache_key)
+    return {"sha256": file_hash, "cached": cached, "data": data}
+
+
+async def _parse(document, requisition=None, store=False):
+    pdf_bytes, file_hash = _document_source(document)
+    key = (file_hash, requisition, store)
+    return await parse_calls.run(key, _parse_blocking, document, pdf_bytes, file_hash, requisition, store)
+
+
+@app.post("/parse")
+async def parse(request: ParseRequest):
+    return await _parse(request.document, request.requisition, request.store)
+
+
+@app.post("/parse/batch")
+async def parse_batch(request: ParseBatchRequest):
+    _check_batch(request.documents)
+    return {"results": await _gather_items(
+        _parse(document, request.requisition, request.store) for document in request.documents
+    )}
+
+
+# Pass the streamed JSON through, then validate and cache (and optionally store) it like /parse
+def _stream_and_save(chunks, file_hash, cache_key, document, requisition, store):
+    from scripts.llm import resume_from_output
+
+    raw = ""
+    for chunk in chunks:
+        raw += chunk
+        yield chunk
+    try:
+        data, cacheable = resume_from_output(raw)
+    except ValueError:
+        metrics.incr("api_stream_parse_invalid_total")
+        return
+    if cacheable:
+        get_parse_cache().set(cache_key, data)
+    else:
+        cache_key = None
+    if store:
+        get_store().upsert_resume(file_hash, data, file_name=document.name, requisition=requisition, cache_key=cache_key)
+
+
+# Raw JSON as the model writes it; a resume parsed before is sent straight from the cache
+@app.post("/parse/stream")
+def parse_stream(request: ParseRequest):
+    from scripts.llm import resume_cache_key, stream_resume_json
+
+    pdf_bytes, file_hash = _document_source(request.document)
+    cache_key = resume_cache_key(file_hash)
+    cached = get_parse_cache().get(cache_key)
+    if cached is not None:
+        return _text_stream(iter([json.dumps(cached)]), "parse")
+    chunks = stream_resume_json(_document_text(request.document, pdf_bytes))
+    return _text_stream(
+        _stream_and_save(chunks, file_hash, cache_key, request.document, request.requisition, request.store), "parse"
+    )
+
+
+# Free-form question about one resume (scripts.llm.ask_llm)
+@app.post("/parse/ask")
+async def parse_ask(request: AskRequest):
+    from scripts.llm import ask_llm
+
+    pdf_bytes, file_hash = _document_source(request.document)
+    context = await asyncio.to_thread(_document_text, request.document, pdf_bytes)
+    answer = await parse_calls.run(("ask", file_hash, request.question), ask_llm, context, request.question)
+    return {"sha256": file_hash, "answer": answer}
+
+
+@app.post("/parse/ask/stream")
+def parse_ask_stream(request: AskRequest):
+    from scripts.llm import stream_llm
+
+    pdf_bytes, _ = _document_source(request.document)
+    return _text_stream(stream_llm(_document_text(request.document, pdf_bytes), request.question), "ask")
+
+
+# Repair and validate model output into a resume; the LLM (validate_json) is only used when local repair fails
+@app.post("/parse/validate")
+async def parse_validate(request: ValidateRequest):
+    from scripts.llm import parse_resume_output
+
+    try:
+        data = await parse_calls.run(("validate", content_hash(request.raw)), parse_resume_output, request.raw)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Could not turn the input into a valid resume: {e}")
+    return {"data": data}
+
+
+## ATS scoring
+
+def _ats_blocking(prompt, pdf_bytes, text, job_description):
+    from scripts.ats import ATS_PROMPTS, evaluate, resume_parts
+
+    with metrics.span("api.ats", prompt=prompt if prompt in ATS_PROMPTS else "custom"):
+        return evaluate(prompt, resume_parts(pdf_bytes, text), job_description)
+
+
+async def _ats(document, job_description, prompt):
+    pdf_bytes, file_hash = _document_source(document)
+    key = (file_hash, content_hash(prompt, job_description))
+    response = await ats_calls.run(key, _ats_blocking, prompt, pdf_bytes, document.text, job_description)
+    return {"sha256": file_hash, "response": response}
+
+
+@app.post("/ats/score")
+async def ats_score(request: AtsRequest):
+    return await _ats(request.document, request.job_description, request.prompt)
+
+
+@app.post("/ats/score/batch")
+async def ats_score_batch(request: AtsBatchRequest):
+    _check_batch(request.documents)
+    return {"results": await _gather_items(
+        _ats(document, request.job_description, request.prompt) for document in request.documents
+    )}
+
+
+@app.post("/ats/score/stream")
+def ats_score_stream(request: AtsRequest):
+    from scripts.ats import resume_parts, stream_evaluation
+
+    pdf_bytes, _ = _document_source(request.document)
+    parts = resume_parts(pdf_bytes, request.document.text)
+    return _text_stream(stream_evaluation(request.prompt, parts, request.job_description), "ats")
+
+
+## Skill matching (local, no LLM calls)
+
+def _check_skills(required_skills, weights=None):
+    if not any(skill.strip() for skill in required_skills):
+        raise HTTPException(status_code=422, detail="required_skills must contain at least one skill")
+    if weights is not None:
+        if len(weights) != len(required_skills):
+            raise HTTPException(status_code=422, detail="weights must have one value per required skill")
+        if not all(math.isfinite(w) and w >= 0 for w in weights) or sum(weights) <= 0:
+            raise HTTPException(status_code=422, detail="weights must be non-negative and not all zero")
+
+
+def _skill_results(required_skills, candidates, weights=None):
+    from scripts.skills import rank_candidates
+
+    # Candidates without a skill list are matched against their free text instead
+    ranked = rank_candidates(
+        [candidate.skills if candidate.skills is not None else candidate.text or [] for candidate in candidates],
+        required_skills,
+        weights,
+    )
+    scores, matrix, ranking = ranked["scores"], ranked["matrix"], ranked["ranking"]
+
+    results = []
+    for row, candidate in enumerate(candidates):
+        results.append({
+            "id": candidate.id,
+            "match_percentage": round(float(scores[row]) * 100, 1),
+            "matched": [skill for skill, hit in zip(required_skills, matrix[row]) if hit],
+            "missing": [skill for skill, hit in zip(required_skills, matrix[row]) if not hit],
+        })
+    return results, [int(row) for row in ranking]
+
+
+@app.post("/skills/match")
+async def skills_match(request: SkillsRequest):
+    _check_skills(request.required_skills)
+    results, _ = _skill_results(request.required_skills, [request.candidate])
+    return results[0]
+
+
+@app.post("/skills/match/batch")
+async def skills_match_batch(request: SkillsBatchRequest):
+    _check_skills(request.required_skills, request.weights)
+    _check_batch(request.candidates)
+    results, ranking = await asyncio.to_thread(_skill_results, request.required_skills, request.candidates, request.weights)
+    return {"results": results, "ranking": ranking}
+
+
+## Document Q&A
+
+def _index_blocking(workspace, documents):
+    from scripts.pdf_utils import load_pdf_documents
+    from langchain_core.documents import Document as LangchainDocument
+
+    # Reject the request before anything is indexed if any document is invalid
+    sources = [_document_source(document) for document in documents]
+    document_index = get_document_index(workspace)
+    indexed = []
+    with metrics.span("api.index", files=len(documents)):
+        for document, (pdf_bytes, file_hash) in zip(documents, sources):
+            if file_hash not in document_index:
+                if pdf_bytes is not None:
+                    pages = load_pdf_documents(pdf_bytes, document.name)
+                else:
+                    pages = [LangchainDocument(page_content=document.text, metadata={"source": document.name})]
+                document_index.upsert_file(file_hash, pages, file_name=document.name)
+            indexed.append({"name": document.name, "file_hash": file_hash})
+    return indexed
+
+
+# Add documents to a workspace; files already indexed are not embedded again
+@app.post("/documents")
+async def index_documents(request: IndexRequest):
+    _check_batch(request.documents)
+    return {"workspace": request.workspace, "files": await asyncio.to_thread(_index_blocking, request.workspace, request.documents)}
+
+
+def _qa_inputs(request_file_hashes, question, chat_history):
+    file_hashes = None if request_file_hashes is None else tuple(sorted(request_file_hashes))
+    return file_hashes, {"input": question, "chat_history": _chat_history(chat_history)}
+
+
+def _qa_blocking(workspace, file_hashes, inputs):
+    with metrics.span("api.qa"):
+        result = get_rag_chain(workspace, file_hashes).invoke(inputs)
+    sources = [
+        {"file_name": doc.metadata.get("file_name", ""), "file_hash": doc.metadata.get("file_hash"), "page": doc.metadata.get("page")}
+        for doc in result.get("context", [])
+    ]
+    return {"answer": result["answer"], "sources": sources}
+
+
+async def _qa(workspace, request_file_hashes, question, chat_history=()):
+    file_hashes, inputs = _qa_inputs(request_file_hashes, question, chat_history)
+    key = (workspace, file_hashes, content_hash(question, *(f"{m.role}:{m.content}" for m in chat_history)))
+    return await qa_calls.run(key, _qa_blocking, workspace, file_hashes, inputs)
+
+
+@app.post("/qa")
+async def qa(request: QaRequest):
+    return await _qa(request.workspace, request.file_hashes, request.question, request.chat_history)
+
+
+@app.post("/qa/batch")
+async def qa_batch(request: QaBatchRequest):
+    _check_batch(request.questions)
+    return {"results": await _gather_items(
+        _qa(request.workspace, request.file_hashes, question) for question in request.questions
+    )}
+
+
+@app.post("/qa/stream")
+def qa_stream(request: QaRequest):
+    file_hashes, inputs = _qa_inputs(request.file_hashes, request.question, request.chat_history)
+
+    def answer_chunks():
+        for chunk in get_rag_chain(request.workspace, file_hashes).stream(inputs):
+            if "answer" in chunk:
+                yield chunk["answer"]
+    return _text_stream(answer_chunks(), "qa")
+
+
+## Operations
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return metrics.prometheus_text()
+
+
+@app.get("/stats")
+def stats():
+    from scripts.clients import usage_stats
+
+    return {
+        "parse_cache": get_parse_cache().stats(),
+        "llm_usage": usage_stats(),
+        "in_flight": {coalescer.name: len(coalescer._inflight) for coalescer in (parse_calls, ats_calls, qa_calls)},
+    }
@@ -2,6 +2,8 @@ import streamlit as st
 from PIL import Image
 import time
 
+from scripts import metrics
+
 # Set page config
 st.set_page_config(
     page_title="SmartHire",
@@ -17,6 +19,13 @@ st.set_page_config(
 
     })
 
+# Metrics endpoint for this Streamlit process (only when SMARTHIRE_METRICS_PORT is set), started once
+@st.cache_resource
+def start_metrics():
+    return metrics.serve_metrics_from_env()
+
+start_metrics()
+
 # Custom CSS for dark mode and animations
 st.markdown("""
     <style>
@@ -0,0 +1,136 @@
+## Benchmark LinkedIn section extraction against the saved linkedin_profile.html
+##
+## Usage:
+##   python -m benchmarks.bench_linkedin_parse [--html linkedin_profile.html] [--repeat 10]
+##
+## Times the original extraction path (full BeautifulSoup tree plus one re.sub per heading)
+## against scripts.linkedin_parser.parse_profile_sections and checks both produce the same sections.
+import argparse
+import re
+import statistics
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from scripts.linkedin_parser import bs4_parser, clean_text, parse_profile_sections, _raw_sections_bs4, _raw_sections_lxml
+
+LEGACY_SECTIONS = [
+    "Highlights", "Experience", "Education", "Skills", "About", "Activity",
+    "Interests", "Licenses", "Certifications", "Open to work", "People you may know",
+    "You might like", "More profiles for you", "Explore Premium profiles",
+    "Licenses & certifications"
+]
+
+
+# The cleaning code as it was before the single-regex rewrite
+def legacy_clean_text(text):
+    text = re.sub(r'\s+', ' ', text).strip()
+    for section in LEGACY_SECTIONS:
+        pattern = f"({section})\\1+"
+        text = re.sub(pattern, r'\1', text, flags=re.IGNORECASE)
+
+    words = text.split()
+    cleaned_words = []
+    i = 0
+    while i < len(words):
+        word = words[i]
+        cleaned_words.append(word)
+        while i + 1 < len(words) and words[i + 1] == word:
+            i += 1
+        i += 1
+    return ' '.join(cleaned_words)
+
+
+# The extraction code as it was inside the Selenium scraper
+def legacy_parse(html):
+    soup = BeautifulSoup(html, bs4_parser)
+    profile = soup.find('main', {'class': 'ntZHYFHDcSquahgjxCbZqrlcNXPHAoZMHVnYWM'})
+    if not profile:
+        profile = soup.find('div', {'class': 'ntZHYFHDcSquahgjxCbZqrlcNXPHAoZMHVnYWM'})
+        if not profile:
+            profile = soup
+    sections = profile.find_all('section', {'class': 'artdeco-card'})
+    if not sections:
+        sections = profile.find_all('section')
+
+    section_data = {}
+    section_titles = []
+    for i, section in enumerate(sections):
+        title_elem = section.find(['h2', 'h3'])
+        if title_elem:
+            raw_title = title_elem.get_text(strip=True)
+            title = raw_title
+            for section_name in LEGACY_SECTIONS:
+                if raw_title.lower() == (section_name.lower() + section_name.lower()):
+                    title = section_name
+                    break
+        else:
+            title = f"Section {i+1}"
+
+        base_title = title
+        counter = 1
+        while title in section_titles:
+            title = f"{base_title} {counter}"
+            counter += 1
+
+        section_data[title] = legacy_clean_text(section.get_text(strip=True, separator=' '))
+        section_titles.append(title)
+    return section_data, section_titles
+
+
+class _Quiet:
+    def info(self, message): pass
+    def success(self, message): pass
+    def warning(self, message): pass
+    def error(self, message): pass
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark LinkedIn profile section extraction")
+    parser.add_argument("--html", default="linkedin_profile.html", help="Saved LinkedIn profile page")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per variant (median is reported)")
+    args = parser.parse_args(argv)
+
+    with open(args.html, encoding="utf-8") as f:
+        html = f.read()
+
+    quiet = _Quiet()
+    expected = legacy_parse(html)
+    actual = parse_profile_sections(html, quiet)
+    if expected != actual:
+        print("Outputs differ from the legacy extraction!", file=sys.stderr)
+        return 1
+
+    texts = [text for _, text in _raw_sections_bs4(html)]
+    variants = {
+        "legacy parse (full soup + 15 re.sub)": lambda: legacy_parse(html),
+        "parse_profile_sections": lambda: parse_profile_sections(html, quiet),
+        "  raw sections, bs4 fallback": lambda: _raw_sections_bs4(html),
+        "legacy clean_text (all sections)": lambda: [legacy_clean_text(text) for text in texts],
+        "clean_text (all sections)": lambda: [clean_text(text) for text in texts],
+    }
+    if bs4_parser == "lxml":
+        variants["  raw sections, lxml"] = lambda: _raw_sections_lxml(html)
+
+    print(f"{args.html}: {len(html) / 1e6:.2f} MB, {len(actual[1])} sections, parser={bs4_parser}")
+    timings = {name: _time(fn, args.repeat) for name, fn in variants.items()}
+    for name, seconds in timings.items():
+        print(f"{name:<40} {seconds * 1000:8.1f} ms")
+
+    speedup = timings["legacy parse (full soup + 15 re.sub)"] / timings["parse_profile_sections"]
+    print(f"End-to-end speedup: {speedup:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
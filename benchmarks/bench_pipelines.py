@@ -0,0 +1,340 @@
+## End-to-end pipeline benchmarks against local stand-in backends
+##
+## Usage:
+##   python -m benchmarks.bench_pipelines [--pipelines resume,ats,shortlist,rag,linkedin_parse,linkedin]
+##       [--iterations 20] [--concurrency 4] [--latency 0.2] [--jitter 0.05] [--chunk-delay 0]
+##       [--resumes 20] [--json results.json]
+##
+## Starts benchmarks.fake_backends.FakeLLMServer, points the Groq and Gemini clients at it and
+## runs each pipeline the way the pages do, using temp.pdf, linkedin_profile.html and synthetic
+## resumes as inputs. Reports p50/p95 latency, throughput and peak traced memory per pipeline.
+## Caches live in a temporary directory and inputs are salted per iteration, so every
+## iteration does the full work unless --warm is given.
+## Pipelines whose dependencies are not installed are reported as skipped.
+import argparse
+import importlib.util
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_backends import FakeLLMServer, StandInEmbeddings
+
+FIRST_NAMES = ["Avery", "Jordan", "Riley", "Sam", "Taylor", "Morgan", "Casey", "Jamie", "Alex", "Quinn"]
+LAST_NAMES = ["Patel", "Garcia", "Nguyen", "Smith", "Okafor", "Kowalski", "Tanaka", "Silva", "Haddad", "Berg"]
+SKILLS = [
+    "Python", "SQL", "Machine Learning", "Deep Learning", "Pandas", "NumPy", "TensorFlow", "PyTorch",
+    "Docker", "Kubernetes", "AWS", "GCP", "Airflow", "Spark", "Tableau", "Excel", "React", "Node.js",
+    "Java", "Go", "NLP", "Computer Vision", "Statistics", "A/B Testing", "REST APIs", "Git",
+]
+COMPANIES = ["Acme Analytics", "Globex", "Initech", "Umbrella Health", "Stark Logistics", "Wayne Fintech"]
+ROLES = ["Data Scientist", "ML Engineer", "Data Analyst", "Backend Engineer", "Software Engineer"]
+
+JOB_DESCRIPTION = (
+    "We are hiring a Data Scientist with strong Python and SQL, hands-on machine learning experience, "
+    "familiarity with Docker and cloud platforms (AWS or GCP), and experience shipping models to production."
+)
+REQUIRED_SKILLS = ["Python", "SQL", "Machine Learning", "Docker", "AWS", "Airflow"]
+ATS_PROMPT = (
+    "You are an skilled ATS (Applicant Tracking System) scanner. Evaluate the resume against the job "
+    "description. Give the percentage match first, then missing keywords, then final thoughts."
+)
+RAG_QUESTIONS = [
+    "What programming languages does the candidate know?",
+    "Summarize the candidate's most recent role.",
+    "Which certifications are listed?",
+    "Has the candidate worked with cloud platforms?",
+]
+RAG_PROMPT = (
+    "You are an assistant for question-answering tasks. Use the following pieces of retrieved context "
+    "to answer the question. If you don't know the answer, say that you don't know.\n\n{context}\n\nQuestion: {question}"
+)
+
+
+class _Quiet:
+    def info(self, message): pass
+    def success(self, message): pass
+    def warning(self, message): pass
+    def error(self, message): pass
+
+
+# Render a plausible one-page resume PDF; the same seed always gives the same document
+def synthetic_resume(seed):
+    import pymupdf
+
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, rng.randint(6, 12))
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 555 {rng.randint(1000, 9999)} | Remote",
+        "",
+        "EXPERIENCE",
+    ]
+    for _ in range(rng.randint(2, 4)):
+        start = rng.randint(2012, 2021)
+        lines.append(f"{rng.choice(ROLES)}, {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)})")
+        for _ in range(3):
+            lines.append(f"- Delivered {rng.choice(skills)} work that improved {rng.choice(['latency', 'revenue', 'retention', 'accuracy'])} by {rng.randint(5, 40)}%")
+    lines += [
+        "",
+        "EDUCATION",
+        f"B.Sc. Computer Science, State University ({rng.randint(2008, 2018)})",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+    ]
+
+    pdf = pymupdf.open()
+    page = pdf.new_page()
+    page.insert_textbox(pymupdf.Rect(50, 50, 560, 800), "\n".join(lines), fontsize=10)
+    data = pdf.tobytes()
+    pdf.close()
+    return data
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+# Run fn over inputs with `concurrency` threads and summarize latency, throughput and memory
+def measure(name, fn, inputs, concurrency):
+    errors = []
+
+    def timed(item):
+        started = time.perf_counter()
+        try:
+            fn(item)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        return time.perf_counter() - started
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, inputs))
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "pipeline": name,
+        "iterations": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": _percentile(latencies, 0.5) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "throughput_per_s": len(latencies) / wall,
+        "peak_mb": peak / 2 ** 20,
+    }
+
+
+def _salt(text, i, warm):
+    return text if warm else f"{text}\n[benchmark run {i}]"
+
+
+# Fail at setup (reported as skipped) when a dependency the pipeline only imports on its first
+# request is not installed, instead of counting an error on every request
+def _require(*modules):
+    for module in modules:
+        try:
+            found = importlib.util.find_spec(module)
+        except ModuleNotFoundError:
+            found = None
+        if found is None:
+            raise ModuleNotFoundError(f"No module named '{module}'", name=module)
+
+
+## Pipelines: each returns (fn, inputs) for measure()
+
+def resume_pipeline(fixtures, iterations, warm):
+    _require("langchain_groq")
+    from scripts.llm import parse_resume
+    from scripts.pdf_utils import extract_text
+
+    def run(item):
+        i, pdf_bytes = item
+        parse_resume(_salt(extract_text(pdf_bytes), i, warm))
+
+    return run, [(i, fixtures["resumes"][i % len(fixtures["resumes"])]) for i in range(iterations)]
+
+
+def ats_pipeline(fixtures, iterations, warm):
+    _require("google.generativeai")
+    from scripts.clients import gemini_generate
+    from scripts.pdf_utils import pdf_to_content_parts
+
+    def run(item):
+        i, pdf_bytes = item
+        gemini_generate([ATS_PROMPT, *pdf_to_content_parts(pdf_bytes), _salt(JOB_DESCRIPTION, i, warm)])
+
+    return run, [(i, fixtures["resumes"][i % len(fixtures["resumes"])]) for i in range(iterations)]
+
+
+# Local shortlist ranking of every resume per iteration (embeddings + skill coverage, no LLM)
+def shortlist_pipeline(fixtures, iterations, warm):
+    from scripts.embeddings import CachedEmbeddings
+    from scripts.pdf_utils import extract_text
+    from scripts.ranking import rank_resumes
+
+    texts = [extract_text(pdf_bytes) for pdf_bytes in fixtures["resumes"]]
+
+    def run(i):
+        embeddings = CachedEmbeddings(
+            cache_path=os.path.join(fixtures["workdir"], f"shortlist-{0 if warm else i}.sqlite3"),
+            model=StandInEmbeddings(),
+        )
+        rank_resumes(JOB_DESCRIPTION, texts, embeddings, required_skills=REQUIRED_SKILLS)
+
+    return run, list(range(iterations))
+
+
+# Retrieval over an index of all fixtures, then one answer from the chat model, like the chatbot page
+def rag_pipeline(fixtures, iterations, warm):
+    _require("langchain_groq")
+    from scripts.clients import chat_groq
+    from scripts.embeddings import CachedEmbeddings
+    from scripts.pdf_utils import load_many_pdf_documents
+    from scripts.rag import DocumentIndex
+
+    embeddings = CachedEmbeddings(cache_path=os.path.join(fixtures["workdir"], "rag.sqlite3"), model=StandInEmbeddings())
+    index = DocumentIndex(embeddings, persist_directory=os.path.join(fixtures["workdir"], "vectorstore"))
+    files = [(fixtures["temp_pdf"], "temp.pdf")] + [
+        (pdf_bytes, f"resume-{i}.pdf") for i, pdf_bytes in enumerate(fixtures["resumes"])
+    ]
+    for (pdf_bytes, name), documents in zip(files, load_many_pdf_documents(files)):
+        index.upsert_file(name, documents, file_name=name)
+    retriever = index.as_retriever()
+    llm = chat_groq(os.environ["GROQ_API_KEY"], "Gemma2-9b-It")
+
+    def run(i):
+        question = _salt(RAG_QUESTIONS[i % len(RAG_QUESTIONS)], i, warm)
+        context = "\n\n".join(document.page_content for document in retriever.invoke(question))
+        llm.invoke(RAG_PROMPT.format(context=context, question=question))
+
+    return run, list(range(iterations))
+
+
+def linkedin_parse_pipeline(fixtures, iterations, warm):
+    from scripts.linkedin_parser import parse_profile_sections
+
+    quiet = _Quiet()
+    return (lambda i: parse_profile_sections(fixtures["linkedin_html"], quiet)), list(range(iterations))
+
+
+# Offline section extraction followed by concurrent Groq analysis of every section
+def linkedin_pipeline(fixtures, iterations, warm):
+    from scripts.linkedin import iter_section_analyses
+    from scripts.linkedin_parser import parse_profile_sections
+
+    quiet = _Quiet()
+
+    def run(i):
+        section_data, _ = parse_profile_sections(fixtures["linkedin_html"], quiet)
+        salted = {title: _salt(content, i, warm) for title, content in section_data.items()}
+        for _ in iter_section_analyses(salted, os.environ["GROQ_API_KEY"]):
+            pass
+
+    return run, list(range(iterations))
+
+
+PIPELINES = {
+    "resume": resume_pipeline,
+    "ats": ats_pipeline,
+    "shortlist": shortlist_pipeline,
+    "rag": rag_pipeline,
+    "linkedin_parse": linkedin_parse_pipeline,
+    "linkedin": linkedin_pipeline,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark SmartHire pipelines against local stand-in LLM backends")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES), help="Comma-separated subset of: " + ", ".join(PIPELINES))
+    parser.add_argument("--iterations", type=int, default=20, help="Requests per pipeline")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stand-in LLM time to first byte, seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Extra random LLM latency, up to this many seconds")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Delay between streamed chunks, seconds")
+    parser.add_argument("--resumes", type=int, default=20, help="Synthetic resumes to generate (plus temp.pdf)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic resumes and latency jitter")
+    parser.add_argument("--warm", action="store_true", help="Repeat identical inputs so caches are hit")
+    parser.add_argument("--temp-pdf", default="temp.pdf", help="Sample resume PDF")
+    parser.add_argument("--html", default="linkedin_profile.html", help="Saved LinkedIn profile page")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    selected = [name.strip() for name in args.pipelines.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in PIPELINES]
+    if unknown:
+        parser.error(f"Unknown pipelines: {', '.join(unknown)}")
+
+    workdir = tempfile.mkdtemp(prefix="smarthire-bench-")
+    server = FakeLLMServer(latency=args.latency, jitter=args.jitter, chunk_delay=args.chunk_delay, seed=args.seed).start()
+
+    # Must be set before any scripts.* module creates a client or cache
+    os.environ.update({
+        "GROQ_BASE_URL": server.url,
+        "GROQ_API_KEY": "benchmark",
+        "GEMINI_API_ENDPOINT": server.url,
+        "GOOGLE_API_KEY": "benchmark",
+        "SMARTHIRE_CACHE_DIR": os.path.join(workdir, "cache"),
+        "SMARTHIRE_VECTORSTORE_DIR": os.path.join(workdir, "vectorstore"),
+        "SMARTHIRE_GROQ_CONCURRENCY": str(max(args.concurrency * 4, 8)),
+        "SMARTHIRE_GEMINI_CONCURRENCY": str(max(args.concurrency, 4)),
+    })
+
+    results = []
+    try:
+        with open(args.temp_pdf, "rb") as f:
+            temp_pdf = f.read()
+        with open(args.html, encoding="utf-8") as f:
+            linkedin_html = f.read()
+        fixtures = {
+            "workdir": workdir,
+            "temp_pdf": temp_pdf,
+            "resumes": [temp_pdf] + [synthetic_resume(args.seed + i) for i in range(args.resumes)],
+            "linkedin_html": linkedin_html,
+        }
+
+        print(f"Stand-in backend at {server.url}: latency {args.latency}s + up to {args.jitter}s jitter; "
+              f"{args.iterations} iterations, concurrency {args.concurrency}, {len(fixtures['resumes'])} resumes")
+        print(f"{'pipeline':<16}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}{'peak MB':>10}{'errors':>8}")
+
+        for name in selected:
+            try:
+                fn, inputs = PIPELINES[name](fixtures, args.iterations, args.warm)
+            except ImportError as e:
+                missing = e.name or str(e)
+                results.append({"pipeline": name, "skipped": f"missing dependency: {missing}"})
+                print(f"{name:<16}skipped (missing dependency: {missing})")
+                continue
+            result = measure(name, fn, inputs, args.concurrency)
+            results.append(result)
+            print(f"{name:<16}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                  f"{result['throughput_per_s']:>10.2f}{result['peak_mb']:>10.1f}{result['errors']:>8}")
+            if result["first_error"]:
+                print(f"{'':<16}first error: {result['first_error']}")
+
+        print(f"Stand-in backend served {server.requests} requests")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"settings": vars(args), "results": results}, f, indent=2)
+    finally:
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return 1 if any(result.get("errors") for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
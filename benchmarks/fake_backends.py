@@ -0,0 +1,235 @@
+## Local stand-ins for the LLM and embedding backends used by the benchmarks
+##
+## FakeLLMServer answers Groq (OpenAI-style chat completions) and Gemini (REST generateContent)
+## requests with canned text after a configurable delay, so pipelines can be timed end-to-end
+## without network access or API credits. Point the clients at it with
+##   GROQ_BASE_URL=<server.url>  GEMINI_API_ENDPOINT=<server.url>
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+RESUME_JSON = json.dumps({
+    "personal_info": {"name": "Jordan Lee", "email": "jordan.lee@example.com", "phone": "+1 555 0100", "location": "Austin, TX"},
+    "education": [{"institution": "State University", "degree": "B.Sc. Computer Science", "year": "2019"}],
+    "experience": [{
+        "company": "Acme Analytics", "position": "Data Scientist", "duration": "2019 - Present",
+        "responsibilities": ["Built forecasting models", "Maintained ETL pipelines"],
+    }],
+    "skills": ["Python", "SQL", "Machine Learning", "Pandas", "Docker"],
+    "certifications": ["AWS Certified Cloud Practitioner"],
+    "languages": ["English", "Spanish"],
+})
+
+ANALYSIS_TEXT = (
+    "1. Key skills and qualifications: Python, SQL and applied machine learning.\n"
+    "2. Relevant experience: five years building data products.\n"
+    "3. Potential fit for roles: data scientist, ML engineer.\n"
+    "4. Red flags: none apparent.\n"
+    "5. Interview questions: walk through a model you shipped to production."
+)
+
+ATS_TEXT = (
+    "Percentage match: 78%\n\nKeywords missing: Kubernetes, Airflow\n\n"
+    "Final thoughts: strong analytical background with solid Python and SQL; limited MLOps exposure."
+)
+
+
+def _words(text):
+    return re.findall(r"\S+\s*", text)
+
+
+def _count_tokens(payload):
+    return max(1, len(json.dumps(payload)) // 4)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = self._read_json()
+        server = self.server.backend
+        server.count_request()
+        time.sleep(server.delay())
+
+        if self.path.split("?")[0].endswith("/chat/completions"):
+            self._chat_completion(body, server)
+        elif ":streamGenerateContent" in self.path:
+            self._gemini_stream(body, server)
+        elif ":generateContent" in self.path:
+            self._gemini_generate(body, server)
+        else:
+            self.send_error(404)
+
+    # Groq / OpenAI-compatible chat completions
+    def _chat_completion(self, body, server):
+        wants_json = (body.get("response_format") or {}).get("type") == "json_object"
+        text = RESUME_JSON if wants_json else server.chat_text
+        model = body.get("model", "fake")
+        usage = {
+            "prompt_tokens": _count_tokens(body.get("messages")),
+            "completion_tokens": len(_words(text)),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if not body.get("stream"):
+            self._send_json({
+                "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self._start_stream("text/event-stream")
+        for word in _words(text):
+            chunk = {
+                "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            time.sleep(server.chunk_delay)
+        final = {
+            "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"id": "bench", "usage": usage},
+        }
+        self._write_chunk(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n")
+        self._end_stream()
+
+    def _gemini_payload(self, text, body, final=True):
+        payload = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}]}
+        if final:
+            payload["candidates"][0]["finishReason"] = "STOP"
+            payload["usageMetadata"] = {
+                "promptTokenCount": _count_tokens(body.get("contents")),
+                "candidatesTokenCount": len(_words(ATS_TEXT)),
+                "totalTokenCount": _count_tokens(body.get("contents")) + len(_words(ATS_TEXT)),
+            }
+        return payload
+
+    # Gemini REST generateContent
+    def _gemini_generate(self, body, server):
+        self._send_json(self._gemini_payload(ATS_TEXT, body))
+
+    # Gemini REST streamGenerateContent: server-sent events with alt=sse, otherwise a streamed JSON array
+    def _gemini_stream(self, body, server):
+        words = _words(ATS_TEXT)
+        sse = "alt=sse" in self.path
+        self._start_stream("text/event-stream" if sse else "application/json")
+        if not sse:
+            self._write_chunk("[")
+        for i, word in enumerate(words):
+            payload = json.dumps(self._gemini_payload(word, body, final=i == len(words) - 1))
+            if sse:
+                self._write_chunk(f"data: {payload}\n\n")
+            else:
+                self._write_chunk(("," if i else "") + payload)
+            time.sleep(server.chunk_delay)
+        if not sse:
+            self._write_chunk("]")
+        self._end_stream()
+
+
+# A threaded HTTP server on 127.0.0.1 that stands in for Groq and Gemini.
+# latency is the time to first byte of every response (plus up to `jitter` seconds);
+# streamed responses additionally wait chunk_delay between chunks.
+class FakeLLMServer:
+    def __init__(self, latency=0.2, jitter=0.0, chunk_delay=0.0, chat_text=ANALYSIS_TEXT, port=0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_delay = chunk_delay
+        self.chat_text = chat_text
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.backend = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def delay(self):
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# Deterministic embeddings from hashed tokens, with a fixed delay per batch to stand in for the model
+class StandInEmbeddings(Embeddings):
+    def __init__(self, dimensions=384, latency_per_batch=0.02):
+        self.dimensions = dimensions
+        self.latency_per_batch = latency_per_batch
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency_per_batch)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
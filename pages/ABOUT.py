@@ -1,23 +1,12 @@
 import streamlit as st
-from pymongo import MongoClient
-import re
-from dotenv import load_dotenv
-import os
-load_dotenv()
-Mongo_uri=os.getenv("MONGO_URI")
-# MongoDB connection details — replace with your actual username and password
-MONGO_URI = Mongo_uri
-DB_NAME = "smarthire"
-COLLECTION_NAME = "subscribers"
-
-# Connect to MongoDB
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-collection = db[COLLECTION_NAME]
-
-def is_valid_email(email):
-    pattern = r'^[\w\.-]+@[\w\.-]+\.\w+$'
-    return re.match(pattern, email) is not None
+
+from scripts.subscribers import DuplicateSubscribersError, get_subscribers_collection, is_valid_email, subscribe
+
+# One pooled MongoDB client per process (scripts/db.py); the collection and its
+# unique email index are set up on first use, not on every rerun
+@st.cache_resource
+def get_subscribers():
+    return get_subscribers_collection()
 
 # Page config and styling
 st.set_page_config(page_title="About SmartHire", page_icon="🧠", layout="centered")
@@ -130,12 +119,15 @@ if st.button("Subscribe"):
     if not is_valid_email(email):
         st.error("⚠️ Please enter a valid email address.")
     else:
-        existing = collection.find_one({"email": email})
-        if existing:
-            st.warning("⚠️ This email is already subscribed.")
+        try:
+            subscribed = subscribe(get_subscribers(), email)
+        except DuplicateSubscribersError:
+            st.error("⚠️ Subscriptions are unavailable right now. Please try again later.")
         else:
-            collection.insert_one({"email": email})
-            st.success("🎉 Thank you for subscribing! You will hear from us soon.")
+            if subscribed:
+                st.success("🎉 Thank you for subscribing! You will hear from us soon.")
+            else:
+                st.warning("⚠️ This email is already subscribed.")
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -1,24 +1,35 @@
 from dotenv import load_dotenv
 load_dotenv()
 import streamlit as st
-import os
 import io
 import base64
-from PIL import Image
-import pdf2image
-import google.generativeai as genai
 
-genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-
-def get_gemini_response(input,pdf_content,prompt):
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    response=model.generate_content([input,pdf_content[0],prompt])
-    return response.text
-
-def input_pdf_setup(uploaded_file):
-    if uploaded_file is not None:
-        ## Convert the PDF to image
-        images=pdf2image.convert_from_bytes(uploaded_file.read())
+from scripts import metrics
+from scripts.ats import ATS_PROMPTS, resume_parts, stream_evaluation
+from scripts.cache import content_hash
+from scripts.jobs import follow_job, get_job_runner
+from scripts.pdf_utils import extract_text
+
+## Shared, lazily loaded embedding model for local ranking
+## (imported here so the page renders before numpy and langchain load)
+@st.cache_resource
+def get_embeddings():
+    from scripts.embeddings import CachedEmbeddings
+    return CachedEmbeddings()
+
+## Stored candidates to shortlist (scripts.candidate_store, shared with the parsing pages)
+@st.cache_resource
+def get_store():
+    from scripts.candidate_store import get_candidate_store
+    return get_candidate_store()
+
+## Image mode: only the first page of the PDF, as a JPEG
+## (text mode uses scripts.ats.resume_parts, shared with the API)
+def input_pdf_setup(pdf_bytes):
+    if pdf_bytes is not None:
+        import pdf2image
+        with metrics.span("pdf.rasterize",page=0):
+            images=pdf2image.convert_from_bytes(pdf_bytes,first_page=1,last_page=1)
 
         first_page=images[0]
 
@@ -37,6 +48,41 @@ def input_pdf_setup(uploaded_file):
     else:
         raise FileNotFoundError("No file uploaded")
 
+## Runs on the background job runner: prepares the resume (unless `parts` are given) and streams
+## Gemini's answer (scripts.ats) into the job's partial output. Identical evaluations in flight share one job.
+def evaluate_job(job,prompt,job_description,pdf_bytes=None,mode="text",parts=None,label="review"):
+    with metrics.span("ats.evaluate",prompt=label,mode=mode):
+        if parts is None:
+            job.progress(message="Preparing resume...")
+            ## Text mode sends the text of every page and only renders pages without a text layer
+            parts=resume_parts(pdf_bytes) if mode=="text" else input_pdf_setup(pdf_bytes)
+        job.progress(0.2,"Waiting for Gemini...")
+        response=""
+        for chunk in stream_evaluation(prompt,parts,job_description):
+            response+=chunk
+            job.append(chunk)
+    return response
+
+## Only called on a button click, so a finished evaluation is never handed back: each click
+## asks Gemini again (max_age=0), while a click during a running evaluation joins it
+def submit_evaluation(prompt,job_description,label,pdf_bytes=None,mode="text",parts=None):
+    content_key=content_hash(pdf_bytes) if pdf_bytes is not None else content_hash(*parts)
+    return get_job_runner().submit(
+        "ats.evaluate",evaluate_job,prompt,job_description,
+        pdf_bytes=pdf_bytes,mode=mode,parts=parts,label=label,
+        key=(label,content_key,mode,job_description),
+        max_age=0,
+    )
+
+## Follow a job, showing the answer as it streams in; returns the finished text
+def show_evaluation(job_id):
+    job=follow_job(job_id,render_partial=lambda slot,text:slot.markdown(text))
+    if job is None or job["status"]=="failed":
+        st.error(f"Evaluation failed: {job['error'] if job else 'the job is no longer available'}")
+        return None
+    st.markdown(job["result"])
+    return job["result"]
+
 ## Streamlit App
 
 st.set_page_config(page_title="ATS Resume Expert")
@@ -48,6 +94,14 @@ uploaded_file=st.file_uploader("Upload your resume(PDF)...",type=["pdf"])
 if uploaded_file is not None:
     st.write("PDF Uploaded Successfully")
 
+input_mode=st.radio(
+    "Resume input",
+    ["Text (all pages)","Image (first page)"],
+    horizontal=True,
+    help="Text mode sends the text of every page and only renders pages that have no text layer."
+)
+input_mode="text" if input_mode.startswith("Text") else "image"
+
 
 submit1 = st.button("Tell Me About the Resume")
 
@@ -55,36 +109,102 @@ submit1 = st.button("Tell Me About the Resume")
 
 submit3 = st.button("Percentage match")
 
-input_prompt1 = """
- You are an experienced Technical Human Resource Manager,your task is to review the provided resume against the job description. 
-  Please share your professional evaluation on whether the candidate's profile aligns with the role. 
- Highlight the strengths and weaknesses of the applicant in relation to the specified job requirements.
-"""
+input_prompt1 = ATS_PROMPTS["review"]
 
-input_prompt3 = """
-You are an skilled ATS (Applicant Tracking System) scanner with a deep understanding of data science and ATS functionality, 
-your task is to evaluate the resume against the provided job description. give me the percentage of match if the resume matches
-the job description. First the output should come as percentage and then keywords missing and last final thoughts.
-"""
+input_prompt3 = ATS_PROMPTS["match"]
 
-if submit1:
+## Evaluations run in the background and are remembered per resume, so reruns keep showing them
+if submit1 or submit3:
     if uploaded_file is not None:
-        pdf_content=input_pdf_setup(uploaded_file)
-        response=get_gemini_response(input_prompt1,pdf_content,input_text)
-        # st.subheader("The Repsonse is")
-        st.write(response)
+        prompt,label=(input_prompt1,"review") if submit1 else (input_prompt3,"match")
+        st.session_state.ats_job={
+            "id":submit_evaluation(prompt,input_text,label,pdf_bytes=uploaded_file.getvalue(),mode=input_mode),
+            "file_hash":content_hash(uploaded_file.getvalue()),
+            "subheader":submit3,
+        }
     else:
         st.write("Please uplaod the resume")
 
-elif submit3:
-    if uploaded_file is not None:
-        pdf_content=input_pdf_setup(uploaded_file)
-        response=get_gemini_response(input_prompt3,pdf_content,input_text)
+ats_job=st.session_state.get("ats_job")
+if ats_job and uploaded_file is not None and ats_job["file_hash"]==content_hash(uploaded_file.getvalue()):
+    if ats_job["subheader"]:
         st.subheader("The Repsonse is")
-        st.write(response)
-    else:
-        st.write("Please uplaod the resume")
+    show_evaluation(ats_job["id"])
+
+
 
+   
 
+## Shortlist many candidates locally, then send only the top ones to Gemini
+st.markdown("---")
+st.subheader("Shortlist Candidates")
+st.write("Rank candidates against the job description locally, without an LLM call per candidate.")
+shortlist_source=st.radio("Candidates",["Stored candidates","Uploaded resumes"],horizontal=True,key="shortlist_source")
+if shortlist_source=="Stored candidates":
+    shortlist_requisition=st.text_input("Requisition (optional; otherwise candidates with any required skill)",key="shortlist_requisition")
+else:
+    shortlist_files=st.file_uploader("Upload resumes (PDF)...",type=["pdf"],accept_multiple_files=True,key="shortlist_files")
+shortlist_skills=st.text_area("Required skills (one per line, optional)",key="shortlist_skills")
+top_k=st.number_input("Candidates to evaluate with Gemini",min_value=0,max_value=50,value=3,step=1)
 
-   
\ No newline at end of file
+## Stored candidates (by requisition, else by skill) or uploaded PDFs: (names, texts, PDF bytes or None)
+def shortlist_candidates(required):
+    if shortlist_source=="Uploaded resumes":
+        pdfs=[f.getvalue() for f in shortlist_files or []]
+        return [f.name for f in shortlist_files or []],[extract_text(pdf_bytes) for pdf_bytes in pdfs],pdfs
+
+    from scripts.candidate_store import candidate_text
+    if shortlist_requisition.strip():
+        candidates=get_store().find_by_requisition(shortlist_requisition.strip())
+    else:
+        candidates=get_store().find_by_skills(required,limit=200)
+    names,texts=[],[]
+    for candidate in candidates:
+        text=candidate_text(candidate)
+        if text:
+            names.append(candidate.get("name") or candidate.get("email") or candidate["_id"])
+            texts.append(text)
+    return names,texts,[None]*len(texts)
+
+if st.button("Rank Candidates"):
+    required=[skill.strip() for skill in shortlist_skills.split("\n") if skill.strip()]
+    names,texts,pdfs=shortlist_candidates(required) if input_text else ([],[],[])
+    if not input_text:
+        st.write("Please enter the job description")
+    elif shortlist_source=="Uploaded resumes" and not texts:
+        st.write("Please upload the resumes")
+    elif not texts:
+        st.write("No stored candidates found; enter a requisition or required skills")
+    else:
+        from scripts.ranking import rank_resumes
+        with st.spinner("Ranking candidates..."), metrics.span("ats.rank",resumes=len(texts)):
+            result=rank_resumes(input_text,texts,get_embeddings(),required_skills=required)
+
+        rows=[]
+        for position,idx in enumerate(result["ranking"],start=1):
+            rows.append({
+                "Rank":position,
+                "Candidate":names[idx],
+                "Score":round(float(result["scores"][idx])*100,1),
+                "Similarity":round(float(result["similarity"][idx])*100,1),
+                "Skill coverage":round(float(result["coverage"][idx])*100,1),
+            })
+
+        ## Submit every evaluation first so they run concurrently. Uploaded PDFs go through
+        ## resume_parts in the job (image-only pages are rendered); stored candidates send their text.
+        jobs=[]
+        for idx in result["ranking"][:int(top_k)]:
+            if pdfs[idx] is not None:
+                job_id=submit_evaluation(input_prompt3,input_text,"shortlist",pdf_bytes=pdfs[idx])
+            else:
+                job_id=submit_evaluation(input_prompt3,input_text,"shortlist",parts=resume_parts(text=texts[idx]))
+            jobs.append((names[idx],job_id))
+        st.session_state.ats_shortlist={"job_description":input_text,"rows":rows,"jobs":jobs}
+
+## The last shortlist stays on screen across reruns while the job description is unchanged
+shortlist=st.session_state.get("ats_shortlist")
+if shortlist and shortlist["job_description"]==input_text:
+    st.dataframe(shortlist["rows"],hide_index=True)
+    for name,job_id in shortlist["jobs"]:
+        with st.expander(f"Gemini evaluation: {name}",expanded=True):
+            show_evaluation(job_id)
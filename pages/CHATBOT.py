@@ -1,23 +1,71 @@
 ## RAG Q&A Conversation With PDF Including Chat History
 import streamlit as st
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_chroma import Chroma
-from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_groq import ChatGroq
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
 import os
+import uuid
+
+from scripts import metrics
+from scripts.cache import content_hash
+from scripts.clients import chat_groq
+from scripts.jobs import follow_job, get_job_runner
+from scripts.rag import DocumentIndex, build_rag_chain, tenant_directory
+from scripts.pdf_utils import load_many_pdf_documents
 
 from dotenv import load_dotenv
 load_dotenv()
 
 os.environ['HF_TOKEN']=os.getenv("HF_TOKEN")
-embeddings=HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+
+## Heavy objects are built once per process and reused across reruns
+## The model itself is only loaded once a chunk or query misses the embedding cache
+@st.cache_resource
+def get_embeddings():
+    from scripts.embeddings import CachedEmbeddings
+    return CachedEmbeddings(model_name="all-MiniLM-L6-v2")
+
+@st.cache_resource
+def get_llm(api_key):
+    return chat_groq(api_key,"Gemma2-9b-It")
+
+## One persistent vector index per workspace, shared by every session
+@st.cache_resource
+def get_document_index(tenant):
+    return DocumentIndex(get_embeddings(), persist_directory=tenant_directory(tenant))
+
+## The retrieval chain for one workspace and set of files, built once instead of on every rerun.
+## file_hashes=None searches the whole workspace.
+@st.cache_resource(max_entries=64)
+def get_rag_chain(api_key,workspace,file_hashes):
+    retriever=get_document_index(workspace).as_retriever(None if file_hashes is None else set(file_hashes))
+    return build_rag_chain(get_llm(api_key),retriever)
+
+## statefully manage chat history, one per session id
+def get_session_history(session):
+    from langchain_community.chat_message_histories import ChatMessageHistory
+
+    if session not in st.session_state.store:
+        st.session_state.store[session]=ChatMessageHistory()
+    return st.session_state.store[session]
+
+## Runs on the background job runner. The history object is passed in directly because
+## st.session_state is only available on the script thread.
+def answer_job(job,rag_chain,history,question):
+    from langchain_core.runnables.history import RunnableWithMessageHistory
+
+    conversational_rag_chain=RunnableWithMessageHistory(
+        rag_chain,lambda session:history,
+        input_messages_key="input",
+        history_messages_key="chat_history",
+        output_messages_key="answer"
+    )
+    job.progress(message="Searching documents...")
+    answer=""
+    with metrics.span("chatbot.answer"):
+        ## The chain streams dicts; only the answer pieces are kept
+        for chunk in conversational_rag_chain.stream({"input":question},config={"configurable":{"session_id":"job"}}):
+            if "answer" in chunk:
+                answer+=chunk["answer"]
+                job.append(chunk["answer"])
+    return answer
 
 
 ## set up Streamlit 
@@ -29,8 +77,6 @@ api_key=st.text_input("Enter your Groq API key:",type="password")
 
 ## Check if groq api key is provided
 if api_key:
-    llm=ChatGroq(groq_api_key=api_key,model_name="Gemma2-9b-It")
-
     ## chat interface
 
     session_id=st.text_input("Session ID",value="default_session")
@@ -39,89 +85,64 @@ if api_key:
     if 'store' not in st.session_state:
         st.session_state.store={}
 
+    workspace=st.sidebar.text_input("Workspace",value="default")
+    document_index=get_document_index(workspace)
+    search_workspace=st.sidebar.checkbox("Search all documents in this workspace",value=False)
+
+    with st.sidebar.expander(f"Indexed documents ({len(document_index.files)})"):
+        for file_hash,file_name in list(document_index.files.items()):
+            col1,col2=st.columns([3,1])
+            col1.write(file_name or file_hash[:12])
+            if col2.button("Remove",key=f"remove_{file_hash}"):
+                document_index.delete_file(file_hash)
+                st.rerun()
+
+    embedding_stats=get_embeddings().stats()
+    st.sidebar.caption(f"Embedding cache: {embedding_stats['hits']} hits / {embedding_stats['misses']} misses")
+
     uploaded_files=st.file_uploader("Choose A PDf file",type="pdf",accept_multiple_files=True)
     ## Process uploaded  PDF's
-    if uploaded_files:
-        documents=[]
-        for uploaded_file in uploaded_files:
-            temppdf=f"./temp.pdf"
-            with open(temppdf,"wb") as file:
-                file.write(uploaded_file.getvalue())
-                file_name=uploaded_file.name
-
-            loader=PyPDFLoader(temppdf)
-            docs=loader.load()
-            documents.extend(docs)
-
-    # Split and create embeddings for the documents
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=5000, chunk_overlap=500)
-        splits = text_splitter.split_documents(documents)
-        vectorstore = Chroma.from_documents(documents=splits, embedding=embeddings)
-        retriever = vectorstore.as_retriever()    
-
-        contextualize_q_system_prompt=(
-            "Given a chat history and the latest user question"
-            "which might reference context in the chat history, "
-            "formulate a standalone question which can be understood "
-            "without the chat history. Do NOT answer the question, "
-            "just reformulate it if needed and otherwise return it as is."
-        )
-        contextualize_q_prompt = ChatPromptTemplate.from_messages(
-                [
-                    ("system", contextualize_q_system_prompt),
-                    MessagesPlaceholder("chat_history"),
-                    ("human", "{input}"),
-                ]
-            )
-        
-        history_aware_retriever=create_history_aware_retriever(llm,retriever,contextualize_q_prompt)
-
-        ## Answer question
-
-        # Answer question
-        system_prompt = (
-                "You are an assistant for question-answering tasks. "
-                "Use the following pieces of retrieved context to answer "
-                "the question. If you don't know the answer, say that you "
-                "don't know. Use three sentences maximum and keep the "
-                "answer concise."
-                "\n\n"
-                "{context}"
-            )
-        qa_prompt = ChatPromptTemplate.from_messages(
-                [
-                    ("system", system_prompt),
-                    MessagesPlaceholder("chat_history"),
-                    ("human", "{input}"),
-                ]
-            )
-        
-        question_answer_chain=create_stuff_documents_chain(llm,qa_prompt)
-        rag_chain=create_retrieval_chain(history_aware_retriever,question_answer_chain)
-
-        def get_session_history(session:str)->BaseChatMessageHistory:
-            if session_id not in st.session_state.store:
-                st.session_state.store[session_id]=ChatMessageHistory()
-            return st.session_state.store[session_id]
-        
-        conversational_rag_chain=RunnableWithMessageHistory(
-            rag_chain,get_session_history,
-            input_messages_key="input",
-            history_messages_key="chat_history",
-            output_messages_key="answer"
-        )
+    if uploaded_files or (search_workspace and document_index.files):
+        file_hashes=set()
+        new_files={}
+        for uploaded_file in uploaded_files or []:
+            file_bytes=uploaded_file.getvalue()
+            file_hash=content_hash(file_bytes)
+            file_hashes.add(file_hash)
+            if file_hash not in document_index:
+                new_files[file_hash]=(file_bytes,uploaded_file.name)
+
+        # Parse new uploads straight from memory, then embed only what isn't indexed yet
+        if new_files:
+            with st.spinner(f"Indexing {len(new_files)} new file(s)..."),metrics.span("chatbot.index",files=len(new_files)):
+                loaded=load_many_pdf_documents(list(new_files.values()))
+                for (file_hash,(_,file_name)),docs in zip(new_files.items(),loaded):
+                    document_index.upsert_file(file_hash,docs,file_name=file_name)
+
+        rag_chain=get_rag_chain(api_key,workspace,None if search_workspace else tuple(sorted(file_hashes)))
 
         user_input = st.text_input("Your question:")
         if user_input:
             session_history=get_session_history(session_id)
-            response = conversational_rag_chain.invoke(
-                {"input": user_input},
-                config={
-                    "configurable": {"session_id":session_id}
-                },  # constructs a key "abc123" in `store`.
-            )
-            # st.write(st.session_state.store)
-            st.write("Assistant:", response['answer'])
+            ## A question is submitted once; reruns (any click) re-attach to the same job
+            ## instead of asking the model again
+            ask=[session_id,workspace,search_workspace,sorted(file_hashes),user_input]
+            chat_job=st.session_state.get("chat_job")
+            if not chat_job or chat_job["ask"]!=ask:
+                chat_uid=st.session_state.setdefault("chat_uid",uuid.uuid4().hex)
+                job_id=get_job_runner().submit(
+                    "chatbot.answer",answer_job,rag_chain,session_history,user_input,
+                    key=[chat_uid,*ask,len(session_history.messages)],
+                )
+                chat_job=st.session_state.chat_job={"ask":ask,"id":job_id}
+
+            st.write("Assistant:")
+            job=follow_job(chat_job["id"],render_partial=lambda slot,text:slot.markdown(text))
+            if job is None or job["status"]=="failed":
+                st.error(f"Could not answer: {job['error'] if job else 'the job is no longer available'}")
+                st.session_state.pop("chat_job",None)
+            else:
+                st.markdown(job["result"])
             st.write("Chat History:", session_history.messages)
 else:
     st.warning("Please enter the GRoq API Key")
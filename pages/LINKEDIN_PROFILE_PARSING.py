@@ -1,28 +1,21 @@
 import streamlit as st
-import time
 import logging
-import sys
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementNotInteractableException
 from bs4 import BeautifulSoup
-import groq
 import re
 
+from scripts.browser_pool import DriverPool, PhaseTimer, credential_key
+from scripts.candidate_store import get_candidate_store, normalize_profile_url
+from scripts.jobs import follow_job, get_job_runner
+from scripts.linkedin import AnalysisError, scrape_profile, stream_analysis, iter_section_analyses
+from scripts.linkedin_parser import bs4_parser, clean_text, parse_profile_sections
+from scripts.linkedin_queue import PROFILE_REFRESH_AGE, ProfileQueue, QueueWorkers
+
 # Suppress selenium and Chrome WebDriver logging
 logging.getLogger('selenium').setLevel(logging.ERROR)
 
 # Check if required packages are installed
-try:
-    import lxml
-    bs4_parser = "lxml"
-except ImportError:
-    bs4_parser = "html.parser"
+if bs4_parser != "lxml":
     st.warning("""
     For better parsing results, install lxml:
     ```
@@ -58,264 +51,71 @@ if 'linkedin_password' not in st.session_state:
     st.session_state.linkedin_password = None
 if 'groq_api_key' not in st.session_state:
     st.session_state.groq_api_key = None
+if 'profile_url' not in st.session_state:
+    st.session_state.profile_url = None
 
-# Function to clean text - removes duplicates and extra whitespace
-def clean_text(text):
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    # Check for section name duplications (common LinkedIn issue)
-    # This handles cases like "HighlightsHighlights" or "ExperienceExperience"
-    common_sections = [
-        "Highlights", "Experience", "Education", "Skills", "About", "Activity",
-        "Interests", "Licenses", "Certifications", "Open to work", "People you may know",
-        "You might like", "More profiles for you", "Explore Premium profiles",
-        "Licenses & certifications"
-    ]
-    
-    for section in common_sections:
-        pattern = f"({section})\\1+"  # Match section name repeated
-        text = re.sub(pattern, r'\1', text, flags=re.IGNORECASE)
-    
-    # Check for repeated words or phrases
-    words = text.split()
-    cleaned_words = []
-    
-    i = 0
-    while i < len(words):
-        word = words[i]
-        cleaned_words.append(word)
-        
-        # Skip any immediate duplicates
-        while i + 1 < len(words) and words[i + 1] == word:
-            i += 1
-        
-        i += 1
-    
-    return ' '.join(cleaned_words)
+# Warm, logged-in browsers shared by every session in this process
+@st.cache_resource
+def get_driver_pool():
+    return DriverPool(size=int(os.getenv("SMARTHIRE_BROWSER_POOL_SIZE", "2")))
 
-# Function to extract clean text from a BeautifulSoup element
-def extract_clean_text(element):
-    # Get raw text
-    raw_text = element.get_text(strip=True, separator=' ')
-    # Clean up the text
-    return clean_text(raw_text)
+# Persistent bulk queue and the background workers that drain it
+@st.cache_resource
+def get_profile_queue():
+    return ProfileQueue()
 
-# Function to scrape LinkedIn profile with Selenium and BeautifulSoup
-def scrape_linkedin_profile(email, password, profile_url):
-    # Debug container to show status/progress
-    debug_container = st.empty()
-    debug_container.info("Setting up Chrome driver...")
-    
-    # Set up Chrome options
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run in headless mode
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--disable-notifications")
-    chrome_options.add_argument("--disable-extensions")
-    chrome_options.add_argument("--disable-infobars")
-    chrome_options.add_argument("--mute-audio")
-    chrome_options.add_argument("--log-level=3")  # Minimal logging
-    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36")
-    
-    try:
-        # Try using webdriver-manager for Chrome
-        try:
-            from webdriver_manager.chrome import ChromeDriverManager
-            from selenium.webdriver.chrome.service import Service as ChromeService
-            debug_container.info("Installing Chrome driver...")
-            service = ChromeService(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-        except Exception as e:
-            debug_container.warning(f"Using default Chrome WebDriver. If you encounter issues, install webdriver-manager: {str(e)}")
-            # Fall back to direct Chrome driver
-            driver = webdriver.Chrome(options=chrome_options)
-        
-        debug_container.info("Opening LinkedIn login page...")
-        # Go to LinkedIn login page
-        driver.get("https://www.linkedin.com/login")
-        time.sleep(3)  # Wait for page to load
-        
-        debug_container.info("Entering login credentials...")
-        # Check if on login page
-        if "login" not in driver.current_url.lower():
-            debug_container.error("Not on LinkedIn login page. Current URL: " + driver.current_url)
-            return None, None
-        
-        # Find and fill in email and password fields
-        try:
-            email_field = driver.find_element(By.ID, "username")
-            email_field.clear()
-            email_field.send_keys(email)
-            
-            password_field = driver.find_element(By.ID, "password")
-            password_field.clear()
-            password_field.send_keys(password)
-            
-            # Click login button
-            debug_container.info("Clicking login button...")
-            login_button = driver.find_element(By.XPATH, "//button[@type='submit']")
-            login_button.click()
-            
-            # Wait for login to complete
-            debug_container.info("Waiting for login to complete...")
-            time.sleep(5)
-            
-            # Check if we're still on the login page (failed login)
-            if "login" in driver.current_url.lower():
-                error_element = driver.find_elements(By.ID, "error-for-username")
-                if error_element:
-                    debug_container.error(f"Login failed: {error_element[0].text}")
-                else:
-                    debug_container.error("Login failed: Still on login page")
-                return None, None
-                
-            debug_container.info("Login successful. Navigating to profile...")
-            
-            # Now navigate to the profile URL
-            driver.get(profile_url)
-            debug_container.info("Waiting for profile to load...")
-            time.sleep(5)
-            
-            # Check if we have access to the profile
-            if "authwall" in driver.current_url.lower():
-                debug_container.error("Access blocked: LinkedIn is requiring authentication")
-                return None, None
-            
-            # Scroll down to load dynamic content
-            debug_container.info("Scrolling to load profile content...")
-            for i in range(5):
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)
-            
-            # Get page source and parse with BeautifulSoup
-            debug_container.info("Extracting profile data...")
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, bs4_parser)
-            
-            # Save the HTML for debugging
-            if debugging_mode:
-                with open("linkedin_profile.html", "w", encoding="utf-8") as f:
-                    f.write(page_source)
-            
-            # Find the main profile section
-            profile = soup.find('main', {'class': 'ntZHYFHDcSquahgjxCbZqrlcNXPHAoZMHVnYWM'})
-            if not profile:
-                debug_container.error("Could not find main profile section")
-                # Try alternative structure
-                profile = soup.find('div', {'class': 'ntZHYFHDcSquahgjxCbZqrlcNXPHAoZMHVnYWM'}) 
-                if not profile:
-                    profile = soup  # Use the entire page as fallback
-                
-            # Extract all sections with class 'artdeco-card'
-            sections = profile.find_all('section', {'class': 'artdeco-card'})
-            if not sections:
-                debug_container.warning("No sections with 'artdeco-card' class found. Trying alternative approach...")
-                # Try to get sections by other means
-                sections = profile.find_all('section')
-            
-            if not sections:
-                debug_container.error("Could not find any profile sections")
-                return None, None
-                
-            debug_container.info(f"Found {len(sections)} profile sections")
-            
-            section_data = {}
-            section_titles = []
-            
-            # Process each section
-            for i, section in enumerate(sections):
-                # Try to find section title
-                title_elem = section.find(['h2', 'h3'])
-                if title_elem:
-                    # Get the title and clean any potential duplications
-                    raw_title = title_elem.get_text(strip=True)
-                    
-                    # Fix common section title duplications like "HighlightsHighlights"
-                    common_sections = [
-                        "Highlights", "Experience", "Education", "Skills", "About", "Activity",
-                        "Interests", "Licenses", "Certifications", "Open to work", "People you may know",
-                        "You might like", "More profiles for you", "Explore Premium profiles",
-                        "Licenses & certifications"
-                    ]
-                    
-                    # Check if the title contains a duplication
-                    title = raw_title
-                    for section_name in common_sections:
-                        if raw_title.lower() == (section_name.lower() + section_name.lower()):
-                            title = section_name
-                            break
-                else:
-                    title = f"Section {i+1}"
-                
-                # Make sure title is unique
-                base_title = title
-                counter = 1
-                while title in section_titles:
-                    title = f"{base_title} {counter}"
-                    counter += 1
-                
-                # Store the section content with clean text
-                section_data[title] = extract_clean_text(section)
-                section_titles.append(title)
-            
-            debug_container.success(f"Successfully extracted {len(section_titles)} profile sections")
-            return section_data, section_titles
-            
-        except NoSuchElementException as e:
-            debug_container.error(f"Element not found: {str(e)}")
-            return None, None
-        except ElementNotInteractableException as e:
-            debug_container.error(f"Element not interactable: {str(e)}")
-            return None, None
-        except Exception as e:
-            debug_container.error(f"Error during login: {str(e)}")
-            return None, None
-            
-    except Exception as e:
-        debug_container.error(f"Error occurred: {str(e)}")
-        return None, None
-    finally:
-        try:
-            driver.quit()
-            debug_container.info("Chrome driver closed")
-        except:
-            pass
+# Scraped sections and analyses are kept per candidate, so a profile is only scraped once
+@st.cache_resource
+def get_store():
+    return get_candidate_store()
 
-# Function to analyze profile section with Groq
-def analyze_with_groq(section_name, section_content, api_key):
-    try:
-        client = groq.Client(api_key=api_key)
-        
-        prompt = f"""
-        You are an expert HR assistant. Analyze the following LinkedIn profile section "{section_name}" and provide valuable insights for HR professionals:
-        
-        {section_content}
-        
-        Your analysis should include:
-        1. Key skills and qualifications
-        2. Relevant experience
-        3. Potential fit for roles
-        4. Any red flags or points of concern
-        5. Suggestions for interview questions
-        
-        Format your response in a clear, structured way.
-        """
-        
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",  # Use an appropriate Groq model
-            messages=[
-                {"role": "system", "content": "You are an expert HR assistant analyzing LinkedIn profiles."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1024
+@st.cache_resource
+def get_queue_workers():
+    pool = get_driver_pool()
+    return QueueWorkers(get_profile_queue(), pool, workers=pool.size, store=get_store())
+
+# Save the current profile's sections and analyses (profiles without a URL, e.g. pasted ones, are not stored)
+def save_profile():
+    if st.session_state.profile_url:
+        get_store().upsert_linkedin(
+            st.session_state.profile_url,
+            sections=st.session_state.profile_data,
+            analyses=st.session_state.analysis
         )
-        
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error analyzing section: {str(e)}"
+
+# Runs on the background job runner; status messages become the job's progress message.
+# The result is stored right away, so it is kept even if the user leaves the page mid-scrape.
+def scrape_job(job, pool, store, email, password, profile_url, save_html):
+    job.info("Waiting for a browser session...")
+    timer = PhaseTimer()
+    section_data, section_titles = scrape_profile(
+        pool, email, password, profile_url,
+        status=job,
+        timer=timer,
+        save_html=save_html,
+    )
+    if section_data:
+        store.upsert_linkedin(profile_url, sections=section_data)
+    return {"sections": section_data, "titles": section_titles, "timings": timer.timings}
+
+# Function to scrape LinkedIn profile with Selenium and BeautifulSoup.
+# The scrape runs in the background: a click while it runs only interrupts this page's polling,
+# and submitting the same profile again with the same login attaches to the running job.
+# Credentials stay in memory; the job key only holds their keyed hash.
+def scrape_linkedin_profile(email, password, profile_url):
+    job_id = get_job_runner().submit(
+        "linkedin.scrape", scrape_job,
+        get_driver_pool(), get_store(), email, password, profile_url,
+        "linkedin_profile.html" if debugging_mode else None,
+        key=[credential_key(email, password), normalize_profile_url(profile_url)],
+        max_age=0,
+    )
+    job = follow_job(job_id)
+    result = (job or {}).get("result") or {}
+    st.session_state.scrape_timings = result.get("timings", {})
+    if not result.get("sections") and job and (job["error"] or job["message"]):
+        st.caption(job["error"] or job["message"])
+    return result.get("sections"), result.get("titles")
 
 # Login section (only shown if not logged in)
 if not st.session_state.logged_in:
@@ -352,11 +152,23 @@ if st.session_state.logged_in:
         # Profile URL input
         with st.form("profile_form"):
             profile_url = st.text_input("Enter LinkedIn Profile URL")
+            reuse_stored = st.checkbox("Reuse stored results for this profile", value=True)
             scrape_submitted = st.form_submit_button("Analyze Profile")
             
             if scrape_submitted:
+                stored = get_store().find_by_linkedin(profile_url) if profile_url and reuse_stored else None
+                stored_profile = (stored or {}).get("linkedin", {})
+                
                 if not profile_url:
                     st.error("Please enter a profile URL")
+                elif stored_profile.get("sections"):
+                    # Scraped before: load the stored sections and analyses instead of opening a browser
+                    st.session_state.profile_url = profile_url
+                    st.session_state.profile_data = stored_profile["sections"]
+                    st.session_state.sections = list(stored_profile["sections"].keys())
+                    st.session_state.analysis = stored_profile.get("analyses") or {}
+                    st.session_state.current_section = None
+                    st.rerun()
                 else:
                     # Show loading spinner
                     with st.spinner("Scraping LinkedIn profile... This may take a minute."):
@@ -368,14 +180,20 @@ if st.session_state.logged_in:
                         )
                         
                         if section_data and section_titles:
+                            st.session_state.profile_url = profile_url
                             st.session_state.profile_data = section_data
                             st.session_state.sections = section_titles
+                            st.session_state.analysis = {}
+                            st.session_state.current_section = None
+                            save_profile()
                             st.success("Profile scraped successfully!")
                             
                             # If debugging is enabled, show raw data
                             if debugging_mode:
                                 with st.expander("Debug: Raw Profile Data"):
                                     st.json(section_data)
+                                with st.expander("Debug: Scrape Timings (seconds)"):
+                                    st.json({phase: round(seconds, 2) for phase, seconds in st.session_state.scrape_timings.items()})
                             
                             st.rerun()
                         else:
@@ -430,6 +248,7 @@ if st.session_state.logged_in:
                                     sections_titles = list(sections_data.keys())
                                     
                                     
+                                    st.session_state.profile_url = None
                                     st.session_state.profile_data = sections_data
                                     st.session_state.sections = sections_titles
                                     st.success("Content processed successfully!")
@@ -437,6 +256,34 @@ if st.session_state.logged_in:
                                 except Exception as e:
                                     st.error(f"Error processing content: {e}")
         
+        # Offline import of saved profile pages - no browser or LinkedIn login needed
+        with st.expander("Import saved profile HTML"):
+            html_files = st.file_uploader(
+                "Upload saved LinkedIn profile pages (.html)",
+                type=["html", "htm"],
+                accept_multiple_files=True
+            )
+            
+            if html_files:
+                imported = {}
+                for html_file in html_files:
+                    section_data, section_titles = parse_profile_sections(html_file.getvalue().decode("utf-8", errors="replace"))
+                    if section_data:
+                        imported[html_file.name] = (section_data, section_titles)
+                    else:
+                        st.warning(f"No profile sections found in {html_file.name}")
+                
+                if imported:
+                    selected_file = st.selectbox("Profile to analyze", list(imported.keys()))
+                    if st.button("Load imported profile"):
+                        section_data, section_titles = imported[selected_file]
+                        st.session_state.profile_url = None
+                        st.session_state.profile_data = section_data
+                        st.session_state.sections = section_titles
+                        st.session_state.analysis = {}
+                        st.session_state.current_section = None
+                        st.rerun()
+        
         # Display profile sections if available
         
         if st.session_state.sections:
@@ -450,26 +297,28 @@ if st.session_state.logged_in:
                 col_idx = i % 3
                 if cols[col_idx].button(section_name, key=f"section_{i}"):
                     st.session_state.current_section = section_name
-                    
-                    # Check if analysis already exists for this section
-                    if section_name not in st.session_state.analysis:
-                        # Show loading spinner
-                        with st.spinner(f"Analyzing {section_name} section..."):
-                            # Get section content
-                            section_content = st.session_state.profile_data[section_name]
-                            
-                            # Analyze with Groq
-                            analysis = analyze_with_groq(
-                                section_name, 
-                                section_content, 
-                                st.session_state.groq_api_key
-                            )
-                            
-                            # Store analysis
-                            st.session_state.analysis[section_name] = analysis
-                    
                     st.rerun()
             
+            # Analyze every section at once; results appear as each request finishes
+            pending = [name for name in st.session_state.sections if name not in st.session_state.analysis]
+            if pending and st.button(f"Analyze All Sections ({len(pending)} remaining)"):
+                progress = st.progress(0.0, text="Analyzing sections...")
+                results = st.container()
+                sections_to_analyze = {name: st.session_state.profile_data[name] for name in pending}
+                for done, (section_name, analysis, cached, ok) in enumerate(
+                    iter_section_analyses(sections_to_analyze, st.session_state.groq_api_key), start=1
+                ):
+                    progress.progress(done / len(pending), text=f"Analyzed {done} of {len(pending)} sections")
+                    # Failed sections are shown but not kept, so they stay pending and can be retried
+                    if not ok:
+                        results.error(f"{section_name}: {analysis}")
+                        continue
+                    st.session_state.analysis[section_name] = analysis
+                    with results.expander(f"{section_name}{' (cached)' if cached else ''}"):
+                        st.markdown(analysis)
+                progress.empty()
+                save_profile()
+            
             # Display selected section analysis
             if st.session_state.current_section:
                 st.subheader(f"Analysis of {st.session_state.current_section}")
@@ -478,14 +327,85 @@ if st.session_state.logged_in:
                 with st.expander("Raw Section Content"):
                     st.text(st.session_state.profile_data[st.session_state.current_section])
                 
-                # Display the analysis
-                st.markdown(st.session_state.analysis.get(st.session_state.current_section, "Analysis not available"))
+                # Display the analysis, streaming it from Groq the first time the section is opened
+                # A failed analysis is shown but not kept, so opening the section again retries it
+                if st.session_state.current_section not in st.session_state.analysis:
+                    try:
+                        analysis = st.write_stream(stream_analysis(
+                            st.session_state.current_section,
+                            st.session_state.profile_data[st.session_state.current_section],
+                            st.session_state.groq_api_key
+                        ))
+                    except AnalysisError as e:
+                        st.error(str(e))
+                    else:
+                        st.session_state.analysis[st.session_state.current_section] = analysis
+                        save_profile()
+                else:
+                    st.markdown(st.session_state.analysis.get(st.session_state.current_section, "Analysis not available"))
                 
                 # Option to copy analysis to clipboard
                 st.text_area("Copy analysis", 
                              st.session_state.analysis.get(st.session_state.current_section, ""), 
                              height=100)
 
+# Bulk profile queue (only shown if logged in)
+if st.session_state.logged_in:
+    profile_queue = get_profile_queue()
+    # Queue jobs belong to this login (a keyed hash of email and password), not to the email alone
+    queue_account = get_queue_workers().register(
+        st.session_state.linkedin_email,
+        st.session_state.linkedin_password,
+        st.session_state.groq_api_key
+    )
+    
+    with st.container():
+        st.subheader("Bulk Profile Queue")
+        st.write("Queue many profiles at once. They are scraped in the background, rate limited per LinkedIn account.")
+        
+        with st.form("queue_form"):
+            queue_urls = st.text_area("LinkedIn profile URLs (one per line)", height=150)
+            queue_analyze = st.checkbox("Analyze every section with Groq", value=True)
+            queue_refresh = st.checkbox("Scrape again profiles that were already scraped", value=False)
+            queue_submitted = st.form_submit_button("Add to Queue")
+            
+            if queue_submitted:
+                added = profile_queue.enqueue(
+                    queue_urls.splitlines(), queue_account, queue_analyze,
+                    max_age=0 if queue_refresh else PROFILE_REFRESH_AGE
+                )
+                st.success(f"Added {added} profile(s) to the queue")
+        
+        counts = profile_queue.counts(queue_account)
+        cols = st.columns(4)
+        for col, status in zip(cols, ["queued", "running", "done", "failed"]):
+            col.metric(status.title(), counts.get(status, 0))
+        st.button("Refresh Queue")
+        
+        for job in profile_queue.jobs(queue_account, limit=100):
+            with st.expander(f"[{job['status']}] {job['url']}"):
+                if job["error"]:
+                    st.caption(f"Last error (attempt {job['attempts']}): {job['error']}")
+                if job["sections"]:
+                    # Open the scraped profile in the section analyzer above
+                    if st.button("Open in analyzer", key=f"open_job_{job['id']}"):
+                        st.session_state.profile_url = job["url"]
+                        st.session_state.profile_data = job["sections"]
+                        st.session_state.sections = list(job["sections"].keys())
+                        st.session_state.analysis = job["analyses"] or {}
+                        st.session_state.current_section = None
+                        st.rerun()
+                    for title, content in job["sections"].items():
+                        st.markdown(f"**{title}**")
+                        st.text(content[:500])
+                        if job["analyses"] and title in job["analyses"]:
+                            st.markdown(job["analyses"][title])
+
+# Browser pool status
+if debugging_mode:
+    pool_stats = get_driver_pool().stats()
+    st.sidebar.caption(f"Browser pool: {pool_stats['busy']} busy, {pool_stats['idle']} idle of {pool_stats['size']}")
+
 # Footer
 st.markdown("---")
 st.caption("SmartHire - LinkedIn Profile Analyzer | Powered by Groq AI")
\ No newline at end of file
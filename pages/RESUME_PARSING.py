@@ -1,8 +1,65 @@
 import streamlit as st
-import pymupdf
 import json
 
-from scripts.llm import ask_llm, validate_json
+from scripts.llm import stream_resume_json, resume_from_output, resume_cache_key, EXTRACTION_STATS
+from scripts import metrics
+from scripts.cache import DiskCache, RESUME_CACHE_PATH, content_hash
+from scripts.candidate_store import get_candidate_store
+from scripts.jobs import follow_job, get_job_runner
+from scripts.pdf_utils import extract_text
+from scripts.skills import SkillIndex
+
+# One cache per process, shared by every session
+@st.cache_resource
+def get_parse_cache():
+    return DiskCache(RESUME_CACHE_PATH)
+
+# Parsed resumes are kept per candidate so any session can reuse them
+@st.cache_resource
+def get_store():
+    return get_candidate_store()
+
+parse_cache = get_parse_cache()
+candidate_store = get_store()
+
+# Runs on the background job runner: parse cache first, then the candidate store, then the LLM.
+# The JSON is streamed into the job's partial output so the page can show it as it is written.
+def parse_resume_job(job, pdf_bytes, file_hash, cache_key, file_name, requisition):
+    parsed_data = parse_cache.get(cache_key)
+    source = "cache"
+
+    if parsed_data is None:
+        # A resume parsed before with the same model and prompt is reused from the candidate store
+        stored = candidate_store.find_by_resume(file_hash)
+        if stored and stored.get("resume", {}).get("cache_key") == cache_key:
+            parsed_data = stored["resume"]["data"]
+            parse_cache.set(cache_key, parsed_data)
+            source = "store"
+
+    if parsed_data is None:
+        source = "llm"
+        job.progress(message="Extracting text...")
+        context = extract_text(pdf_bytes)
+        with metrics.span("resume.parse", chars=len(context)):
+            job.progress(0.1, "Extracting resume data...")
+            raw = ""
+            with metrics.span("llm.stream_resume_json"):
+                for chunk in stream_resume_json(context):
+                    raw += chunk
+                    job.append(chunk)
+
+            job.progress(0.9, "Validating extracted data...")
+            parsed_data, cacheable = resume_from_output(raw)
+        # A cut-off answer is still shown, but not kept for reuse
+        if cacheable:
+            parse_cache.set(cache_key, parsed_data)
+        else:
+            cache_key = None
+
+    candidate_store.upsert_resume(
+        file_hash, parsed_data, file_name=file_name, requisition=requisition, cache_key=cache_key
+    )
+    return {"data": parsed_data, "source": source}
 
 st.title("Resume Parsing")
 st.write("Upload a resume in PDF format to extract information")
@@ -15,35 +72,40 @@ required_skills = st.text_area(
     "Enter the required skills (one per line)",
     placeholder="Python\nSQL\nMachine Learning\nData Analysis"
 )
+requisition = st.text_input("Requisition ID (optional)", help="Stored with the candidate so they can be listed per opening")
 
 if uploaded_file is not None:
     bytearray = uploaded_file.read()
-    pdf = pymupdf.open(stream=bytearray, filetype="pdf")
-
-    context = ""
-    for page in pdf:
-        context = context + "\n\n" + page.get_text()
-
-    pdf.close()
-
-    question = """You are tasked with parsing a job resume. Your goal is to extract relevant information in a valid structured 'JSON' format.
-                Include these fields:
-                - "personal_info" (name, email, phone, location)
-                - "education" (array of educational qualifications with institution, degree, year)
-                - "experience" (array of work experiences with company, position, duration, responsibilities)
-                - "skills" (array of all technical and soft skills mentioned)
-                - "certifications" (array of certifications if any)
-                - "languages" (array of languages known if mentioned)
-                
-                Output only valid JSON without any preamble or explanations."""
+    file_hash = content_hash(bytearray)
+    job_key = f"parse_job_{file_hash}"
 
-    if st.button("Parse Resume"):
-        with st.spinner("Parsing Resume..."):
-            response = ask_llm(context=context, question=question)
-        
-        with st.spinner("Validating JSON..."):
-            parsed_data = validate_json(response)
-        
+    # Parsing runs in the background; the job id survives reruns, and the same resume
+    # (and requisition) submitted again - by anyone - attaches to the existing job
+    parse_clicked = st.button("Parse Resume")
+    if parse_clicked:
+        cache_key = resume_cache_key(file_hash)
+        requisition_id = requisition.strip() or None
+        st.session_state[job_key] = get_job_runner().submit(
+            "resume.parse", parse_resume_job,
+            bytearray, file_hash, cache_key, uploaded_file.name, requisition_id,
+            key=(cache_key, requisition_id),
+        )
+
+    parsed_data = None
+    if st.session_state.get(job_key) is not None:
+        # Show the JSON as the model writes it, then replace it with the validated result
+        job = follow_job(st.session_state[job_key], render_partial=lambda slot, text: slot.code(text, language="json"))
+        if job is None or job["status"] == "failed":
+            st.error(f"Parsing failed: {job['error'] if job else 'the job is no longer available'}")
+            st.session_state.pop(job_key, None)
+        else:
+            parsed_data = job["result"]["data"]
+            if job["result"]["source"] == "cache":
+                st.caption("Loaded from cache - no LLM calls were made")
+            elif job["result"]["source"] == "store":
+                st.caption("Loaded from the candidate store - no LLM calls were made")
+
+    if parsed_data is not None:
         # Display the parsed information
         st.subheader("Extracted Information")
         st.json(parsed_data)
@@ -62,20 +124,13 @@ if uploaded_file is not None:
                 candidate_skills = [skill.strip().lower() for skill in parsed_data.get("skills", [])]
                 
                 # Find missing skills
-                missing_skills = []
-                for skill in required_skills_list:
-                    skill_lower = skill.lower()
-                    found = False
-                    for candidate_skill in candidate_skills:
-                        if skill_lower in candidate_skill or candidate_skill in skill_lower:
-                            found = True
-                            break
-                    if not found:
-                        missing_skills.append(skill)
+                skill_index = SkillIndex(required_skills_list)
+                matched = skill_index.match_matrix([candidate_skills])[0]
+                missing_skills = [skill for skill, found in zip(required_skills_list, matched) if not found]
                 
                 # Calculate match percentage
                 if required_skills_list:
-                    match_percentage = ((len(required_skills_list) - len(missing_skills)) / len(required_skills_list)) * 100
+                    match_percentage = matched.mean() * 100
                 else:
                     match_percentage = 100
                 
@@ -105,6 +160,43 @@ if uploaded_file is not None:
                 st.write(parsed_data)
         
         st.write("You can copy the JSON output and use it in your application.")
-        st.balloons()
+        if parse_clicked:
+            st.balloons()
 else:
-    st.info("Please upload a resume to begin parsing")
\ No newline at end of file
+    st.info("Please upload a resume to begin parsing")
+
+# Look up candidates parsed in any earlier session
+with st.expander("Search stored candidates"):
+    search_by = st.radio("Search by", ["Skills", "Email", "Requisition"], horizontal=True)
+    query = st.text_input("Search for", placeholder="Python, SQL" if search_by == "Skills" else "")
+    if query:
+        if search_by == "Skills":
+            skills = [skill.strip() for skill in query.split(",") if skill.strip()]
+            match_all = st.checkbox("Require all skills")
+            found = candidate_store.find_by_skills(skills, match_all=match_all)
+        elif search_by == "Email":
+            found = [candidate for candidate in [candidate_store.find_by_email(query)] if candidate]
+        else:
+            found = candidate_store.find_by_requisition(query.strip())
+
+        st.write(f"{len(found)} candidate(s) found")
+        st.dataframe([
+            {
+                "Name": candidate.get("name", ""),
+                "Email": candidate.get("email", ""),
+                "Skills": ", ".join(candidate.get("skills", [])),
+                "Requisitions": ", ".join(candidate.get("requisitions", [])),
+                "Resume": candidate.get("resume", {}).get("file_name", ""),
+            }
+            for candidate in found
+        ], hide_index=True)
+
+# Cache effectiveness counters
+cache_stats = parse_cache.stats()
+st.sidebar.subheader("Parse Cache")
+st.sidebar.write(f"Hits: {cache_stats['hits']} | Misses: {cache_stats['misses']}")
+st.sidebar.write(f"Hit rate: {cache_stats['hit_rate']:.0%} | Entries: {cache_stats['entries']}")
+
+st.sidebar.subheader("JSON Extraction")
+st.sidebar.write(f"Direct: {EXTRACTION_STATS['direct']} | Repaired locally: {EXTRACTION_STATS['repaired']}")
+st.sidebar.write(f"LLM fallback: {EXTRACTION_STATS['fallback']} | Truncated: {EXTRACTION_STATS['truncated']}")
\ No newline at end of file
@@ -0,0 +1,38 @@
+## Gemini ATS evaluation, shared by the ATS page and the HTTP API
+from scripts.clients import gemini_generate, gemini_stream
+from scripts.pdf_utils import pdf_to_content_parts
+
+ATS_PROMPTS = {
+    "review": """
+ You are an experienced Technical Human Resource Manager,your task is to review the provided resume against the job description. 
+  Please share your professional evaluation on whether the candidate's profile aligns with the role. 
+ Highlight the strengths and weaknesses of the applicant in relation to the specified job requirements.
+""",
+    "match": """
+You are an skilled ATS (Applicant Tracking System) scanner with a deep understanding of data science and ATS functionality, 
+your task is to evaluate the resume against the provided job description. give me the percentage of match if the resume matches
+the job description. First the output should come as percentage and then keywords missing and last final thoughts.
+""",
+}
+
+
+# Gemini content parts for a resume given as PDF bytes or as plain text
+def resume_parts(pdf_bytes=None, text=None):
+    if pdf_bytes is not None:
+        return pdf_to_content_parts(pdf_bytes)
+    if text:
+        return [text]
+    raise ValueError("A resume PDF or text is required")
+
+
+def _contents(prompt, parts, job_description):
+    return [ATS_PROMPTS.get(prompt, prompt), *parts, job_description]
+
+
+# prompt is a key of ATS_PROMPTS or the prompt text itself
+def evaluate(prompt, parts, job_description):
+    return gemini_generate(_contents(prompt, parts, job_description))
+
+
+def stream_evaluation(prompt, parts, job_description):
+    return gemini_stream(_contents(prompt, parts, job_description))
@@ -0,0 +1,274 @@
+## Headless batch resume parsing
+##
+## Usage:
+##   python -m scripts.batch_parse resumes/ -o parsed.jsonl
+##   python -m scripts.batch_parse applications.zip -o parsed.jsonl --concurrency 8 --rpm 30
+##   python -m scripts.batch_parse resumes/ -o parsed.jsonl --store --requisition REQ-42
+##
+## Text is extracted with PyMuPDF in a process pool while LLM calls run on a bounded
+## asyncio scheduler. Each result is appended to the output JSONL as soon as it is ready;
+## re-running with the same output file skips resumes already parsed successfully. With --store,
+## results are checkpointed only after they reach the candidate store, and resumes parsed by
+## earlier runs are saved to it too.
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from scripts.cache import DiskCache, RESUME_CACHE_PATH, content_hash
+from scripts.pdf_utils import extract_text
+
+# Candidates per bulk write to the store
+STORE_BATCH = 500
+
+
+# List (archive, member) pairs for every PDF in a directory tree or zip file
+def collect_sources(path):
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            names = [name for name in archive.namelist() if name.lower().endswith(".pdf")]
+        return [(path, name) for name in sorted(names)]
+
+    if os.path.isdir(path):
+        sources = []
+        for root, _, files in os.walk(path):
+            for name in files:
+                if name.lower().endswith(".pdf"):
+                    sources.append((None, os.path.join(root, name)))
+        return sorted(sources)
+
+    raise ValueError(f"{path} is neither a directory nor a zip file")
+
+
+def source_name(source):
+    archive, member = source
+    return f"{archive}:{member}" if archive else member
+
+
+# Runs in a worker process: read one PDF and return its hash and text
+def load_source(source):
+    archive, member = source
+    if archive:
+        with zipfile.ZipFile(archive) as zf:
+            data = zf.read(member)
+    else:
+        with open(member, "rb") as f:
+            data = f.read()
+    return content_hash(data), extract_text(data)
+
+
+# Successful records already in the output file
+def checkpoint_records(output_path):
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partially written last line from an interrupted run
+            if record.get("status") == "ok":
+                yield record
+
+
+# Names of sources that already have a successful record in the output file
+def load_checkpoint(output_path):
+    return {record["source"] for record in checkpoint_records(output_path)}
+
+
+# Spaces out request starts so we stay under the provider's requests-per-minute limit
+class RateLimiter:
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def run_batch(sources, output_path, workers, concurrency, rpm, retries, store=None, requisition=None):
+    # Imported here so --help and checkpoint scanning don't pay the langchain import cost
+    from scripts.clients import _retryable
+    from scripts.llm import extract_resume, resume_cache_key
+
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rpm)
+    cache = DiskCache(RESUME_CACHE_PATH)
+    counts = {"ok": 0, "cached": 0, "truncated": 0, "error": 0}
+    # With a store, parsed records are only checkpointed once they are saved, in bulk writes of
+    # STORE_BATCH, so an interrupted run never skips resumes that did not reach the store
+    unsaved = []
+    # Enough consumers to keep the extraction pool and the LLM slots busy, and no more sources
+    # in flight than that
+    queue = asyncio.Queue(maxsize=workers + concurrency)
+    processed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(output_path, "a", encoding="utf-8") as out:
+
+        def write(record):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+        async def flush():
+            batch = unsaved[:]
+            unsaved.clear()
+            if batch:
+                await asyncio.to_thread(store.bulk_upsert_resumes, [item for _, item in batch])
+                for record, _ in batch:
+                    write(record)
+
+        async def emit(record, file_hash, key):
+            if store is None:
+                write(record)
+                return
+            item = {"file_hash": file_hash, "data": record["data"], "file_name": record["source"],
+                    "requisition": requisition, "cache_key": key}
+            unsaved.append((record, item))
+            if len(unsaved) >= STORE_BATCH:
+                await flush()
+
+        async def process(source):
+            name = source_name(source)
+            try:
+                pdf_hash, text = await loop.run_in_executor(pool, load_source, source)
+            except Exception as e:
+                counts["error"] += 1
+                write({"source": name, "status": "error", "error": f"extract: {e}"})
+                return
+
+            key = resume_cache_key(pdf_hash)
+            data = cache.get(key)
+            if data is not None:
+                counts["cached"] += 1
+                await emit({"source": name, "sha256": pdf_hash, "status": "ok", "cached": True, "data": data}, pdf_hash, key)
+                return
+
+            cacheable = None
+            async with semaphore:
+                for attempt in range(retries + 1):
+                    await limiter.wait()
+                    try:
+                        data, cacheable = await asyncio.to_thread(extract_resume, text)
+                        break
+                    except Exception as e:
+                        error = e
+                        # Only rate limits and server errors are worth another attempt
+                        if attempt >= retries or not _retryable(e):
+                            break
+                        await asyncio.sleep(min(30, 2 ** attempt) + random.random())
+                if cacheable is None:
+                    counts["error"] += 1
+                    write({"source": name, "sha256": pdf_hash, "status": "error", "error": str(error)})
+                    return
+
+            # A truncated answer is written out but not cached, and parsed again on the next run
+            status = "ok" if cacheable else "truncated"
+            if cacheable:
+                cache.set(key, data)
+            else:
+                key = None
+            counts[status] += 1
+            await emit({"source": name, "sha256": pdf_hash, "status": status, "cached": False, "data": data}, pdf_hash, key)
+
+        async def consume():
+            nonlocal processed
+            while True:
+                source = await queue.get()
+                if source is None:
+                    return
+                await process(source)
+                processed += 1
+                print(f"\r{processed}/{len(sources)} processed", end="", file=sys.stderr, flush=True)
+
+        consumers = [asyncio.create_task(consume()) for _ in range(workers + concurrency)]
+        try:
+            for source in sources:
+                await queue.put(source)
+            for _ in consumers:
+                await queue.put(None)
+            await asyncio.gather(*consumers)
+        finally:
+            if store is not None:
+                await flush()
+        print(file=sys.stderr)
+
+    return counts
+
+
+# Save checkpointed resumes to the store, e.g. ones parsed by an earlier run without --store
+def store_checkpoint(output_path, store, requisition=None):
+    from scripts.llm import resume_cache_key
+
+    batch, stored = [], 0
+    for record in checkpoint_records(output_path):
+        batch.append({"file_hash": record["sha256"], "data": record["data"], "file_name": record["source"],
+                      "requisition": requisition, "cache_key": resume_cache_key(record["sha256"])})
+        if len(batch) >= STORE_BATCH:
+            stored += len(store.bulk_upsert_resumes(batch))
+            batch = []
+    if batch:
+        stored += len(store.bulk_upsert_resumes(batch))
+    return stored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse a directory or zip of PDF resumes into JSONL")
+    parser.add_argument("input", help="Directory of PDFs or a .zip archive")
+    parser.add_argument("-o", "--output", default="parsed_resumes.jsonl", help="JSONL file to append results to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes used for PDF text extraction")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum LLM calls in flight")
+    parser.add_argument("--rpm", type=float, default=30, help="Maximum LLM requests per minute (0 for no limit)")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per resume on LLM errors")
+    parser.add_argument("--store", action="store_true", help="Also save parsed resumes to the candidate store")
+    parser.add_argument("--requisition", help="Requisition ID recorded with every stored candidate")
+    args = parser.parse_args(argv)
+
+    sources = collect_sources(args.input)
+    done = load_checkpoint(args.output)
+    pending = [source for source in sources if source_name(source) not in done]
+    print(f"Found {len(sources)} PDFs, {len(sources) - len(pending)} already parsed", file=sys.stderr)
+
+    store = None
+    if args.store:
+        from scripts.candidate_store import get_candidate_store
+        store = get_candidate_store()
+        # Resumes checkpointed by earlier runs are (re)saved too; upserts are idempotent
+        if len(sources) > len(pending):
+            stored = store_checkpoint(args.output, store, args.requisition)
+            print(f"Saved {stored} already parsed resumes to the candidate store", file=sys.stderr)
+
+    if not pending:
+        return 0
+
+    started = time.perf_counter()
+
+    counts = asyncio.run(run_batch(
+        pending, args.output, args.workers, args.concurrency, args.rpm, args.retries,
+        store=store, requisition=args.requisition
+    ))
+    elapsed = time.perf_counter() - started
+    print(
+        f"Parsed {counts['ok']}, cached {counts['cached']}, truncated {counts['truncated']}, "
+        f"failed {counts['error']} in {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+import glob
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+from scripts import metrics
+from scripts.cache import CACHE_DIR
+
+CHROME_DIR = os.getenv("SMARTHIRE_CHROME_DIR", os.path.join(CACHE_DIR, "chrome"))
+LINKEDIN_HOME = "https://www.linkedin.com/"
+LINKEDIN_FEED = "https://www.linkedin.com/feed/"
+
+_service_lock = threading.Lock()
+_service_path = None
+_secret_lock = threading.Lock()
+_secret = None
+
+
+# Per-install secret for credential_key, created on first use and readable by this user only
+def _credential_secret():
+    global _secret
+    with _secret_lock:
+        if _secret is None:
+            os.makedirs(CHROME_DIR, mode=0o700, exist_ok=True)
+            path = os.path.join(CHROME_DIR, "credential.key")
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            except FileExistsError:
+                with open(path, "rb") as f:
+                    _secret = f.read()
+            else:
+                _secret = secrets.token_bytes(32)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(_secret)
+    return _secret
+
+
+# Keyed hash of the email *and* password. Browsers, Chrome profiles and saved cookies are looked up
+# by it, so a logged-in LinkedIn session is only reused by someone who typed the same credentials;
+# anyone else gets a fresh browser and has to pass LinkedIn's own login.
+def credential_key(email, password):
+    message = f"{email.strip().lower()}\0{password}".encode("utf-8")
+    return hmac.new(_credential_secret(), message, hashlib.sha256).hexdigest()[:32]
+
+
+def chrome_options(profile_dir=None):
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # Run in headless mode
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-notifications")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-infobars")
+    chrome_options.add_argument("--mute-audio")
+    chrome_options.add_argument("--log-level=3")  # Minimal logging
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36")
+    if profile_dir:
+        chrome_options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    return chrome_options
+
+
+# Resolve the chromedriver binary once per process instead of on every scrape
+def _driver_path():
+    global _service_path
+    with _service_lock:
+        if _service_path is None:
+            try:
+                from webdriver_manager.chrome import ChromeDriverManager
+                _service_path = ChromeDriverManager().install()
+            except Exception:
+                _service_path = ""  # fall back to Selenium's own driver lookup
+    return _service_path
+
+
+def start_driver(profile_dir=None):
+    from selenium import webdriver
+
+    options = chrome_options(profile_dir)
+    path = _driver_path()
+    if path:
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        return webdriver.Chrome(service=ChromeService(path), options=options)
+    return webdriver.Chrome(options=options)
+
+
+# Records how long each named phase of a scrape takes (also reported as linkedin.<phase> spans)
+class PhaseTimer:
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            with metrics.span(f"linkedin.{name}"):
+                yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def total(self):
+        return sum(self.timings.values())
+
+
+# Wait until condition(driver) is truthy; returns its value, or None on timeout
+def wait_for(driver, condition, timeout=15, poll=0.2):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=poll).until(condition)
+    except TimeoutException:
+        return None
+
+
+# Scroll to the bottom until the page height stops growing (lazy-loaded sections have rendered)
+def scroll_until_stable(driver, timeout=10, settle=0.75, poll=0.15):
+    deadline = time.monotonic() + timeout
+    height = driver.execute_script("return document.body.scrollHeight")
+    while time.monotonic() < deadline:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        grew = wait_for(
+            driver,
+            lambda d: d.execute_script("return document.body.scrollHeight") > height,
+            timeout=min(settle, max(0.0, deadline - time.monotonic())),
+            poll=poll,
+        )
+        if not grew:
+            break
+        height = driver.execute_script("return document.body.scrollHeight")
+    return height
+
+
+# A warm browser bound to one set of LinkedIn credentials, with its own Chrome profile directory.
+# `cookie_jar` is the pool's in-memory {account: cookies}; cookies are never written to disk.
+class BrowserSession:
+    def __init__(self, account, slot, cookie_jar=None):
+        self.account = account
+        self.slot = slot
+        self.cookie_jar = {} if cookie_jar is None else cookie_jar
+        self.profile_dir = os.path.join(CHROME_DIR, f"{self.account}-{slot}")
+        os.makedirs(CHROME_DIR, mode=0o700, exist_ok=True)
+        os.makedirs(self.profile_dir, mode=0o700, exist_ok=True)
+        self.driver = start_driver(self.profile_dir)
+        self.logged_in = False
+        self.broken = False
+        self.last_used = time.monotonic()
+
+    # Share cookies so other sessions for the same credentials can skip the login form
+    def save_cookies(self):
+        self.cookie_jar[self.account] = self.driver.get_cookies()
+
+    # Try to resume a logged-in LinkedIn session from the profile dir or shared cookies
+    def restore_login(self):
+        from selenium.common.exceptions import WebDriverException
+
+        self.driver.get(LINKEDIN_FEED)
+        if self._on_feed():
+            self.logged_in = True
+            return True
+
+        cookies = self.cookie_jar.get(self.account)
+        if not cookies:
+            return False
+
+        self.driver.get(LINKEDIN_HOME)
+        for cookie in cookies:
+            cookie = {key: value for key, value in cookie.items() if key != "sameSite"}
+            try:
+                self.driver.add_cookie(cookie)
+            except WebDriverException:
+                continue
+        self.driver.get(LINKEDIN_FEED)
+        self.logged_in = self._on_feed()
+        return self.logged_in
+
+    def _on_feed(self):
+        url = self.driver.current_url.lower()
+        return "login" not in url and "authwall" not in url and "checkpoint" not in url
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+# Keeps up to `size` browsers alive and leases them out one request at a time
+class DriverPool:
+    def __init__(self, size=2, idle_timeout=15 * 60):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._idle = []
+        self._busy = 0
+        self._slots = set(range(size))
+        self._cookies = {}
+        self._cond = threading.Condition()
+        # Older versions kept each account's cookies in plain JSON next to the profiles
+        for path in glob.glob(os.path.join(CHROME_DIR, "*-cookies.json")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _reap_idle(self):
+        now = time.monotonic()
+        for session in [s for s in self._idle if now - s.last_used > self.idle_timeout]:
+            self._idle.remove(session)
+            self._release_slot(session)
+            session.quit()
+
+    def _release_slot(self, session):
+        self._slots.add(session.slot)
+
+    # Lease a browser for these credentials, preferring one already logged in with them.
+    # Sessions marked broken (or raising out of the block) are quit instead of returned.
+    @contextmanager
+    def lease(self, email, password, timeout=300):
+        account = credential_key(email, password)
+        deadline = time.monotonic() + timeout
+        session = None
+        slot = None
+
+        with self._cond:
+            while True:
+                self._reap_idle()
+                matching = [s for s in self._idle if s.account == account]
+                if matching:
+                    session = matching[0]
+                    self._idle.remove(session)
+                    break
+                if self._slots:
+                    slot = self._slots.pop()
+                    break
+                if self._idle:
+                    # Recycle a browser logged in to a different account
+                    stale = self._idle.pop(0)
+                    self._release_slot(stale)
+                    stale.quit()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("No browser session became available")
+                self._cond.wait(remaining)
+            self._busy += 1
+
+        if session is None:
+            try:
+                session = BrowserSession(account, slot, self._cookies)
+            except Exception:
+                with self._cond:
+                    self._slots.add(slot)
+                    self._busy -= 1
+                    self._cond.notify()
+                raise
+
+        try:
+            yield session
+        except Exception:
+            session.broken = True
+            raise
+        finally:
+            session.last_used = time.monotonic()
+            with self._cond:
+                self._busy -= 1
+                if session.broken:
+                    self._release_slot(session)
+                    session.quit()
+                else:
+                    self._idle.append(session)
+                self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {"size": self.size, "busy": self._busy, "idle": len(self._idle)}
+
+    def close(self):
+        with self._cond:
+            for session in self._idle:
+                self._release_slot(session)
+                session.quit()
+            self._idle = []
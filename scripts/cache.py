@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from scripts import metrics
+
+CACHE_DIR = os.getenv("SMARTHIRE_CACHE_DIR", ".cache")
+RESUME_CACHE_PATH = os.path.join(CACHE_DIR, "resume_parse.sqlite3")
+
+
+# Build a stable hex digest from bytes/str parts (length-prefixed so parts can't run together)
+def content_hash(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+# SQLite backed key/value cache with a TTL and least-recently-used eviction by total size
+class DiskCache:
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, ttl=7 * 24 * 3600):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Label for metrics, e.g. "resume_parse"
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                metrics.incr("cache_requests_total", cache=self.name, result="miss")
+                return default
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        metrics.incr("cache_requests_total", cache=self.name, result="hit")
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.ttl:
+            self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl,))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop the least recently used entries until we are back under the size limit
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
@@ -0,0 +1,318 @@
+## Central candidate repository
+##
+## Parsed resumes, LinkedIn sections and their analyses are stored per candidate, so any page
+## can find earlier results by email, skill, requisition, resume hash or profile URL instead of
+## parsing again. Two interchangeable backends:
+##   MongoCandidateStore   - a MongoDB collection (used when MONGO_URI is set)
+##   SqliteCandidateStore  - an embedded SQLite file, or ":memory:" for tests and local runs
+## Pick one explicitly with SMARTHIRE_CANDIDATE_STORE=mongo|sqlite|memory.
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from scripts.cache import CACHE_DIR
+from scripts.skills import normalize_skill
+
+CANDIDATE_STORE_PATH = os.path.join(CACHE_DIR, "candidates.sqlite3")
+CANDIDATES_COLLECTION = "candidates"
+
+# Fields that accumulate values across updates instead of being overwritten
+SET_FIELDS = ("skills", "skill_keys", "requisitions", "resume_hashes", "linkedin_urls")
+
+
+def normalize_email(email):
+    email = (email or "").strip().lower()
+    return email if "@" in email else None
+
+
+def normalize_profile_url(url):
+    url = (url or "").strip().split("?")[0].split("#")[0].rstrip("/")
+    return re.sub(r"^https?://(www\.)?", "https://www.", url.lower())
+
+
+def skill_key(skill):
+    return " ".join(normalize_skill(str(skill)))
+
+
+def _personal_info(data):
+    info = data.get("personal_info") if isinstance(data, dict) else None
+    return info if isinstance(info, dict) else {}
+
+
+def _flatten(value):
+    if isinstance(value, dict):
+        return [text for item in value.values() for text in _flatten(item)]
+    if isinstance(value, list):
+        return [text for item in value for text in _flatten(item)]
+    text = str(value).strip() if value is not None else ""
+    return [text] if text else []
+
+
+# Plain text of a stored candidate (parsed resume, then LinkedIn sections) for ranking and evaluation.
+# Skills go last under their own heading, so SkillIndex.match_resume treats them as the skills section.
+def candidate_text(candidate):
+    data = dict((candidate.get("resume") or {}).get("data") or {})
+    data.pop("skills", None)
+    lines = _flatten(data) + _flatten((candidate.get("linkedin") or {}).get("sections"))
+    if candidate.get("skills"):
+        lines += ["Skills", ", ".join(candidate["skills"])]
+    return "\n".join(lines)
+
+
+# A pending change to one candidate: fields to overwrite and values to add to the SET_FIELDS lists
+def resume_update(file_hash, data, file_name="", requisition=None, cache_key=None):
+    info = _personal_info(data)
+    email = normalize_email(info.get("email"))
+    skills = [str(skill) for skill in (data.get("skills") or []) if str(skill).strip()]
+    fields = {
+        "resume": {
+            "file_hash": file_hash,
+            "file_name": file_name,
+            "cache_key": cache_key,
+            "data": data,
+            "parsed_at": time.time(),
+        },
+    }
+    if email:
+        fields["email"] = email
+    if info.get("name"):
+        fields["name"] = info["name"]
+    add = {
+        "skills": skills,
+        "skill_keys": [key for key in dict.fromkeys(skill_key(skill) for skill in skills) if key],
+        "resume_hashes": [file_hash],
+        "requisitions": [requisition] if requisition else [],
+    }
+    return email or f"resume:{file_hash}", fields, add
+
+
+def linkedin_update(profile_url, sections=None, analyses=None, email=None, requisition=None):
+    url = normalize_profile_url(profile_url)
+    email = normalize_email(email)
+    fields = {"linkedin.url": url, "linkedin.updated_at": time.time()}
+    if sections is not None:
+        fields["linkedin.sections"] = sections
+    if analyses is not None:
+        fields["linkedin.analyses"] = analyses
+    if email:
+        fields["email"] = email
+    add = {"linkedin_urls": [url], "requisitions": [requisition] if requisition else []}
+    return email or f"linkedin:{url}", fields, add
+
+
+# Shared query API; backends implement _apply, get and the _find_* lookups
+class CandidateStore:
+    def upsert_resume(self, file_hash, data, file_name="", requisition=None, cache_key=None):
+        return self.bulk_upsert([resume_update(file_hash, data, file_name, requisition, cache_key)])[0]
+
+    # items: dicts with file_hash, data and optionally file_name, requisition, cache_key
+    def bulk_upsert_resumes(self, items):
+        return self.bulk_upsert([resume_update(**item) for item in items])
+
+    def upsert_linkedin(self, profile_url, sections=None, analyses=None, email=None, requisition=None):
+        return self.bulk_upsert([linkedin_update(profile_url, sections, analyses, email, requisition)])[0]
+
+    # Apply many (candidate_id, fields, add) updates in one round trip; returns the candidate ids
+    def bulk_upsert(self, updates):
+        updates = list(updates)
+        if updates:
+            self._apply(updates)
+        return [candidate_id for candidate_id, _, _ in updates]
+
+    def find_by_email(self, email):
+        email = normalize_email(email)
+        return self._find_one("email", email) if email else None
+
+    def find_by_resume(self, file_hash):
+        return self._find_one("resume_hashes", file_hash)
+
+    def find_by_linkedin(self, profile_url):
+        return self._find_one("linkedin_urls", normalize_profile_url(profile_url))
+
+    # Candidates having any (or, with match_all, every) of the given skills
+    def find_by_skills(self, skills, match_all=False, limit=50):
+        keys = [key for key in dict.fromkeys(skill_key(skill) for skill in skills) if key]
+        if not keys:
+            return []
+        return self._find_by_skill_keys(keys, match_all, limit)
+
+    def find_by_requisition(self, requisition, limit=200):
+        return self._find_many("requisitions", requisition, limit)
+
+
+def _merge(document, fields, add, now):
+    for key, value in fields.items():
+        target = document
+        *parents, leaf = key.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = value
+    for key, values in add.items():
+        existing = document.setdefault(key, [])
+        existing.extend(value for value in values if value not in existing)
+    document.setdefault("created_at", now)
+    document["updated_at"] = now
+    return document
+
+
+# Embedded backend: one JSON document per candidate plus lookup tables for every indexed field
+class SqliteCandidateStore(CandidateStore):
+    INDEXED = {
+        "email": ("candidate_emails", "email"),
+        "skill_keys": ("candidate_skills", "skill"),
+        "requisitions": ("candidate_requisitions", "requisition"),
+        "resume_hashes": ("candidate_resumes", "file_hash"),
+        "linkedin_urls": ("candidate_profiles", "url"),
+    }
+
+    def __init__(self, path=CANDIDATE_STORE_PATH):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS candidates (
+                id TEXT PRIMARY KEY,
+                doc TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )""")
+        for table, column in self.INDEXED.values():
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {column} TEXT NOT NULL,
+                    candidate_id TEXT NOT NULL,
+                    PRIMARY KEY ({column}, candidate_id)
+                ) WITHOUT ROWID""")
+        self._conn.commit()
+
+    def _apply(self, updates):
+        now = time.time()
+        with self._lock, self._conn:
+            for candidate_id, fields, add in updates:
+                row = self._conn.execute("SELECT doc FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+                document = json.loads(row[0]) if row else {"_id": candidate_id}
+                _merge(document, fields, add, now)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO candidates (id, doc, updated_at) VALUES (?, ?, ?)",
+                    (candidate_id, json.dumps(document), now),
+                )
+                # Rebuild the candidate's lookup rows, so values it no longer has stop matching
+                for field, (table, column) in self.INDEXED.items():
+                    values = document.get(field)
+                    values = [values] if isinstance(values, str) else values or []
+                    self._conn.execute(f"DELETE FROM {table} WHERE candidate_id = ?", (candidate_id,))
+                    self._conn.executemany(
+                        f"INSERT OR IGNORE INTO {table} ({column}, candidate_id) VALUES (?, ?)",
+                        [(value, candidate_id) for value in values],
+                    )
+
+    def _load(self, ids, limit=None):
+        if not ids:
+            return []
+        ids = list(ids)[:limit] if limit else list(ids)
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT doc FROM candidates WHERE id IN ({placeholders}) ORDER BY updated_at DESC", ids
+            ).fetchall()
+        return [json.loads(doc) for doc, in rows]
+
+    def _ids(self, field, value):
+        table, column = self.INDEXED[field]
+        with self._lock:
+            rows = self._conn.execute(f"SELECT candidate_id FROM {table} WHERE {column} = ?", (value,)).fetchall()
+        return [candidate_id for candidate_id, in rows]
+
+    def get(self, candidate_id):
+        found = self._load([candidate_id])
+        return found[0] if found else None
+
+    def _find_one(self, field, value):
+        found = self._load(self._ids(field, value))
+        return found[0] if found else None
+
+    def _find_many(self, field, value, limit):
+        return self._load(self._ids(field, value), limit)
+
+    def _find_by_skill_keys(self, keys, match_all, limit):
+        placeholders = ",".join("?" * len(keys))
+        query = f"SELECT candidate_id FROM candidate_skills WHERE skill IN ({placeholders}) GROUP BY candidate_id"
+        if match_all:
+            query += f" HAVING COUNT(*) = {len(keys)}"
+        query += " ORDER BY COUNT(*) DESC LIMIT ?"
+        with self._lock:
+            ids = [candidate_id for candidate_id, in self._conn.execute(query, (*keys, limit)).fetchall()]
+        # Keep the best-matching candidates first
+        documents = {document["_id"]: document for document in self._load(ids)}
+        return [documents[candidate_id] for candidate_id in ids if candidate_id in documents]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+
+class MongoCandidateStore(CandidateStore):
+    def __init__(self, collection):
+        self.collection = collection
+        self.ensure_indexes()
+
+    def ensure_indexes(self):
+        self.collection.create_index("email", sparse=True)
+        self.collection.create_index("skill_keys")
+        self.collection.create_index("requisitions")
+        self.collection.create_index("resume_hashes")
+        self.collection.create_index("linkedin_urls")
+        self.collection.create_index("updated_at")
+
+    def _apply(self, updates):
+        from pymongo import UpdateOne
+
+        now = time.time()
+        operations = []
+        for candidate_id, fields, add in updates:
+            update = {"$set": {**fields, "updated_at": now}, "$setOnInsert": {"created_at": now}}
+            add = {key: {"$each": values} for key, values in add.items() if values}
+            if add:
+                update["$addToSet"] = add
+            operations.append(UpdateOne({"_id": candidate_id}, update, upsert=True))
+        self.collection.bulk_write(operations, ordered=False)
+
+    def get(self, candidate_id):
+        return self.collection.find_one({"_id": candidate_id})
+
+    def _find_one(self, field, value):
+        return self.collection.find_one({field: value}, sort=[("updated_at", -1)])
+
+    def _find_many(self, field, value, limit):
+        return list(self.collection.find({field: value}).sort("updated_at", -1).limit(limit))
+
+    def _find_by_skill_keys(self, keys, match_all, limit):
+        pipeline = [
+            {"$match": {"skill_keys": {"$all" if match_all else "$in": keys}}},
+            # skill_keys holds no duplicates, so this counts the distinct requested skills matched
+            {"$addFields": {"_matched": {"$size": {"$filter": {"input": "$skill_keys", "cond": {"$in": ["$$this", keys]}}}}}},
+            {"$sort": {"_matched": -1, "updated_at": -1}},
+            {"$limit": limit},
+            {"$project": {"_matched": 0}},
+        ]
+        return list(self.collection.aggregate(pipeline))
+
+    def count(self):
+        return self.collection.estimated_document_count()
+
+
+# The configured store; callers should cache it (pages use st.cache_resource)
+def get_candidate_store(backend=None):
+    from scripts.db import MONGO_URI, get_database
+
+    backend = backend or os.getenv("SMARTHIRE_CANDIDATE_STORE") or ("mongo" if MONGO_URI else "sqlite")
+    if backend == "mongo":
+        return MongoCandidateStore(get_database()[CANDIDATES_COLLECTION])
+    if backend == "memory":
+        return SqliteCandidateStore(":memory:")
+    return SqliteCandidateStore()
@@ -0,0 +1,409 @@
+## Shared LLM clients
+##
+## Every Groq and Gemini call goes through this module, so connection pools, concurrency and
+## rate limits, retries and per-call usage accounting are governed in one place.
+## Limits are per process and can be tuned with environment variables, e.g.
+##   SMARTHIRE_GROQ_CONCURRENCY=8 SMARTHIRE_GROQ_RPM=30 SMARTHIRE_GEMINI_CONCURRENCY=4 SMARTHIRE_GEMINI_RPM=15
+## GROQ_BASE_URL and GEMINI_API_ENDPOINT point the clients at another server (see benchmarks/fake_backends.py).
+import asyncio
+import functools
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+
+from scripts import metrics
+
+LLM_RETRIES = int(os.getenv("SMARTHIRE_LLM_RETRIES", "3"))
+GEMINI_MODEL = "gemini-1.5-flash"
+
+PROVIDER_DEFAULTS = {
+    "groq": {"concurrency": 8, "rpm": 0},
+    "gemini": {"concurrency": 4, "rpm": 0},
+}
+
+# Status codes worth retrying: timeouts, rate limits and server errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "TooManyRequests",
+}
+
+
+def _setting(provider, name):
+    return int(os.getenv(f"SMARTHIRE_{provider.upper()}_{name.upper()}", PROVIDER_DEFAULTS[provider][name]))
+
+
+# Caps in-flight calls and paces request starts for one provider (rpm=0 disables pacing)
+class ProviderLimiter:
+    def __init__(self, provider, max_concurrency, requests_per_minute=0):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    # Block until this request may start under the requests-per-minute budget
+    def wait_for_turn(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+    def acquire(self):
+        self._slots.acquire()
+        try:
+            self.wait_for_turn()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self):
+        self._slots.release()
+
+    def _release_acquired(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self.release()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    # The async variant waits in a worker thread so the event loop keeps running. The wait is
+    # shielded: if the task is cancelled, the slot is handed back as soon as the thread gets it.
+    @asynccontextmanager
+    async def async_slot(self):
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            acquiring.add_done_callback(self._release_acquired)
+            raise
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider):
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = ProviderLimiter(provider, _setting(provider, "concurrency"), _setting(provider, "rpm"))
+        return _limiters[provider]
+
+
+# Latency and token counts per (provider, model), plus a window of recent latencies for percentiles
+class UsageStats:
+    def __init__(self, window=500):
+        self.window = window
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider, model, latency, input_tokens=0, output_tokens=0, error=False):
+        metrics.observe("llm_request_seconds", latency, provider=provider, model=model)
+        metrics.incr("llm_tokens_total", input_tokens, provider=provider, model=model, kind="input")
+        metrics.incr("llm_tokens_total", output_tokens, provider=provider, model=model, kind="output")
+        if error:
+            metrics.incr("llm_errors_total", provider=provider, model=model)
+        # Token usage also rolls up into the span of the request that made the call
+        metrics.add_to_span(llm_calls=1, input_tokens=input_tokens, output_tokens=output_tokens)
+        with self._lock:
+            entry = self._calls.setdefault((provider, model), {
+                "calls": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0,
+                "latency_total": 0.0, "recent": deque(maxlen=self.window),
+            })
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["input_tokens"] += input_tokens or 0
+            entry["output_tokens"] += output_tokens or 0
+            entry["latency_total"] += latency
+            entry["recent"].append(latency)
+
+    def snapshot(self):
+        with self._lock:
+            rows = []
+            for (provider, model), entry in self._calls.items():
+                recent = sorted(entry["recent"])
+                rows.append({
+                    "provider": provider,
+                    "model": model,
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "input_tokens": entry["input_tokens"],
+                    "output_tokens": entry["output_tokens"],
+                    "avg_latency": entry["latency_total"] / entry["calls"],
+                    "p50_latency": recent[len(recent) // 2],
+                    "p95_latency": recent[min(len(recent) - 1, int(len(recent) * 0.95))],
+                })
+            return rows
+
+
+USAGE = UsageStats()
+
+
+def usage_stats():
+    return USAGE.snapshot()
+
+
+def _retryable(error):
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+# Retry fn() on rate limits and server errors with jittered exponential backoff
+def call_with_retries(fn, retries=LLM_RETRIES, base_delay=1.0):
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= retries or not _retryable(e):
+                raise
+            time.sleep(min(30.0, base_delay * 2 ** attempt) * (0.5 + random.random()))
+
+
+## Groq
+
+# One connection pool for every Groq call in the process (raw SDK and LangChain alike).
+# Its size is the provider's concurrency limit; extra requests wait for a free connection.
+@functools.lru_cache(maxsize=1)
+def _groq_http_client():
+    concurrency = get_limiter("groq").max_concurrency
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        timeout=httpx.Timeout(60.0, pool=None),
+    )
+
+
+# The Groq SDK already retries 408/409/429/5xx with jittered backoff, honouring Retry-After
+@functools.lru_cache(maxsize=16)
+def groq_client(api_key):
+    import groq
+    return groq.Client(api_key=api_key, max_retries=LLM_RETRIES, http_client=_groq_http_client())
+
+
+def _record_groq(model, started, usage, error=False):
+    USAGE.record(
+        "groq", model, time.perf_counter() - started,
+        getattr(usage, "prompt_tokens", 0), getattr(usage, "completion_tokens", 0), error,
+    )
+
+
+def groq_chat(api_key, model, messages, **kwargs):
+    with get_limiter("groq").slot():
+        started = time.perf_counter()
+        try:
+            response = groq_client(api_key).chat.completions.create(model=model, messages=messages, **kwargs)
+        except Exception:
+            _record_groq(model, started, None, error=True)
+            raise
+    _record_groq(model, started, response.usage)
+    return response
+
+
+# Yields the completion text piece by piece; the concurrency slot is held until the stream ends
+def groq_chat_stream(api_key, model, messages, **kwargs):
+    with get_limiter("groq").slot():
+        started = time.perf_counter()
+        usage = None
+        try:
+            stream = groq_client(api_key).chat.completions.create(model=model, messages=messages, stream=True, **kwargs)
+            for chunk in stream:
+                # Groq reports token usage on the final chunk
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None):
+                    usage = x_groq.usage
+                piece = chunk.choices[0].delta.content if chunk.choices else None
+                if piece:
+                    yield piece
+        except Exception:
+            _record_groq(model, started, usage, error=True)
+            raise
+        _record_groq(model, started, usage)
+
+
+_loop = None
+_loop_lock = threading.Lock()
+_async_groq_clients = {}
+
+
+# A long-lived event loop thread, so async clients and their connection pools outlive each Streamlit rerun
+def background_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-async", daemon=True).start()
+    return _loop
+
+
+# Schedule a coroutine on the background loop; returns a concurrent.futures.Future
+def submit(coro):
+    return asyncio.run_coroutine_threadsafe(coro, background_loop())
+
+
+def _async_groq_client(api_key):
+    # Only called from the background loop, so no locking needed
+    if api_key not in _async_groq_clients:
+        import groq
+        _async_groq_clients[api_key] = groq.AsyncGroq(api_key=api_key, max_retries=LLM_RETRIES)
+    return _async_groq_clients[api_key]
+
+
+# Must run on the background loop (see submit)
+async def groq_chat_async(api_key, model, messages, **kwargs):
+    async with get_limiter("groq").async_slot():
+        started = time.perf_counter()
+        try:
+            response = await _async_groq_client(api_key).chat.completions.create(model=model, messages=messages, **kwargs)
+        except Exception:
+            _record_groq(model, started, None, error=True)
+            raise
+    _record_groq(model, started, response.usage)
+    return response
+
+
+# Records latency and token usage for LangChain chat model calls. With a limiter, each call also
+# holds one of the provider's concurrency slots (and waits its turn under the requests-per-minute
+# budget) from start to end or error, like the raw SDK calls. LangChain runs this synchronous
+# handler in a worker thread for async calls, so waiting for a slot does not block the event loop.
+class UsageCallback(BaseCallbackHandler):
+    def __init__(self, provider, model, limiter=None):
+        self.provider = provider
+        self.model = model
+        self.limiter = limiter
+        self._started = {}
+        self._held = set()
+
+    def _start(self, run_id):
+        if self.limiter is not None:
+            self.limiter.acquire()
+            self._held.add(run_id)
+        self._started[run_id] = time.perf_counter()
+
+    def _release(self, run_id):
+        try:
+            self._held.remove(run_id)
+        except KeyError:
+            return
+        self.limiter.release()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._release(run_id)
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+        if not usage and response.generations and response.generations[0]:
+            # Streamed responses carry usage on the message instead
+            metadata = getattr(getattr(response.generations[0][0], "message", None), "usage_metadata", None) or {}
+            input_tokens = metadata.get("input_tokens", 0)
+            output_tokens = metadata.get("output_tokens", 0)
+        USAGE.record(self.provider, self.model, time.perf_counter() - started, input_tokens, output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._release(run_id)
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            USAGE.record(self.provider, self.model, time.perf_counter() - started, error=True)
+
+
+# A LangChain ChatGroq that shares the process-wide Groq pool, limits and usage stats
+@functools.lru_cache(maxsize=16)
+def chat_groq(api_key, model_name):
+    from langchain_groq import ChatGroq
+    return ChatGroq(
+        groq_api_key=api_key,
+        model_name=model_name,
+        max_retries=LLM_RETRIES,
+        http_client=_groq_http_client(),
+        callbacks=[UsageCallback("groq", model_name, get_limiter("groq"))],
+    )
+
+
+## Gemini
+
+_genai_lock = threading.Lock()
+_genai_configured = False
+
+
+@functools.lru_cache(maxsize=8)
+def gemini_model(model_name=GEMINI_MODEL):
+    global _genai_configured
+    import google.generativeai as genai
+    with _genai_lock:
+        if not _genai_configured:
+            endpoint = os.getenv("GEMINI_API_ENDPOINT")
+            if endpoint:
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"), transport="rest",
+                                client_options={"api_endpoint": endpoint})
+            else:
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+            _genai_configured = True
+    return genai.GenerativeModel(model_name)
+
+
+def _record_gemini(model_name, started, response, error=False):
+    metadata = getattr(response, "usage_metadata", None)
+    USAGE.record(
+        "gemini", model_name, time.perf_counter() - started,
+        getattr(metadata, "prompt_token_count", 0), getattr(metadata, "candidates_token_count", 0), error,
+    )
+
+
+def gemini_generate(contents, model_name=GEMINI_MODEL):
+    model = gemini_model(model_name)
+    with get_limiter("gemini").slot():
+        started = time.perf_counter()
+        try:
+            response = call_with_retries(lambda: model.generate_content(contents))
+        except Exception:
+            _record_gemini(model_name, started, None, error=True)
+            raise
+    _record_gemini(model_name, started, response)
+    return response.text
+
+
+# Yields the response text chunk by chunk. Only the request itself is retried;
+# once text has been shown, a failure is raised rather than replayed.
+def gemini_stream(contents, model_name=GEMINI_MODEL):
+    model = gemini_model(model_name)
+    with get_limiter("gemini").slot():
+        started = time.perf_counter()
+        response = None
+        try:
+            response = call_with_retries(lambda: model.generate_content(contents, stream=True))
+            for chunk in response:
+                if chunk.parts:
+                    yield chunk.text
+        except Exception:
+            _record_gemini(model_name, started, response, error=True)
+            raise
+        _record_gemini(model_name, started, response)
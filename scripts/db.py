@@ -0,0 +1,27 @@
+import functools
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = os.getenv("SMARTHIRE_DB_NAME", "smarthire")
+MONGO_POOL_SIZE = int(os.getenv("SMARTHIRE_MONGO_POOL_SIZE", "20"))
+
+
+# One MongoClient (and its connection pool) per process and URI.
+# MongoClient is thread-safe and connects lazily, so this is cheap to call from every page.
+@functools.lru_cache(maxsize=4)
+def get_mongo_client(uri=None):
+    from pymongo import MongoClient
+    return MongoClient(
+        uri or MONGO_URI,
+        maxPoolSize=MONGO_POOL_SIZE,
+        serverSelectionTimeoutMS=5000,
+        appname="smarthire",
+    )
+
+
+def get_database(uri=None):
+    return get_mongo_client(uri)[DB_NAME]
@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from scripts import metrics
+from scripts.cache import CACHE_DIR, content_hash
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_CACHE_PATH = os.path.join(CACHE_DIR, "embeddings.sqlite3")
+EMBEDDING_BATCH_SIZE = int(os.getenv("SMARTHIRE_EMBED_BATCH_SIZE", "32"))
+EMBEDDING_CACHE_BYTES = int(os.getenv("SMARTHIRE_EMBED_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+
+# HuggingFace embeddings with a persistent per-chunk cache.
+# Vectors are keyed by (model name, text hash) and stored as compact float16/float32 blobs; like
+# DiskCache, the least recently used vectors are evicted once they take more than max_bytes.
+# Query vectors are looked up but never stored, so every chat question doesn't add a row.
+# The sentence-transformers model is only loaded the first time something is not in the cache.
+# Pass `model` to wrap another Embeddings implementation instead (e.g. a stand-in for benchmarks).
+class CachedEmbeddings(Embeddings):
+    def __init__(self, model_name=EMBEDDING_MODEL, cache_path=EMBEDDING_CACHE_PATH,
+                 batch_size=EMBEDDING_BATCH_SIZE, dtype="float16", model=None, max_bytes=EMBEDDING_CACHE_BYTES):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        self._model = model
+        self._model_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                dtype TEXT NOT NULL,
+                vector BLOB NOT NULL
+            )""")
+        # Tables from before eviction lack the size and access time
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")]
+        if "size" not in columns:
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE embeddings SET size = length(vector)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_accessed ON embeddings (accessed_at)")
+        self._conn.commit()
+
+    @property
+    def model(self):
+        with self._model_lock:
+            if self._model is None:
+                from langchain_huggingface import HuggingFaceEmbeddings
+                self._model = HuggingFaceEmbeddings(model_name=self.model_name)
+        return self._model
+
+    def _key(self, text):
+        return content_hash(self.model_name, text)
+
+    def _lookup(self, keys):
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                )
+                for key, dtype, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=dtype).astype(np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET accessed_at = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def _store(self, items):
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            blob = np.asarray(vector, dtype=self.dtype).tobytes()
+            rows.append((key, self.dtype.str, blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dtype, vector, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+            self._conn.commit()
+
+    # Drop the least recently used vectors until the cache is back under max_bytes
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY accessed_at ASC"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", stale)
+
+    def embed_documents(self, texts):
+        keys = [self._key(text) for text in texts]
+        vectors = self._lookup(list(set(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        metrics.incr("embedding_cache_total", len(texts) - len(missing), result="hit")
+        metrics.incr("embedding_cache_total", len(missing), result="miss")
+
+        # Embed only the texts we haven't seen, a batch at a time
+        missing_items = list(missing.items())
+        for start in range(0, len(missing_items), self.batch_size):
+            batch = missing_items[start:start + self.batch_size]
+            with metrics.span("embed.batch", texts=len(batch)):
+                embedded = self.model.embed_documents([text for _, text in batch])
+            new_items = [(key, vector) for (key, _), vector in zip(batch, embedded)]
+            self._store(new_items)
+            for key, vector in new_items:
+                vectors[key] = np.asarray(vector, dtype=self.dtype).astype(np.float32)
+
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_query(self, text):
+        key = self._key(text)
+        vector = self._lookup([key]).get(key)
+        if vector is not None:
+            self.hits += 1
+            metrics.incr("embedding_cache_total", result="hit")
+            return vector.tolist()
+        self.misses += 1
+        metrics.incr("embedding_cache_total", result="miss")
+        with metrics.span("embed.query"):
+            return list(self.model.embed_query(text))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "model_loaded": self._model is not None,
+        }
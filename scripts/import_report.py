@@ -0,0 +1,126 @@
+## Import-time report for the Streamlit pages
+##
+## Every module-level import of a page is what the first paint waits for. For each page this
+## imports those modules, in order, in a fresh interpreter with `python -X importtime`, and reports
+## the time each import statement adds plus the heaviest packages behind it:
+##   python -m scripts.import_report                      # app.py and every page
+##   python -m scripts.import_report pages/CHATBOT.py --top 15
+##   python -m scripts.import_report --json > import_times.json
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STDLIB = getattr(sys, "stdlib_module_names", frozenset({"site", "encodings", "importlib", "json", "time"}))
+
+# Runs in the child interpreter: times each import statement on top of the ones before it
+_CHILD = """
+import importlib, json, sys, time
+results = []
+for module in json.loads(sys.argv[1]):
+    started = time.perf_counter()
+    try:
+        importlib.import_module(module)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    results.append({"module": module, "seconds": time.perf_counter() - started, "error": error})
+print(json.dumps(results))
+"""
+
+
+# Module names imported at the top level of a script (imports inside functions are already lazy)
+def page_imports(path):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+# Parse `-X importtime` output into {top-level package: microseconds spent in its own modules}.
+# Self times are summed, so a package is charged for its modules wherever they were imported from.
+def _package_times(stderr):
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|", 2)
+        if not self_time.strip().isdigit():
+            continue
+        package = name.strip().split(".")[0]
+        # Interpreter start-up and the standard library are paid by every page alike
+        if package in STDLIB:
+            continue
+        totals[package] = totals.get(package, 0) + int(self_time)
+    return totals
+
+
+def measure_page(path, python=sys.executable):
+    modules = page_imports(path)
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", _CHILD, json.dumps(modules)],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    statements = json.loads(proc.stdout.strip().splitlines()[-1])
+    packages = sorted(_package_times(proc.stderr).items(), key=lambda item: item[1], reverse=True)
+    return {
+        "page": os.path.relpath(path, ROOT),
+        "total_seconds": sum(item["seconds"] for item in statements),
+        "imports": statements,
+        "packages": [{"package": name, "seconds": micros / 1e6} for name, micros in packages],
+    }
+
+
+def default_pages():
+    pages = [os.path.join(ROOT, "app.py")]
+    pages += sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))
+    return [page for page in pages if os.path.exists(page)]
+
+
+def print_report(report, top):
+    print(f"{report['page']}: {report['total_seconds']:.3f}s of imports before first paint")
+    for item in report["imports"]:
+        note = f"  ({item['error']})" if item["error"] else ""
+        print(f"  {item['seconds']:8.3f}s  {item['module']}{note}")
+    if top and report["packages"]:
+        print("  heaviest packages:")
+        for item in report["packages"][:top]:
+            print(f"  {item['seconds']:8.3f}s  {item['package']}")
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report how long each page's module-level imports take")
+    parser.add_argument("pages", nargs="*", help="Page scripts (default: app.py and pages/*.py)")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest packages to list per page")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for path in args.pages or default_pages():
+        try:
+            reports.append(measure_page(os.path.abspath(path)))
+        except (OSError, SyntaxError, RuntimeError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_report(report, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
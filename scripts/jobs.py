@@ -0,0 +1,298 @@
+## Background jobs for the Streamlit pages
+##
+## Long LLM and browser calls run on a shared thread pool instead of inside the Streamlit script,
+## so a rerun (any click) only stops the page from polling, never the work itself. Every job is
+## recorded in a SQLite table, and jobs are deduplicated by a hash of their input: submitting the
+## same work while it is queued or running (or shortly after it finished) returns the existing job id.
+## Several processes may share the table; each job records the process that runs it.
+import functools
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts import metrics
+from scripts.cache import CACHE_DIR, content_hash
+
+JOBS_PATH = os.path.join(CACHE_DIR, "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("SMARTHIRE_JOB_WORKERS", "8"))
+# Finished jobs older than this are removed when the runner starts
+JOB_RETENTION = float(os.getenv("SMARTHIRE_JOB_RETENTION", str(7 * 24 * 3600)))
+# How long a finished job is handed out again for the same input
+JOB_REUSE_AGE = float(os.getenv("SMARTHIRE_JOB_REUSE_AGE", "300"))
+
+FINISHED = ("done", "failed")
+
+
+def _boot_id():
+    try:
+        with open("/proc/sys/kernel/random/boot_id", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+# "<host>/<boot id>/<pid>" of this process; a pid only identifies a process within one boot
+def process_owner():
+    return f"{socket.gethostname()}/{_boot_id()}/{os.getpid()}"
+
+
+# Whether the process recorded as `owner` may still be running. Owners on other hosts can't be
+# checked and count as alive; jobs without an owner were written before owners were recorded.
+def owner_alive(owner):
+    try:
+        host, boot, pid = (owner or "").rsplit("/", 2)
+        pid = int(pid)
+    except ValueError:
+        return False
+    if host != socket.gethostname():
+        return True
+    if boot != _boot_id():
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name != "posix":
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# Add a column to a table created by an older version
+def add_missing_column(conn, table, column, declaration):
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+# Handed to every job function to report progress while it runs
+class JobContext:
+    def __init__(self, runner, job_id):
+        self.runner = runner
+        self.job_id = job_id
+
+    # fraction in [0, 1]; either argument may be left out
+    def progress(self, fraction=None, message=None):
+        self.runner._update(self.job_id, fraction, message)
+
+    # Partial output (e.g. streamed LLM text) shown while the job is still running
+    def append(self, text):
+        self.runner._append(self.job_id, text)
+
+    # Status-container methods, so a job can stand in wherever the pages pass st.empty()
+    def info(self, message):
+        self.progress(message=message)
+
+    success = warning = error = info
+
+
+class JobRunner:
+    def __init__(self, path=JOBS_PATH, max_workers=JOB_WORKERS, retention=JOB_RETENTION):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._partial = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="smarthire-job")
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                input_hash TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )""")
+        add_missing_column(self._conn, "jobs", "owner", "TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_input ON jobs (input_hash, id)")
+        self._owner = process_owner()
+        # Work held by a process that has since exited can never finish; other live processes'
+        # jobs are left alone
+        with self._lock:
+            stale = [
+                row["id"] for row in self._conn.execute(
+                    "SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')"
+                ).fetchall()
+                if not owner_alive(row["owner"])
+            ]
+            self._fail_interrupted(stale)
+        if retention:
+            self.prune(retention)
+
+    # Caller holds self._lock
+    def _fail_interrupted(self, job_ids):
+        self._conn.executemany(
+            "UPDATE jobs SET status = 'failed', error = 'Interrupted by a restart', finished_at = ? "
+            "WHERE id = ? AND status IN ('queued', 'running')",
+            [(time.time(), job_id) for job_id in job_ids],
+        )
+        self._conn.commit()
+
+    # Run fn(context, *args, **kwargs) in the background and return the job id.
+    # `key` (a string, or anything JSON serializable) identifies the input and defaults to the
+    # arguments themselves. A job with the same kind and key that is queued, running, or finished
+    # within max_age seconds is reused; max_age=0 only joins work still in flight, which is what an
+    # explicit "run again" should use. Results must be JSON serializable.
+    def submit(self, kind, fn, *args, key=None, max_age=JOB_REUSE_AGE, **kwargs):
+        if key is None:
+            key = [args, kwargs]
+        if not isinstance(key, (str, bytes)):
+            key = json.dumps(key, sort_keys=True, default=str)
+        input_hash = content_hash(kind, key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, finished_at, owner FROM jobs WHERE input_hash = ? AND status != 'failed' "
+                "ORDER BY id DESC LIMIT 1",
+                (input_hash,),
+            ).fetchone()
+            if row and row["status"] != "done" and not owner_alive(row["owner"]):
+                self._fail_interrupted([row["id"]])
+            elif row and (row["status"] != "done" or now - row["finished_at"] <= max_age):
+                metrics.incr("jobs_deduplicated_total", kind=kind)
+                return row["id"]
+            job_id = self._conn.execute(
+                "INSERT INTO jobs (kind, input_hash, created_at, owner) VALUES (?, ?, ?, ?)",
+                (kind, input_hash, now, self._owner),
+            ).lastrowid
+            self._conn.commit()
+        metrics.incr("jobs_submitted_total", kind=kind)
+        self._executor.submit(self._run, job_id, kind, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, kind, fn, args, kwargs):
+        started = time.time()
+        with self._lock:
+            created_at = self._conn.execute("SELECT created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            self._conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (started, job_id))
+            self._conn.commit()
+        metrics.observe("job_queue_seconds", started - created_at, kind=kind)
+
+        status, result, error = "done", None, None
+        try:
+            with metrics.span("job.run", kind=kind, job_id=job_id):
+                result = json.dumps(fn(JobContext(self, job_id), *args, **kwargs), default=str)
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END, "
+                "result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, status, result, error, time.time(), job_id),
+            )
+            self._conn.commit()
+            self._partial.pop(job_id, None)
+        metrics.incr("jobs_total", kind=kind, status=status)
+
+    def _update(self, job_id, fraction=None, message=None):
+        with self._lock:
+            if fraction is not None:
+                self._conn.execute(
+                    "UPDATE jobs SET progress = ? WHERE id = ?", (min(max(float(fraction), 0.0), 1.0), job_id)
+                )
+            if message is not None:
+                self._conn.execute("UPDATE jobs SET message = ? WHERE id = ?", (str(message), job_id))
+            self._conn.commit()
+
+    # Partial output lives in memory only; the finished result replaces it
+    def _append(self, job_id, text):
+        with self._lock:
+            self._partial[job_id] = self._partial.get(job_id, "") + text
+
+    # The job as a dict (result decoded, plus any partial output), or None if unknown
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            partial = self._partial.get(job_id, "")
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["partial"] = partial
+        return job
+
+    # Block until the job finishes (or timeout seconds pass) and return it
+    def wait(self, job_id, timeout=None, poll=0.2):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(poll)
+
+    def jobs(self, kind=None, limit=50):
+        query = "SELECT id, kind, status, progress, message, error, created_at, started_at, finished_at FROM jobs"
+        params = ()
+        if kind:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id DESC LIMIT ?", (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    # Delete finished jobs older than max_age seconds; returns how many were removed
+    def prune(self, max_age):
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (time.time() - max_age,)
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# One runner (and worker pool) per process, shared by every page and session.
+# Also starts the metrics server, whichever page is opened first.
+@functools.lru_cache(maxsize=None)
+def get_job_runner():
+    metrics.serve_metrics_from_env()
+    return JobRunner()
+
+
+# Poll a job from a Streamlit script until it finishes, showing its progress and, through
+# render_partial(placeholder, text), any partial output. A rerun only stops this loop; the next
+# run picks the job up again by id. Returns the finished job dict (or None if it is unknown).
+def follow_job(job_id, render_partial=None, runner=None, poll=0.25):
+    import streamlit as st
+
+    runner = runner or get_job_runner()
+    bar = st.empty()
+    placeholder = st.empty()
+    shown = ""
+    job = runner.get(job_id)
+    while job is not None and job["status"] not in FINISHED:
+        text = job["message"] or ("Waiting for a free worker..." if job["status"] == "queued" else "Working...")
+        bar.progress(job["progress"], text=text)
+        if render_partial and job["partial"] != shown:
+            shown = job["partial"]
+            render_partial(placeholder, shown)
+        time.sleep(poll)
+        job = runner.get(job_id)
+    bar.empty()
+    placeholder.empty()
+    return job
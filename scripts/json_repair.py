@@ -0,0 +1,103 @@
+import json
+import re
+
+FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+# Fields the resume parser is expected to return, with their empty defaults
+RESUME_FIELDS = {
+    "personal_info": dict,
+    "education": list,
+    "experience": list,
+    "skills": list,
+    "certifications": list,
+    "languages": list,
+}
+
+
+# Raised by repair_json when the text only parses after closing what a cut-off response left open
+class TruncatedJSONError(ValueError):
+    pass
+
+
+# Close any brackets/strings left open by a truncated model response
+def _balance(text):
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+
+    if in_string:
+        text += '"'
+    return text + "".join(reversed(stack))
+
+
+# Try to turn loosely formatted model output into JSON without another LLM call.
+# Returns the decoded data, or raises ValueError if the text can't be repaired locally.
+# Output that only parses once open brackets/strings are closed was cut off, so it is
+# rejected unless allow_truncated is set.
+def repair_json(text, allow_truncated=False):
+    if not isinstance(text, str):
+        return text
+
+    candidate = FENCE_RE.sub("", text.strip()).translate(SMART_QUOTES)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+
+    # Drop any preamble/epilogue around the outermost object
+    start = candidate.find("{")
+    if start == -1:
+        raise ValueError("No JSON object found in model output")
+    end = candidate.rfind("}")
+    candidate = candidate[start:end + 1] if end > start else candidate[start:]
+
+    try:
+        return json.loads(TRAILING_COMMA_RE.sub(r"\1", candidate))
+    except json.JSONDecodeError:
+        pass
+
+    balanced = _balance(candidate)
+    if balanced != candidate:
+        try:
+            data = json.loads(TRAILING_COMMA_RE.sub(r"\1", balanced))
+        except json.JSONDecodeError:
+            pass
+        else:
+            if allow_truncated:
+                return data
+            raise TruncatedJSONError("Model output was truncated")
+    raise ValueError("Could not repair JSON locally")
+
+
+# Check the parsed resume has the expected shape, filling in missing fields
+def validate_resume(data):
+    if not isinstance(data, dict):
+        raise ValueError("Parsed resume is not a JSON object")
+
+    for field, kind in RESUME_FIELDS.items():
+        value = data.get(field)
+        if value is None:
+            data[field] = kind()
+        elif kind is list and isinstance(value, str):
+            data[field] = [item.strip() for item in value.split(",") if item.strip()]
+        elif not isinstance(value, kind):
+            raise ValueError(f"Field '{field}' should be a {kind.__name__}")
+
+    data["skills"] = [str(skill) for skill in data["skills"]]
+    return data
@@ -0,0 +1,259 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import as_completed
+
+from scripts.browser_pool import PhaseTimer, wait_for, scroll_until_stable
+from scripts.cache import CACHE_DIR, DiskCache, content_hash
+from scripts.clients import groq_chat, groq_chat_async, groq_chat_stream, submit
+from scripts.linkedin_parser import LogStatus, parse_profile_sections
+
+# Scrape one profile with a browser leased from `pool`.
+# `status` receives progress messages (a Streamlit container or LogStatus); returns (section_data, section_titles)
+def scrape_profile(pool, email, password, profile_url, status=None, timer=None, save_html=None):
+    status = status or LogStatus()
+    timer = timer or PhaseTimer()
+    try:
+        with pool.lease(email, password) as session:
+            return _scrape_with_session(session, email, password, profile_url, status, timer, save_html)
+    except Exception as e:
+        status.error(f"Error occurred: {str(e)}")
+        return None, None
+
+def _scrape_with_session(session, email, password, profile_url, debug_container, timer, save_html):
+    # selenium is only needed once a browser exists, so pages importing this module stay light
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import NoSuchElementException, ElementNotInteractableException
+
+    driver = session.driver
+    try:
+        if not session.logged_in:
+            debug_container.info("Restoring saved LinkedIn session...")
+            with timer.phase("restore_session"):
+                session.restore_login()
+
+        if not session.logged_in:
+            debug_container.info("Opening LinkedIn login page...")
+            # Go to LinkedIn login page and wait for the form to render
+            with timer.phase("login_page"):
+                driver.get("https://www.linkedin.com/login")
+                form_ready = wait_for(driver, EC.presence_of_element_located((By.ID, "username")), timeout=15)
+            
+            debug_container.info("Entering login credentials...")
+            # Check if on login page
+            if not form_ready or "login" not in driver.current_url.lower():
+                debug_container.error("Not on LinkedIn login page. Current URL: " + driver.current_url)
+                return None, None
+            
+            # Find and fill in email and password fields
+            email_field = driver.find_element(By.ID, "username")
+            email_field.clear()
+            email_field.send_keys(email)
+            
+            password_field = driver.find_element(By.ID, "password")
+            password_field.clear()
+            password_field.send_keys(password)
+            
+            # Click login button
+            debug_container.info("Clicking login button...")
+            login_button = driver.find_element(By.XPATH, "//button[@type='submit']")
+            login_button.click()
+            
+            # Wait until we leave the login page or LinkedIn shows an error
+            debug_container.info("Waiting for login to complete...")
+            with timer.phase("login"):
+                wait_for(
+                    driver,
+                    lambda d: "login" not in d.current_url.lower() or d.find_elements(By.ID, "error-for-username"),
+                    timeout=20,
+                )
+            
+            # Check if we're still on the login page (failed login)
+            if "login" in driver.current_url.lower():
+                error_element = driver.find_elements(By.ID, "error-for-username")
+                if error_element:
+                    debug_container.error(f"Login failed: {error_element[0].text}")
+                else:
+                    debug_container.error("Login failed: Still on login page")
+                return None, None
+
+            session.logged_in = True
+            session.save_cookies()
+            debug_container.info("Login successful. Navigating to profile...")
+        else:
+            debug_container.info("Reusing logged-in browser. Navigating to profile...")
+            
+        # Now navigate to the profile URL and wait for its sections (or an authwall)
+        debug_container.info("Waiting for profile to load...")
+        with timer.phase("profile_load"):
+            driver.get(profile_url)
+            wait_for(
+                driver,
+                lambda d: "authwall" in d.current_url.lower() or d.find_elements(By.CSS_SELECTOR, "main section"),
+                timeout=20,
+            )
+        
+        # Check if we have access to the profile
+        if "authwall" in driver.current_url.lower():
+            # The saved session has expired; log in again next time
+            session.logged_in = False
+            debug_container.error("Access blocked: LinkedIn is requiring authentication")
+            return None, None
+        
+        # Scroll down to load dynamic content
+        debug_container.info("Scrolling to load profile content...")
+        with timer.phase("scroll"):
+            scroll_until_stable(driver)
+        
+        # Get page source and parse the profile sections
+        debug_container.info("Extracting profile data...")
+        with timer.phase("page_source"):
+            page_source = driver.page_source
+
+        # Save the HTML for debugging
+        if save_html:
+            with open(save_html, "w", encoding="utf-8") as f:
+                f.write(page_source)
+
+        with timer.phase("parse"):
+            section_data, section_titles = parse_profile_sections(page_source, debug_container)
+        if not section_data:
+            return None, None
+        
+        debug_container.success(f"Successfully extracted {len(section_titles)} profile sections in {timer.total():.1f}s")
+        return section_data, section_titles
+        
+    except NoSuchElementException as e:
+        debug_container.error(f"Element not found: {str(e)}")
+        return None, None
+    except ElementNotInteractableException as e:
+        debug_container.error(f"Element not interactable: {str(e)}")
+        return None, None
+    except Exception as e:
+        # Don't hand a browser in an unknown state to the next request
+        session.broken = True
+        debug_container.error(f"Error during scraping: {str(e)}")
+        return None, None
+
+ANALYSIS_MODEL = "llama3-70b-8192"  # Use an appropriate Groq model
+ANALYSIS_SYSTEM_PROMPT = "You are an expert HR assistant analyzing LinkedIn profiles."
+ANALYSIS_PROMPT = """
+        You are an expert HR assistant. Analyze the following LinkedIn profile section "{section_name}" and provide valuable insights for HR professionals:
+        
+        {section_content}
+        
+        Your analysis should include:
+        1. Key skills and qualifications
+        2. Relevant experience
+        3. Potential fit for roles
+        4. Any red flags or points of concern
+        5. Suggestions for interview questions
+        
+        Format your response in a clear, structured way.
+        """
+ANALYSIS_CACHE_PATH = os.path.join(CACHE_DIR, "linkedin_analysis.sqlite3")
+
+
+def _messages(section_name, section_content):
+    return [
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": ANALYSIS_PROMPT.format(section_name=section_name, section_content=section_content)}
+    ]
+
+
+# Unchanged sections of a re-scraped profile reuse their earlier analysis
+def analysis_cache_key(section_name, section_content):
+    return content_hash(section_name, section_content, ANALYSIS_MODEL, ANALYSIS_SYSTEM_PROMPT, ANALYSIS_PROMPT)
+
+
+@functools.lru_cache(maxsize=1)
+def get_analysis_cache():
+    return DiskCache(ANALYSIS_CACHE_PATH)
+
+
+async def _analyze_async(section_name, section_content, api_key, semaphore):
+    async with semaphore:
+        try:
+            response = await groq_chat_async(
+                api_key, ANALYSIS_MODEL, _messages(section_name, section_content), max_tokens=1024
+            )
+            return response.choices[0].message.content, True
+        except Exception as e:
+            return f"Error analyzing section: {str(e)}", False
+
+
+# Analyze many sections concurrently, yielding (title, analysis, cached, ok) as each one finishes.
+# Cached analyses are yielded first; failed calls are yielded with ok=False (the analysis is the
+# error message) and are not cached.
+def iter_section_analyses(section_data, api_key, max_concurrency=4):
+    cache = get_analysis_cache()
+    pending = {}
+    for title, content in section_data.items():
+        key = analysis_cache_key(title, content)
+        analysis = cache.get(key)
+        if analysis is not None:
+            yield title, analysis, True, True
+        else:
+            pending[title] = (key, content)
+
+    if not pending:
+        return
+
+    async def make_semaphore():
+        return asyncio.Semaphore(max_concurrency)
+
+    semaphore = submit(make_semaphore()).result()
+    futures = {
+        submit(_analyze_async(title, content, api_key, semaphore)): (title, key)
+        for title, (key, content) in pending.items()
+    }
+    for future in as_completed(futures):
+        title, key = futures[future]
+        analysis, ok = future.result()
+        if ok:
+            cache.set(key, analysis)
+        yield title, analysis, False, ok
+
+
+# Function to analyze profile section with Groq
+def analyze_with_groq(section_name, section_content, api_key):
+    cache = get_analysis_cache()
+    key = analysis_cache_key(section_name, section_content)
+    analysis = cache.get(key)
+    if analysis is not None:
+        return analysis
+
+    try:
+        response = groq_chat(api_key, ANALYSIS_MODEL, _messages(section_name, section_content), max_tokens=1024)
+        
+        analysis = response.choices[0].message.content
+        cache.set(key, analysis)
+        return analysis
+    except Exception as e:
+        return f"Error analyzing section: {str(e)}"
+
+
+# Raised by stream_analysis when the model call fails part-way, so the partial text is not kept
+class AnalysisError(RuntimeError):
+    pass
+
+
+# Same as analyze_with_groq, but yields the analysis as it is generated.
+# A cached analysis is yielded in one piece; a completed stream is cached; a failed one raises AnalysisError.
+def stream_analysis(section_name, section_content, api_key):
+    cache = get_analysis_cache()
+    key = analysis_cache_key(section_name, section_content)
+    analysis = cache.get(key)
+    if analysis is not None:
+        yield analysis
+        return
+
+    try:
+        pieces = []
+        for piece in groq_chat_stream(api_key, ANALYSIS_MODEL, _messages(section_name, section_content), max_tokens=1024):
+            pieces.append(piece)
+            yield piece
+    except Exception as e:
+        raise AnalysisError(f"Error analyzing section: {str(e)}") from e
+    cache.set(key, "".join(pieces))
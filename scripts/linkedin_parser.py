@@ -0,0 +1,212 @@
+## LinkedIn profile HTML -> sections parser
+##
+## Works on saved profile pages without a browser. Parse a directory of exports in bulk:
+##   python -m scripts.linkedin_parser exports/ -o sections.jsonl --workers 4
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+# lxml is much faster than the built-in parser; fall back to html.parser without it
+bs4_parser = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+
+# Status sink used when no Streamlit container is given (background workers, CLI)
+class LogStatus:
+    def info(self, message):
+        logger.info(message)
+
+    def success(self, message):
+        logger.info(message)
+
+    def warning(self, message):
+        logger.warning(message)
+
+    def error(self, message):
+        logger.error(message)
+
+
+MAIN_PROFILE_CLASS = "ntZHYFHDcSquahgjxCbZqrlcNXPHAoZMHVnYWM"
+
+# Section headings LinkedIn tends to render twice, e.g. "HighlightsHighlights"
+COMMON_SECTIONS = [
+    "Highlights", "Experience", "Education", "Skills", "About", "Activity",
+    "Interests", "Licenses", "Certifications", "Open to work", "People you may know",
+    "You might like", "More profiles for you", "Explore Premium profiles",
+    "Licenses & certifications"
+]
+
+# One alternation for every heading (longest first) instead of a re.sub pass per heading
+DUPLICATE_HEADING_RE = re.compile(
+    "(" + "|".join(re.escape(name) for name in sorted(COMMON_SECTIONS, key=len, reverse=True)) + r")\1+",
+    re.IGNORECASE,
+)
+DOUBLED_TITLES = {name.lower() * 2: name for name in COMMON_SECTIONS}
+
+# Text nodes as BeautifulSoup's get_text sees them (comments are not text nodes;
+# script/style/template contents are stripped from the tree before extraction)
+TEXT_XPATH = ".//text()"
+
+
+def _has_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+# Function to clean text - removes duplicates and extra whitespace
+def clean_text(text):
+    # Collapse whitespace, then section name duplications (common LinkedIn issue)
+    text = " ".join(text.split())
+    count = 1
+    while count:
+        text, count = DUPLICATE_HEADING_RE.subn(r"\1", text)
+
+    # Skip any immediate duplicate words
+    return " ".join(word for word, _ in groupby(text.split()))
+
+# Function to extract clean text from a BeautifulSoup element
+def extract_clean_text(element):
+    # Get raw text
+    raw_text = element.get_text(strip=True, separator=' ')
+    # Clean up the text
+    return clean_text(raw_text)
+
+
+def _lxml_text(element, separator):
+    return separator.join(text.strip() for text in element.xpath(TEXT_XPATH) if text.strip())
+
+
+# Fast path: parse with lxml directly and only walk the section subtrees
+def _raw_sections_lxml(html):
+    import lxml.etree
+    import lxml.html
+
+    root = lxml.html.fromstring(html)
+    lxml.etree.strip_elements(root, "script", "style", "template", with_tail=False)
+    profile = (
+        root.xpath(f"//main[{_has_class(MAIN_PROFILE_CLASS)}]")
+        or root.xpath(f"//div[{_has_class(MAIN_PROFILE_CLASS)}]")
+        or [root]
+    )[0]
+    sections = profile.xpath(f".//section[{_has_class('artdeco-card')}]") or profile.xpath(".//section")
+
+    raw_sections = []
+    for section in sections:
+        heading = section.xpath("(.//*[self::h2 or self::h3])[1]")
+        title = _lxml_text(heading[0], "") if heading else None
+        raw_sections.append((title, _lxml_text(section, " ")))
+    return raw_sections
+
+
+# Fallback when lxml isn't available: only build BeautifulSoup trees for <section> elements
+def _raw_sections_bs4(html):
+    if MAIN_PROFILE_CLASS in html:
+        soup = BeautifulSoup(html, bs4_parser)
+        profile = soup.find('main', {'class': MAIN_PROFILE_CLASS}) or soup.find('div', {'class': MAIN_PROFILE_CLASS}) or soup
+    else:
+        profile = BeautifulSoup(html, bs4_parser, parse_only=SoupStrainer("section"))
+
+    sections = profile.find_all('section', {'class': 'artdeco-card'}) or profile.find_all('section')
+
+    raw_sections = []
+    for section in sections:
+        title_elem = section.find(['h2', 'h3'])
+        title = title_elem.get_text(strip=True) if title_elem else None
+        raw_sections.append((title, section.get_text(strip=True, separator=' ')))
+    return raw_sections
+
+
+# Turn a saved LinkedIn profile page into {section title: cleaned text}, plus the ordered titles.
+# Returns (None, None) when no sections are found.
+def parse_profile_sections(html, status=None):
+    status = status or LogStatus()
+    try:
+        raw_sections = _raw_sections_lxml(html) if bs4_parser == "lxml" else _raw_sections_bs4(html)
+    except ValueError:
+        # lxml refuses some inputs (e.g. str with an XML encoding declaration)
+        raw_sections = _raw_sections_bs4(html)
+
+    if not raw_sections:
+        status.error("Could not find any profile sections")
+        return None, None
+
+    status.info(f"Found {len(raw_sections)} profile sections")
+
+    section_data = {}
+    section_titles = []
+    for i, (raw_title, text) in enumerate(raw_sections):
+        if raw_title is not None:
+            # Fix common section title duplications like "HighlightsHighlights"
+            title = DOUBLED_TITLES.get(raw_title.lower(), raw_title)
+        else:
+            title = f"Section {i+1}"
+
+        # Make sure title is unique
+        base_title = title
+        counter = 1
+        while title in section_data:
+            title = f"{base_title} {counter}"
+            counter += 1
+
+        # Store the section content with clean text
+        section_data[title] = clean_text(text)
+        section_titles.append(title)
+
+    return section_data, section_titles
+
+
+# Parse one saved profile page; runs in worker processes for bulk imports
+def parse_profile_file(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        html = f.read()
+    section_data, section_titles = parse_profile_sections(html)
+    return {"source": path, "sections": section_data, "titles": section_titles}
+
+
+# List the .html/.htm files under a directory
+def find_profile_files(directory):
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith((".html", ".htm")):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+# Parse many saved pages in a process pool, yielding results in input order
+def parse_profile_files(paths, workers=None):
+    if len(paths) <= 1 or workers == 1:
+        yield from map(parse_profile_file, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse_profile_file, paths, chunksize=4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse saved LinkedIn profile pages into sections")
+    parser.add_argument("input", help="A saved profile .html file or a directory of them")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    paths = find_profile_files(args.input) if os.path.isdir(args.input) else [args.input]
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for result in parse_profile_files(paths, args.workers):
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
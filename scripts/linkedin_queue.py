@@ -0,0 +1,238 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from scripts.browser_pool import credential_key
+from scripts.cache import CACHE_DIR
+from scripts.jobs import add_missing_column, owner_alive, process_owner
+from scripts.linkedin import LogStatus, scrape_profile, iter_section_analyses
+
+QUEUE_PATH = os.path.join(CACHE_DIR, "linkedin_queue.sqlite3")
+MIN_SCRAPE_INTERVAL = float(os.getenv("SMARTHIRE_LINKEDIN_MIN_INTERVAL", "20"))
+# How long a scraped profile counts as fresh; enqueueing it again after that scrapes it again
+PROFILE_REFRESH_AGE = float(os.getenv("SMARTHIRE_LINKEDIN_REFRESH_AGE", str(24 * 3600)))
+
+
+# Persistent queue of profile URLs to scrape. Credentials are never stored here; a job's `account`
+# is the keyed hash of the login that submitted it (scripts.browser_pool.credential_key), which
+# also scopes who can list it.
+class ProfileQueue:
+    def __init__(self, path=QUEUE_PATH, max_attempts=4):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                account TEXT NOT NULL,
+                analyze INTEGER NOT NULL DEFAULT 1,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                sections TEXT,
+                analyses TEXT,
+                error TEXT
+            )""")
+        add_missing_column(self._conn, "jobs", "owner", "TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, next_attempt_at)")
+        self._owner = process_owner()
+        # Jobs left running by a crashed process go back on the queue; jobs another live process
+        # has claimed are left to it
+        stale = [
+            row["id"] for row in self._conn.execute("SELECT id, owner FROM jobs WHERE status = 'running'").fetchall()
+            if not owner_alive(row["owner"])
+        ]
+        self._conn.executemany(
+            "UPDATE jobs SET status = 'queued', owner = NULL WHERE id = ? AND status = 'running'",
+            [(job_id,) for job_id in stale],
+        )
+        self._conn.commit()
+
+    # Add URLs for an account, skipping ones already queued or running, and ones scraped less than
+    # max_age seconds ago (max_age=0 scrapes every done profile again). Returns how many were added.
+    def enqueue(self, urls, account, analyze=True, max_age=PROFILE_REFRESH_AGE):
+        now = time.time()
+        added = 0
+        with self._lock:
+            for url in dict.fromkeys(url.strip() for url in urls if url.strip()):
+                existing = self._conn.execute(
+                    """SELECT 1 FROM jobs WHERE url = ? AND account = ?
+                       AND (status IN ('queued', 'running') OR (status = 'done' AND updated_at > ?))""",
+                    (url, account, now - max_age),
+                ).fetchone()
+                if existing:
+                    continue
+                self._conn.execute(
+                    "INSERT INTO jobs (url, account, analyze, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (url, account, int(analyze), now, now),
+                )
+                added += 1
+            self._conn.commit()
+        return added
+
+    # Atomically take the oldest due job for one of the given accounts
+    def claim(self, accounts):
+        if not accounts:
+            return None
+        now = time.time()
+        placeholders = ",".join("?" * len(accounts))
+        with self._lock:
+            row = self._conn.execute(
+                f"""SELECT * FROM jobs WHERE status = 'queued' AND next_attempt_at <= ?
+                    AND account IN ({placeholders}) ORDER BY next_attempt_at, id LIMIT 1""",
+                (now, *accounts),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, owner = ?, updated_at = ? WHERE id = ?",
+                (self._owner, now, row["id"]),
+            )
+            self._conn.commit()
+        return dict(row)
+
+    # `error` notes a partial result, e.g. sections whose analysis failed
+    def complete(self, job_id, sections, analyses, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', sections = ?, analyses = ?, error = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(sections), json.dumps(analyses), error, time.time(), job_id),
+            )
+            self._conn.commit()
+
+    # Requeue with exponential backoff, or mark failed once attempts are used up
+    def fail(self, job_id, error, base_delay=30.0):
+        with self._lock:
+            attempts = self._conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            now = time.time()
+            if attempts >= self.max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                    (error, now, job_id),
+                )
+            else:
+                delay = min(base_delay * 2 ** (attempts - 1), 30 * 60) * (1 + random.random() * 0.25)
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                    (error, now + delay, now, job_id),
+                )
+            self._conn.commit()
+
+    # Jobs (with their scraped results) submitted by one account
+    def jobs(self, account, limit=200):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE account = ? ORDER BY id DESC LIMIT ?", (account, limit)
+            ).fetchall()
+
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job["sections"] = json.loads(job["sections"]) if job["sections"] else None
+            job["analyses"] = json.loads(job["analyses"]) if job["analyses"] else None
+            jobs.append(job)
+        return jobs
+
+    def counts(self, account):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE account = ? GROUP BY status", (account,)
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+
+# Enforces a minimum gap between scrapes started by the same LinkedIn account
+class AccountRateLimiter:
+    def __init__(self, min_interval=MIN_SCRAPE_INTERVAL):
+        self.min_interval = min_interval
+        self._next = {}
+        self._lock = threading.Lock()
+
+    # Reserve the account's next slot and return how long to wait for it
+    def reserve(self, account):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(account, 0.0))
+            self._next[account] = start + self.min_interval
+        return start - now
+
+
+# Background threads that drain the queue using the shared browser pool.
+# Finished profiles are also written to `store` (a CandidateStore) when one is given.
+class QueueWorkers:
+    def __init__(self, queue, pool, workers=2, rate_limiter=None, poll_interval=2.0, store=None):
+        self.queue = queue
+        self.pool = pool
+        self.store = store
+        self.rate_limiter = rate_limiter or AccountRateLimiter()
+        self.poll_interval = poll_interval
+        self._credentials = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"linkedin-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    # Credentials live only in memory, keyed by their credential_key, so a visitor can only add
+    # to (or replace) the entry for the exact login they typed. Jobs for unregistered accounts wait
+    # until someone logs in again. Returns the account to enqueue and list jobs under.
+    def register(self, email, password, groq_api_key):
+        account = credential_key(email, password)
+        with self._lock:
+            self._credentials[account] = (email, password, groq_api_key)
+        return account
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                accounts = list(self._credentials)
+            job = self.queue.claim(accounts)
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._process(job)
+
+    def _process(self, job):
+        with self._lock:
+            email, password, groq_api_key = self._credentials[job["account"]]
+
+        delay = self.rate_limiter.reserve(email.strip().lower())
+        if delay > 0:
+            time.sleep(delay)
+
+        try:
+            section_data, section_titles = scrape_profile(self.pool, email, password, job["url"], status=LogStatus())
+            if not section_data:
+                self.queue.fail(job["id"], "Scrape returned no sections")
+                return
+
+            # Failed analyses are left out (and not cached), so opening the profile retries them
+            analyses, failed = {}, []
+            if job["analyze"]:
+                for title, analysis, _, ok in iter_section_analyses(section_data, groq_api_key):
+                    if ok:
+                        analyses[title] = analysis
+                    else:
+                        failed.append(title)
+            error = f"Analysis failed for: {', '.join(failed)}" if failed else None
+            self.queue.complete(job["id"], section_data, analyses, error)
+            if self.store is not None:
+                self.store.upsert_linkedin(job["url"], sections=section_data, analyses=analyses)
+        except Exception as e:
+            self.queue.fail(job["id"], str(e))
@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
 import os
-from langchain_groq import ChatGroq
+import json
+import threading
 
 from langchain_core.prompts import (SystemMessagePromptTemplate, 
                                     HumanMessagePromptTemplate,
@@ -10,10 +11,22 @@ from langchain_core.prompts import (SystemMessagePromptTemplate,
 
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 
+from scripts.json_repair import TruncatedJSONError, repair_json, validate_resume
+from scripts import metrics
+from scripts.cache import content_hash
+from scripts.clients import chat_groq
+
 load_dotenv()
 api_key=os.getenv("GROQ_API_KEY")
 
-llm=ChatGroq(groq_api_key=api_key,model_name="Gemma2-9b-It")
+MODEL_NAME = "Gemma2-9b-It"
+# Bump whenever the prompts below change so cached parses are not reused
+PROMPT_VERSION = "2"
+
+# Shares the process-wide Groq connection pool, limits and usage accounting.
+# Built on first call (chat_groq caches it), so importing this module does not load langchain_groq.
+def get_llm():
+    return chat_groq(api_key,MODEL_NAME)
 
 
 system = SystemMessagePromptTemplate.from_template("""You are helpful AI assistant who answer user question based on the provided context.""")
@@ -73,10 +86,17 @@ def ask_llm(context, question):
     messages = [system, prompt]
     template = ChatPromptTemplate(messages)
 
-    qna_chain = template | llm | StrOutputParser()
+    qna_chain = template | get_llm() | StrOutputParser()
     return qna_chain.invoke({'context': context, 'question': question})
 
 
+# Same as ask_llm, but yields the answer piece by piece as the model generates it
+def stream_llm(context, question):
+    template = ChatPromptTemplate([system, prompt])
+    qna_chain = template | get_llm() | StrOutputParser()
+    yield from qna_chain.stream({'context': context, 'question': question})
+
+
 def validate_json(data):
     json_prompt = """
             Please validate and correct the following JSON data:
@@ -92,5 +112,123 @@ def validate_json(data):
     json_messages = [system, json_prompt]
     json_template = ChatPromptTemplate(json_messages)
 
-    json_chain = json_template | llm | JsonOutputParser()
+    json_chain = json_template | get_llm() | JsonOutputParser()
     return json_chain.invoke({'data': data})
+
+
+RESUME_QUESTION = """You are tasked with parsing a job resume. Your goal is to extract relevant information in a valid structured 'JSON' format.
+                Include these fields:
+                - "personal_info" (name, email, phone, location)
+                - "education" (array of educational qualifications with institution, degree, year)
+                - "experience" (array of work experiences with company, position, duration, responsibilities)
+                - "skills" (array of all technical and soft skills mentioned)
+                - "certifications" (array of certifications if any)
+                - "languages" (array of languages known if mentioned)
+                
+                Output only valid JSON without any preamble or explanations."""
+
+RESUME_SCHEMA = json.dumps({
+    "personal_info": {"name": "string", "email": "string", "phone": "string", "location": "string"},
+    "education": [{"institution": "string", "degree": "string", "year": "string"}],
+    "experience": [{"company": "string", "position": "string", "duration": "string", "responsibilities": ["string"]}],
+    "skills": ["string"],
+    "certifications": ["string"],
+    "languages": ["string"],
+}, indent=2)
+
+structured_prompt = HumanMessagePromptTemplate.from_template("""
+            **Task:** Parse the following resume into JSON.
+
+            **Resume Text:**
+            {context}
+
+            **Instructions:**
+            {question}
+
+            Respond with a single JSON object that follows this schema exactly:
+            {schema}
+        """)
+
+# Cache key for a parse of the PDF whose bytes hash to pdf_hash (see scripts.cache.content_hash)
+def resume_cache_key(pdf_hash, question=RESUME_QUESTION):
+    return content_hash(pdf_hash, MODEL_NAME, PROMPT_VERSION, question)
+
+# JSON mode makes the model emit a single JSON object, so most responses need no fixing
+def get_json_llm():
+    return get_llm().bind(response_format={"type": "json_object"})
+
+# How often each extraction path is taken ("truncated": the answer was cut off and went to the fallback)
+EXTRACTION_STATS = {"direct": 0, "repaired": 0, "fallback": 0, "truncated": 0}
+_stats_lock = threading.Lock()
+
+
+def _record(path):
+    with _stats_lock:
+        EXTRACTION_STATS[path] += 1
+    metrics.incr("resume_extraction_total", path=path)
+
+
+def _resume_template():
+    return ChatPromptTemplate([system, structured_prompt])
+
+
+# Turn the model's raw JSON answer into a validated resume dict.
+# Returns (data, cacheable). Only calls validate_json when local repair fails. An answer that was
+# cut off (truncated=True, from the finish reason, or one repair had to close) goes to the fallback
+# and must not be cached, since the end of the resume is missing from it.
+def resume_from_output(raw, truncated=False):
+    with metrics.span("resume.validate") as attrs:
+        if truncated:
+            data = validate_json(raw)
+            path = "truncated"
+        else:
+            try:
+                data = json.loads(raw)
+                path = "direct"
+            except json.JSONDecodeError:
+                try:
+                    with metrics.span("json.repair"):
+                        data = repair_json(raw)
+                    path = "repaired"
+                except TruncatedJSONError:
+                    data = validate_json(raw)
+                    path = "truncated"
+                except ValueError:
+                    data = validate_json(raw)
+                    path = "fallback"
+
+        try:
+            data = validate_resume(data)
+        except ValueError:
+            if path in ("fallback", "truncated"):
+                raise
+            data = validate_resume(validate_json(raw))
+            path = "fallback"
+
+        attrs["path"] = path
+    _record(path)
+    return data, path != "truncated"
+
+
+def parse_resume_output(raw, truncated=False):
+    return resume_from_output(raw, truncated)[0]
+
+
+# Single round-trip resume extraction; returns (data, cacheable) like resume_from_output
+def extract_resume(context, question=RESUME_QUESTION):
+    with metrics.span("llm.parse_resume"):
+        message = (_resume_template() | get_json_llm()).invoke(
+            {'context': context, 'question': question, 'schema': RESUME_SCHEMA}
+        )
+    truncated = message.response_metadata.get("finish_reason") == "length"
+    return resume_from_output(message.content, truncated)
+
+
+def parse_resume(context, question=RESUME_QUESTION):
+    return extract_resume(context, question)[0]
+
+
+# Yields the raw JSON as it is generated; pass the joined text to resume_from_output when done
+def stream_resume_json(context, question=RESUME_QUESTION):
+    chain = _resume_template() | get_json_llm() | StrOutputParser()
+    yield from chain.stream({'context': context, 'question': question, 'schema': RESUME_SCHEMA})
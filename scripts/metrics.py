@@ -0,0 +1,243 @@
+## Lightweight tracing and metrics
+##
+## span() times a stage of a request and nests under whatever span is already open, so a trace
+## shows where the time of one request went. Durations, counters and token counts are kept
+## in-process and can be exported as Prometheus text or JSON.
+##
+##   SMARTHIRE_TRACE_LOG=1        log every finished span as a JSON line on stderr
+##   SMARTHIRE_METRICS_PORT=9108  serve /metrics (Prometheus) and /metrics.json from a background thread,
+##                                started by the first span() of the process (see serve_metrics_from_env)
+##   SMARTHIRE_METRICS_HOST       interface for that server (default 127.0.0.1)
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_PREFIX = "smarthire_"
+METRICS_PORT = int(os.getenv("SMARTHIRE_METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("SMARTHIRE_METRICS_HOST", "127.0.0.1")
+QUANTILES = (0.5, 0.95, 0.99)
+
+logger = logging.getLogger("smarthire.trace")
+if os.getenv("SMARTHIRE_TRACE_LOG", "").lower() in ("1", "true", "yes"):
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_current_span = contextvars.ContextVar("smarthire_span", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+# Counters and duration summaries keyed by (metric name, labels)
+class Registry:
+    def __init__(self, window=1000):
+        self.window = window
+        self._counters = {}
+        self._summaries = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = {"count": 0, "sum": 0.0, "recent": deque(maxlen=self.window)}
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["recent"].append(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ]
+            summaries = []
+            for (name, labels), summary in self._summaries.items():
+                recent = sorted(summary["recent"])
+                summaries.append({
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": summary["count"],
+                    "sum": summary["sum"],
+                    "quantiles": {q: recent[min(len(recent) - 1, int(len(recent) * q))] for q in QUANTILES},
+                })
+        return {"counters": counters, "summaries": summaries}
+
+
+REGISTRY = Registry()
+
+
+def incr(name, value=1, **labels):
+    if value:
+        REGISTRY.incr(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    REGISTRY.observe(name, value, **labels)
+
+
+# Time one stage of a request. Yields the span's attribute dict, so callers can attach
+# details (page counts, cache hits, ...) that end up in the JSON log line.
+@contextmanager
+def span(name, **attrs):
+    _autostart()
+    parent = _current_span.get()
+    current = {
+        "name": name,
+        "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex[:16],
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "attrs": attrs,
+    }
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    error = None
+    try:
+        yield current["attrs"]
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        duration = time.perf_counter() - started
+        observe("span_seconds", duration, span=name)
+        if error:
+            incr("span_errors_total", span=name, error=error)
+        if logger.isEnabledFor(logging.INFO):
+            record = {
+                "span": name,
+                "trace_id": current["trace_id"],
+                "span_id": current["span_id"],
+                "parent_id": current["parent_id"],
+                "duration_ms": round(duration * 1000, 3),
+                "ts": time.time(),
+            }
+            if error:
+                record["error"] = error
+            record.update(current["attrs"])
+            logger.info(json.dumps(record, default=str))
+
+
+# Add numeric values to the innermost open span (e.g. tokens used by calls made inside it)
+def add_to_span(**values):
+    current = _current_span.get()
+    if current is None:
+        return
+    for key, value in values.items():
+        current["attrs"][key] = current["attrs"].get(key, 0) + (value or 0)
+
+
+def _format_labels(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+# Prometheus text exposition format (counters and summaries)
+def prometheus_text():
+    snapshot = REGISTRY.snapshot()
+    lines = []
+    typed = set()
+    for counter in sorted(snapshot["counters"], key=lambda c: c["name"]):
+        name = METRIC_PREFIX + counter["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(counter['labels'])} {counter['value']}")
+    for summary in sorted(snapshot["summaries"], key=lambda s: s["name"]):
+        name = METRIC_PREFIX + summary["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} summary")
+            typed.add(name)
+        for q, value in summary["quantiles"].items():
+            lines.append(f"{name}{_format_labels(summary['labels'], quantile=q)} {value}")
+        lines.append(f"{name}_sum{_format_labels(summary['labels'])} {summary['sum']}")
+        lines.append(f"{name}_count{_format_labels(summary['labels'])} {summary['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_json():
+    return json.dumps(REGISTRY.snapshot(), default=str)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = prometheus_text(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = metrics_json(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+_autostarted = False
+
+
+# Serve the metrics of this process over HTTP; safe to call more than once
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
+
+
+# Called by the entry points (app.py, api.py) and by the first span of any process, never on import.
+# When SMARTHIRE_METRICS_PORT is set but the port is taken (e.g. by another process), the process
+# runs on without it. Returns the server or None.
+def serve_metrics_from_env():
+    if not METRICS_PORT:
+        return None
+    try:
+        return start_metrics_server(METRICS_PORT, METRICS_HOST)
+    except OSError as e:
+        logging.getLogger("smarthire.metrics").warning(
+            "Metrics server not started on %s:%s: %s", METRICS_HOST, METRICS_PORT, e
+        )
+        return None
+
+
+# Tried once per process, so a Streamlit page opened before app.py (or a CLI) still serves metrics
+def _autostart():
+    global _autostarted
+    if not _autostarted:
+        _autostarted = True
+        serve_metrics_from_env()
@@ -0,0 +1,79 @@
+import base64
+from concurrent.futures import ThreadPoolExecutor
+
+import pymupdf
+
+from scripts import metrics
+
+
+# Extract the text of every page of a PDF given as raw bytes
+def extract_text(pdf_bytes):
+    with metrics.span("pdf.extract_text") as attrs:
+        pdf = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+        attrs["pages"] = pdf.page_count
+
+        context = ""
+        for page in pdf:
+            context = context + "\n\n" + page.get_text()
+
+        pdf.close()
+    return context
+
+
+# Load a PDF from bytes into one LangChain Document per page, like PyPDFLoader does from a path
+def load_pdf_documents(pdf_bytes, source):
+    from langchain_core.documents import Document
+
+    pdf = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+    documents = [
+        Document(page_content=page.get_text(), metadata={"source": source, "page": page.number})
+        for page in pdf
+    ]
+    pdf.close()
+    return documents
+
+
+# Load several (bytes, source) PDFs concurrently, returning their documents in the same order
+def load_many_pdf_documents(files, max_workers=4):
+    if len(files) <= 1:
+        return [load_pdf_documents(data, source) for data, source in files]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(files))) as pool:
+        return list(pool.map(lambda item: load_pdf_documents(*item), files))
+
+
+# Build Gemini content parts covering every page of a PDF.
+# Pages with a text layer are sent as text (merged into as few parts as possible);
+# only pages without one are rendered, at the given DPI, and sent as JPEG images.
+def pdf_to_content_parts(pdf_bytes, dpi=120, jpg_quality=80):
+    with metrics.span("pdf.content_parts") as attrs:
+        parts = _content_parts(pdf_bytes, dpi, jpg_quality, attrs)
+    return parts
+
+
+def _content_parts(pdf_bytes, dpi, jpg_quality, attrs):
+    pdf = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+    attrs["pages"] = pdf.page_count
+    attrs["rendered_pages"] = 0
+
+    parts = []
+    text_pages = []
+    for page in pdf:
+        text = page.get_text().strip()
+        if text:
+            text_pages.append(f"[Page {page.number + 1}]\n{text}")
+            continue
+
+        if text_pages:
+            parts.append("\n\n".join(text_pages))
+            text_pages = []
+        with metrics.span("pdf.rasterize", page=page.number, dpi=dpi):
+            image = page.get_pixmap(dpi=dpi).tobytes("jpg", jpg_quality=jpg_quality)
+        attrs["rendered_pages"] += 1
+        parts.append({"mime_type": "image/jpeg", "data": base64.b64encode(image).decode()})
+
+    if text_pages:
+        parts.append("\n\n".join(text_pages))
+
+    pdf.close()
+    return parts
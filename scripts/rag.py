@@ -0,0 +1,145 @@
+import os
+import re
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from scripts import metrics
+
+VECTORSTORE_DIR = os.getenv("SMARTHIRE_VECTORSTORE_DIR", "vectorstore")
+COLLECTION_NAME = "candidate_documents"
+
+
+# Each tenant gets its own persisted Chroma directory
+def tenant_directory(tenant):
+    safe_name = re.sub(r"[^A-Za-z0-9_-]", "_", tenant.strip()) or "default"
+    return os.path.join(VECTORSTORE_DIR, safe_name)
+
+
+# Records vector search latency and result counts for retrievers built by DocumentIndex
+class RetrievalMetrics(BaseCallbackHandler):
+    def __init__(self):
+        self._started = {}
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            metrics.observe("vector_search_seconds", time.perf_counter() - started)
+            metrics.incr("vector_search_documents_total", len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+        metrics.incr("vector_search_errors_total")
+
+
+# A persistent Chroma collection managed at the document level.
+# Every chunk is tagged with the hash of the file it came from, so a file is embedded once
+# and can later be replaced or removed as a whole.
+class DocumentIndex:
+    def __init__(self, embeddings, persist_directory=None, collection_name=COLLECTION_NAME,
+                 chunk_size=5000, chunk_overlap=500):
+        # chromadb takes seconds to import, so it is loaded with the first index rather than the page
+        from langchain_chroma import Chroma
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        self.vectorstore = Chroma(
+            collection_name=collection_name,
+            embedding_function=embeddings,
+            persist_directory=persist_directory,
+        )
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        self._lock = threading.Lock()
+
+        # Load what is already on disk so existing files are never re-embedded
+        self.files = {}
+        existing = self.vectorstore.get(include=["metadatas"])
+        for metadata in existing["metadatas"]:
+            if metadata and "file_hash" in metadata:
+                self.files[metadata["file_hash"]] = metadata.get("file_name", "")
+
+    def __contains__(self, file_hash):
+        return file_hash in self.files
+
+    # Split and embed the documents of one file; returns the number of chunks written.
+    # Files already in the index are skipped unless replace=True.
+    def upsert_file(self, file_hash, documents, file_name="", replace=False):
+        with self._lock:
+            if file_hash in self.files and not replace:
+                return 0
+            if file_hash in self.files:
+                self.vectorstore.delete(where={"file_hash": file_hash})
+
+            splits = self.text_splitter.split_documents(documents)
+            for split in splits:
+                split.metadata["file_hash"] = file_hash
+                split.metadata["file_name"] = file_name
+            if splits:
+                ids = [f"{file_hash}-{i}" for i in range(len(splits))]
+                with metrics.span("vector.upsert", chunks=len(splits)):
+                    self.vectorstore.add_documents(splits, ids=ids)
+            self.files[file_hash] = file_name
+            return len(splits)
+
+    def delete_file(self, file_hash):
+        with self._lock:
+            if file_hash not in self.files:
+                return False
+            self.vectorstore.delete(where={"file_hash": file_hash})
+            del self.files[file_hash]
+            return True
+
+    # Retriever restricted to the given files, or over the whole collection when None
+    def as_retriever(self, file_hashes=None):
+        if file_hashes is None:
+            retriever = self.vectorstore.as_retriever()
+        else:
+            retriever = self.vectorstore.as_retriever(
+                search_kwargs={"filter": {"file_hash": {"$in": sorted(file_hashes)}}}
+            )
+        return retriever.with_config(callbacks=[RetrievalMetrics()])
+
+
+CONTEXTUALIZE_SYSTEM_PROMPT = (
+    "Given a chat history and the latest user question"
+    "which might reference context in the chat history, "
+    "formulate a standalone question which can be understood "
+    "without the chat history. Do NOT answer the question, "
+    "just reformulate it if needed and otherwise return it as is."
+)
+
+QA_SYSTEM_PROMPT = (
+    "You are an assistant for question-answering tasks. "
+    "Use the following pieces of retrieved context to answer "
+    "the question. If you don't know the answer, say that you "
+    "don't know. Use three sentences maximum and keep the "
+    "answer concise."
+    "\n\n"
+    "{context}"
+)
+
+
+# History-aware retrieval chain: takes {"input", "chat_history"} and returns {"answer", "context", ...}.
+# Used by the chatbot page and the HTTP API; langchain's chain helpers are imported on first use.
+def build_rag_chain(llm, retriever):
+    from langchain.chains import create_history_aware_retriever, create_retrieval_chain
+    from langchain.chains.combine_documents import create_stuff_documents_chain
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    contextualize_q_prompt = ChatPromptTemplate.from_messages([
+        ("system", CONTEXTUALIZE_SYSTEM_PROMPT),
+        MessagesPlaceholder("chat_history"),
+        ("human", "{input}"),
+    ])
+    history_aware_retriever = create_history_aware_retriever(llm, retriever, contextualize_q_prompt)
+
+    qa_prompt = ChatPromptTemplate.from_messages([
+        ("system", QA_SYSTEM_PROMPT),
+        MessagesPlaceholder("chat_history"),
+        ("human", "{input}"),
+    ])
+    question_answer_chain = create_stuff_documents_chain(llm, qa_prompt)
+    return create_retrieval_chain(history_aware_retriever, question_answer_chain)
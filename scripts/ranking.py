@@ -0,0 +1,65 @@
+import numpy as np
+
+from scripts.skills import SkillIndex
+
+# all-MiniLM-L6-v2 truncates its input at 256 word pieces, so resumes are embedded in windows
+# of words that stay under that limit
+CHUNK_WORDS = 150
+CHUNK_OVERLAP = 30
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+# Overlapping windows of words covering the whole text (at least one, even for empty text)
+def chunk_words(text, size=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    words = text.split()
+    step = max(size - overlap, 1)
+    starts = range(0, max(len(words) - overlap, 1), step)
+    return [" ".join(words[start:start + size]) for start in starts]
+
+
+# One vector per text: the mean of its chunk vectors, so every part of a long resume counts.
+# All chunks go through a single embed_documents call (and so through the embedding cache).
+def embed_long_texts(embeddings, texts):
+    chunks = [chunk_words(text) for text in texts]
+    vectors = _normalize_rows(np.asarray(
+        embeddings.embed_documents([chunk for text_chunks in chunks for chunk in text_chunks]), dtype=np.float32
+    ))
+    counts = np.array([len(text_chunks) for text_chunks in chunks])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return _normalize_rows(np.add.reduceat(vectors, offsets, axis=0) / counts[:, None])
+
+
+# Rank resume texts against a job description without any LLM calls.
+# Score = semantic_weight * cosine similarity of embeddings (chunk vectors mean-pooled per resume)
+#       + (1 - semantic_weight) * fraction of required skills mentioned in the resume.
+# Without required skills the score is the similarity alone.
+def rank_resumes(job_description, resume_texts, embeddings, required_skills=None, semantic_weight=0.7):
+    if not resume_texts:
+        empty = np.zeros(0)
+        return {"scores": empty, "similarity": empty, "coverage": empty, "ranking": empty.astype(int), "matched": None}
+
+    query = _normalize_rows(np.asarray(embeddings.embed_query(job_description), dtype=np.float32))
+    documents = embed_long_texts(embeddings, resume_texts)
+    similarity = documents @ query
+
+    matched = None
+    if required_skills:
+        index = SkillIndex(required_skills)
+        matched = index.coverage_matrix(resume_texts)
+        coverage = matched.mean(axis=1)
+        scores = semantic_weight * similarity + (1 - semantic_weight) * coverage
+    else:
+        coverage = np.zeros(len(resume_texts))
+        scores = similarity
+
+    return {
+        "scores": scores,
+        "similarity": similarity,
+        "coverage": coverage,
+        "ranking": np.argsort(-scores, kind="stable"),
+        "matched": matched,
+    }
@@ -0,0 +1,274 @@
+## Skill normalization and bulk matching
+##
+## Rank the output of scripts.batch_parse against a requisition:
+##   python -m scripts.skills parsed.jsonl --skills required_skills.txt --top 50
+import argparse
+import json
+import re
+import sys
+
+import numpy as np
+
+# A leading dot is kept, so ".NET" is the token ".net" rather than the word "net"
+TOKEN_RE = re.compile(r"(?<![a-z0-9+#])\.?[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+# Common abbreviations and spellings mapped to one canonical form
+SKILL_ALIASES = {
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "cv": "computer vision",
+    "llm": "large language models",
+    "llms": "large language models",
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "c sharp": "c#",
+    "cpp": "c++",
+    "dotnet": ".net",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "postgres": "postgresql",
+    "mongo": "mongodb",
+    "k8s": "kubernetes",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "tf": "tensorflow",
+    "aws": "amazon web services",
+    "gcp": "google cloud platform",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+    "data analytics": "data analysis",
+    "oop": "object oriented programming",
+    "ci/cd": "continuous integration",
+    "rest api": "rest apis",
+}
+
+
+def _tokenize(text):
+    return tuple(TOKEN_RE.findall(text.lower()))
+
+
+# Longer tokens that merely start or end with a required one-word skill but are a different skill
+NOT_CONTAINED = {("java", "javascript")}
+
+_ALIAS_TOKENS = {_tokenize(alias): _tokenize(canonical) for alias, canonical in SKILL_ALIASES.items()}
+_MAX_ALIAS_LEN = max(len(alias) for alias in _ALIAS_TOKENS)
+
+# Resume headings: a skills section starts at the first, and ends at any other heading
+_HEADING = r"^[ \t]*(?:[a-z&/]+[ \t]+){0,2}(?:%s)[ \t]*:?[ \t]*$"
+SKILLS_HEADING_RE = re.compile(_HEADING % "skills|skill set|technologies|tech stack", re.IGNORECASE | re.MULTILINE)
+SECTION_HEADING_RE = re.compile(
+    _HEADING % "experience|education|projects|certifications|awards|honors|languages|summary|objective|"
+    "publications|interests|references|employment|work history|achievements|profile",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+# The text under the resume's skills heading(s), or "" when there is none
+def skills_section(text):
+    sections = []
+    for match in SKILLS_HEADING_RE.finditer(text):
+        following = text[match.end():]
+        end = SECTION_HEADING_RE.search(following)
+        sections.append(following[:end.start()] if end else following)
+    return "\n".join(sections)
+
+
+# Lowercase, tokenize and expand aliases: "ML / Sklearn" -> ("machine", "learning", "scikit", "learn")
+def normalize_skill(text):
+    tokens = _tokenize(text)
+
+    normalized = []
+    i = 0
+    while i < len(tokens):
+        # Prefer the longest alias starting at this position
+        for length in range(min(_MAX_ALIAS_LEN, len(tokens) - i), 0, -1):
+            canonical = _ALIAS_TOKENS.get(tokens[i:i + length])
+            if canonical:
+                normalized.extend(canonical)
+                i += length
+                break
+        else:
+            normalized.append(tokens[i])
+            i += 1
+    return tuple(normalized)
+
+
+# Required skills compiled into a token trie, so each candidate skill is matched in a single scan
+# instead of a substring test against every required skill.
+# A required skill matches a candidate skill when either one's tokens appear contiguously in the other.
+# A one-word required skill of three or more characters also matches a candidate skill word that
+# starts or ends with it, as the old substring test did: "SQL" matches "MySQL" and "PostgreSQL",
+# ".NET" matches "ASP.NET".
+class SkillIndex:
+    def __init__(self, required_skills):
+        self.required_skills = list(required_skills)
+        self.trie = {}
+        self.subphrases = {}
+        self.short_skills = set()
+        self.contained = {}
+        self._memo = {}
+
+        for idx, skill in enumerate(self.required_skills):
+            tokens = normalize_skill(skill)
+            if not tokens:
+                continue
+            if len(tokens) == 1 and len(tokens[0]) <= 2:
+                self.short_skills.add(idx)
+            elif len(tokens) == 1:
+                self.contained.setdefault(tokens[0], set()).add(idx)
+
+            node = self.trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node.setdefault(None, set()).add(idx)
+
+            # Every contiguous run of tokens, for candidate skills that are a part of a required one
+            for start in range(len(tokens)):
+                for end in range(start + 1, len(tokens) + 1):
+                    self.subphrases.setdefault(tokens[start:end], set()).add(idx)
+
+    def __len__(self):
+        return len(self.required_skills)
+
+    # Indices of the required skills matched by one candidate skill
+    def match_skill(self, skill):
+        tokens = normalize_skill(skill)
+        if tokens in self._memo:
+            return self._memo[tokens]
+
+        matched = self._scan(tokens) | self.subphrases.get(tokens, set())
+        for token in tokens:
+            matched |= self._contained_in(token)
+        matched = frozenset(matched)
+        self._memo[tokens] = matched
+        return matched
+
+    # One-word required skills that a longer candidate token starts or ends with
+    def _contained_in(self, token):
+        matched = set()
+        for part, indices in self.contained.items():
+            if (
+                len(token) > len(part)
+                and (token.startswith(part) or token.endswith(part))
+                and (part, token) not in NOT_CONTAINED
+            ):
+                matched |= indices
+        return matched
+
+    # Indices of the required skills mentioned anywhere in a free-text document (not memoized)
+    def match_text(self, text):
+        return self._scan(normalize_skill(text))
+
+    # Like match_text, for text that is a list of skills (so "MySQL" also counts as "SQL")
+    def match_skill_list(self, text):
+        tokens = normalize_skill(text)
+        matched = self._scan(tokens)
+        for token in set(tokens):
+            matched |= self._contained_in(token)
+        return matched
+
+    # Walk the trie from every token position and collect the required skills that end on the way
+    def _scan(self, tokens):
+        matched = set()
+        for start in range(len(tokens)):
+            node = self.trie
+            for token in tokens[start:]:
+                node = node.get(token)
+                if node is None:
+                    break
+                matched.update(node.get(None, ()))
+        return matched
+
+    # Required skills mentioned in a whole resume. Short aliases ("cv", "tf") and one- or two-letter
+    # skills ("R", "C") mean other things in running text, so across the whole resume only the
+    # canonical spellings of longer skills count; aliases, short skills and skills inside longer
+    # names ("SQL" in "MySQL") count in the skills section.
+    def match_resume(self, text):
+        matched = {idx for idx in self._scan(_tokenize(text)) if idx not in self.short_skills}
+        return matched | self.match_skill_list(skills_section(text))
+
+    # Boolean matrix of shape (documents, required skills) for free-text documents
+    def coverage_matrix(self, texts):
+        matrix = np.zeros((len(texts), len(self.required_skills)), dtype=bool)
+        for row, text in enumerate(texts):
+            matrix[row, list(self.match_resume(text))] = True
+        return matrix
+
+    # Boolean matrix of shape (candidates, required skills)
+    def match_matrix(self, candidates):
+        rows, cols = [], []
+        for row, skills in enumerate(candidates):
+            matched = set()
+            for skill in skills or []:
+                matched.update(self.match_skill(str(skill)))
+            rows.extend([row] * len(matched))
+            cols.extend(matched)
+
+        matrix = np.zeros((len(candidates), len(self.required_skills)), dtype=bool)
+        matrix[rows, cols] = True
+        return matrix
+
+
+# Score every candidate against the requisition in one pass.
+# candidates is a list of skill lists, or of resume texts (searched with coverage_matrix) for
+# candidates without one; weights optionally gives each required skill an importance.
+def rank_candidates(candidates, required_skills, weights=None):
+    index = required_skills if isinstance(required_skills, SkillIndex) else SkillIndex(required_skills)
+    matrix = index.match_matrix([[] if isinstance(skills, str) else skills for skills in candidates])
+    text_rows = [row for row, skills in enumerate(candidates) if isinstance(skills, str)]
+    if text_rows:
+        matrix[text_rows] = index.coverage_matrix([candidates[row] for row in text_rows])
+
+    if not len(index):
+        scores = np.ones(len(candidates))
+    else:
+        weights = np.ones(len(index)) if weights is None else np.asarray(weights, dtype=float)
+        if weights.shape != (len(index),):
+            raise ValueError(f"Expected {len(index)} weights, got {weights.size}")
+        if not np.all(np.isfinite(weights)) or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("Weights must be non-negative and sum to more than zero")
+        scores = matrix.astype(float) @ weights / weights.sum()
+
+    ranking = np.argsort(-scores, kind="stable")
+    return {
+        "required_skills": index.required_skills,
+        "matrix": matrix,
+        "scores": scores,
+        "ranking": ranking,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank parsed resumes (JSONL from scripts.batch_parse) by required skills")
+    parser.add_argument("parsed", help="JSONL file written by scripts.batch_parse")
+    parser.add_argument("--skills", required=True, help="Text file with one required skill per line")
+    parser.add_argument("--top", type=int, default=20, help="Number of candidates to print")
+    args = parser.parse_args(argv)
+
+    with open(args.skills, encoding="utf-8") as f:
+        required_skills = [line.strip() for line in f if line.strip()]
+
+    sources, candidates = [], []
+    with open(args.parsed, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("status") == "ok":
+                sources.append(record["source"])
+                candidates.append(record["data"].get("skills", []))
+
+    result = rank_candidates(candidates, required_skills)
+    for idx in result["ranking"][:args.top]:
+        missing = [skill for skill, hit in zip(required_skills, result["matrix"][idx]) if not hit]
+        print(f"{result['scores'][idx] * 100:5.1f}%  {sources[idx]}  missing: {', '.join(missing) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+## Newsletter subscribers
+##
+## Bulk import a subscriber list (CSV or one email per line):
+##   python -m scripts.subscribers subscribers.csv
+##
+## Remove duplicate emails left by older versions, so the unique email index can be built:
+##   python -m scripts.subscribers --dedupe
+import argparse
+import csv
+import io
+import re
+import sys
+from datetime import datetime, timezone
+
+from scripts.db import get_database
+
+SUBSCRIBERS_COLLECTION = "subscribers"
+EMAIL_RE = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+DUPLICATE_KEY = 11000
+
+
+# Raised when existing duplicate emails stop the unique index from being built
+class DuplicateSubscribersError(RuntimeError):
+    pass
+
+
+def is_valid_email(email):
+    return EMAIL_RE.match(email) is not None
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+# Keep the oldest document per email so the unique index can be built on existing data
+def remove_duplicate_subscribers(collection):
+    duplicates = collection.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$email", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ])
+    removed = 0
+    for group in duplicates:
+        removed += collection.delete_many({"_id": {"$in": group["ids"][1:]}}).deleted_count
+    return removed
+
+
+# The subscribers collection with a unique index on email, so duplicate checks happen in the database.
+# Existing duplicates are never removed here; that is left to the --dedupe command.
+def get_subscribers_collection(database=None):
+    from pymongo.errors import OperationFailure
+
+    collection = (database if database is not None else get_database())[SUBSCRIBERS_COLLECTION]
+    try:
+        collection.create_index("email", unique=True)
+    except OperationFailure as e:
+        if e.code != DUPLICATE_KEY:
+            raise
+        raise DuplicateSubscribersError(
+            "Duplicate subscriber emails prevent the unique email index; run: python -m scripts.subscribers --dedupe"
+        ) from e
+    return collection
+
+
+# Add one subscriber in a single round trip; returns False if the email was already subscribed
+def subscribe(collection, email):
+    result = collection.update_one(
+        {"email": email},
+        {"$setOnInsert": {"email": email, "subscribed_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+    return result.upserted_id is not None
+
+
+# Emails from CSV (any column that looks like an email) or plain text with one email per line
+def read_emails(text):
+    emails = []
+    for row in csv.reader(io.StringIO(text)):
+        for cell in row:
+            cell = normalize_email(cell)
+            if "@" in cell:
+                emails.append(cell)
+    return emails
+
+
+# Upsert many subscribers with unordered bulk writes.
+# Returns (newly added, already subscribed, invalid emails).
+def import_subscribers(collection, emails, batch_size=1000):
+    from pymongo import UpdateOne
+
+    emails = list(dict.fromkeys(normalize_email(email) for email in emails if email.strip()))
+    invalid = [email for email in emails if not is_valid_email(email)]
+    valid = [email for email in emails if is_valid_email(email)]
+
+    added = 0
+    now = datetime.now(timezone.utc)
+    for start in range(0, len(valid), batch_size):
+        operations = [
+            UpdateOne({"email": email}, {"$setOnInsert": {"email": email, "subscribed_at": now}}, upsert=True)
+            for email in valid[start:start + batch_size]
+        ]
+        added += collection.bulk_write(operations, ordered=False).upserted_count
+    return added, len(valid) - added, invalid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import newsletter subscribers into MongoDB")
+    parser.add_argument("path", nargs="?", help="CSV file or text file with one email per line")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Upserts per bulk write")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Delete all but the oldest document per email, then build the unique index")
+    args = parser.parse_args(argv)
+    if not args.path and not args.dedupe:
+        parser.error("give a file to import and/or --dedupe")
+
+    if args.dedupe:
+        removed = remove_duplicate_subscribers(get_database()[SUBSCRIBERS_COLLECTION])
+        get_subscribers_collection()
+        print(f"Removed {removed} duplicate subscribers")
+        if not args.path:
+            return 0
+
+    with open(args.path, encoding="utf-8-sig") as f:
+        emails = read_emails(f.read())
+
+    added, existing, invalid = import_subscribers(get_subscribers_collection(), emails, args.batch_size)
+    print(f"Added {added}, already subscribed {existing}, invalid {len(invalid)}")
+    for email in invalid[:20]:
+        print(f"  invalid: {email}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient
+
+import api
+from scripts.cache import DiskCache, content_hash
+
+RESUME = {
+    "personal_info": {"name": "Jane Doe", "email": "jane@example.com"},
+    "education": [],
+    "experience": [],
+    "skills": ["Python", "SQL"],
+    "certifications": [],
+    "languages": [],
+}
+
+
+@pytest.fixture
+def client():
+    return TestClient(api.app)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "resume_parse.sqlite3"))
+    monkeypatch.setattr(api, "get_parse_cache", lambda: cache)
+    return cache
+
+
+def fake_parse(calls):
+    lock = threading.Lock()
+
+    def parse_blocking(document, pdf_bytes, file_hash, requisition, store):
+        with lock:
+            calls.append(document.text)
+        time.sleep(0.2)
+        if document.text == "boom":
+            raise ValueError("model output was not JSON")
+        return {"sha256": file_hash, "cached": False, "data": {"text": document.text}}
+    return parse_blocking
+
+
+def test_identical_batch_items_share_one_parse(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(api, "_parse_blocking", fake_parse(calls))
+
+    response = client.post("/parse/batch", json={"documents": [{"text": "same"}, {"text": "same"}]})
+
+    assert response.status_code == 200
+    first, second = response.json()["results"]
+    assert first == second == {"sha256": content_hash("text", "same"), "cached": False, "data": {"text": "same"}}
+    assert calls == ["same"]
+
+
+def test_batch_reports_errors_per_item(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(api, "_parse_blocking", fake_parse(calls))
+
+    response = client.post("/parse/batch", json={"documents": [{"text": "ok"}, {}, {"text": "boom"}]})
+
+    assert response.status_code == 200
+    ok, missing, failed = response.json()["results"]
+    assert ok["data"] == {"text": "ok"}
+    assert missing == {"error": "Send either pdf_base64 or text"}
+    assert failed == {"error": "ValueError: model output was not JSON"}
+    assert sorted(calls) == ["boom", "ok"]
+
+
+def test_streamed_parse_is_validated_cached_and_served_from_cache(client, cache, monkeypatch):
+    import scripts.llm
+    from scripts.llm import resume_cache_key
+
+    raw = json.dumps(RESUME)
+    streams = []
+
+    def stream_resume_json(context, question=None):
+        streams.append(context)
+        yield raw[:20]
+        yield raw[20:]
+
+    monkeypatch.setattr(scripts.llm, "stream_resume_json", stream_resume_json)
+    request = {"document": {"text": "Jane Doe, Python and SQL"}}
+
+    first = client.post("/parse/stream", json=request)
+    assert first.status_code == 200
+    assert first.text == raw
+    assert cache.get(resume_cache_key(content_hash("text", "Jane Doe, Python and SQL"))) == RESUME
+
+    second = client.post("/parse/stream", json=request)
+    assert json.loads(second.text) == RESUME
+    assert streams == ["Jane Doe, Python and SQL"]
+
+
+def test_invalid_streamed_parse_is_not_cached(client, cache, monkeypatch):
+    import scripts.llm
+
+    def stream_resume_json(context, question=None):
+        yield '{"skills": "not closed'
+
+    def validate_json(raw):
+        raise ValueError("still not JSON")
+
+    monkeypatch.setattr(scripts.llm, "stream_resume_json", stream_resume_json)
+    monkeypatch.setattr(scripts.llm, "validate_json", validate_json)
+
+    response = client.post("/parse/stream", json={"document": {"text": "cut off"}})
+    assert response.text == '{"skills": "not closed'
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("required_skills", [[], ["", " "]])
+def test_skills_match_rejects_empty_required_skills(client, required_skills):
+    single = client.post("/skills/match", json={"required_skills": required_skills, "candidate": {"skills": ["SQL"]}})
+    batch = client.post("/skills/match/batch", json={"required_skills": required_skills, "candidates": [{"skills": ["SQL"]}]})
+
+    assert single.status_code == 422
+    assert batch.status_code == 422
+
+
+def test_skills_match_batch_ranks_candidates(client):
+    response = client.post("/skills/match/batch", json={
+        "required_skills": ["SQL", ".NET"],
+        "candidates": [{"id": "a", "skills": ["neural net"]}, {"id": "b", "skills": ["MySQL", "ASP.NET"]}],
+    })
+
+    assert response.status_code == 200
+    assert response.json()["ranking"] == [1, 0]
+    assert response.json()["results"][1]["matched"] == ["SQL", ".NET"]
+
+
+def test_index_rejects_every_document_before_indexing_any(client, monkeypatch):
+    upserted = []
+
+    class FakeIndex:
+        def __contains__(self, file_hash):
+            return False
+
+        def upsert_file(self, file_hash, pages, file_name=""):
+            upserted.append(file_hash)
+
+    monkeypatch.setattr(api, "get_document_index", lambda workspace: FakeIndex())
+
+    response = client.post("/documents", json={"documents": [{"text": "first"}, {"pdf_base64": "not base64!"}]})
+
+    assert response.status_code == 422
+    assert upserted == []
@@ -0,0 +1,99 @@
+import pytest
+
+from scripts.candidate_store import MongoCandidateStore, SqliteCandidateStore, candidate_text
+
+
+def resume(email, skills, name="Jane Doe"):
+    return {"personal_info": {"name": name, "email": email}, "skills": skills}
+
+
+# Every test runs against both backends; Mongo uses mongomock and is skipped without it
+@pytest.fixture(params=["sqlite", "mongo"])
+def store(request):
+    if request.param == "sqlite":
+        return SqliteCandidateStore(":memory:")
+    mongomock = pytest.importorskip("mongomock")
+    pymongo = pytest.importorskip("pymongo")
+    if pymongo.version_tuple >= (4, 9):
+        pytest.skip("mongomock cannot run pymongo 4.9+ bulk writes")
+    return MongoCandidateStore(mongomock.MongoClient().smarthire.candidates)
+
+
+def test_upsert_resume_is_found_by_every_index(store):
+    candidate_id = store.upsert_resume("hash-1", resume(" Jane@Example.com ", ["Python", "ML"]), requisition="REQ-1")
+
+    assert candidate_id == "jane@example.com"
+    assert store.find_by_email("JANE@example.com")["_id"] == candidate_id
+    assert store.find_by_resume("hash-1")["_id"] == candidate_id
+    assert [c["_id"] for c in store.find_by_requisition("REQ-1")] == [candidate_id]
+    assert [c["_id"] for c in store.find_by_skills(["machine learning"])] == [candidate_id]
+    assert store.count() == 1
+
+
+def test_resume_without_email_is_keyed_by_hash(store):
+    candidate_id = store.upsert_resume("hash-2", resume("", ["SQL"]))
+
+    assert candidate_id == "resume:hash-2"
+    assert store.find_by_resume("hash-2")["skills"] == ["SQL"]
+    assert store.find_by_email("") is None
+
+
+def test_repeated_upserts_merge_into_one_candidate(store):
+    store.upsert_resume("hash-1", resume("jane@example.com", ["Python"]), requisition="REQ-1")
+    store.upsert_resume("hash-2", resume("jane@example.com", ["Python", "SQL"]), requisition="REQ-2")
+
+    candidate = store.get("jane@example.com")
+    assert candidate["skills"] == ["Python", "SQL"]
+    assert candidate["resume_hashes"] == ["hash-1", "hash-2"]
+    assert candidate["requisitions"] == ["REQ-1", "REQ-2"]
+    assert candidate["resume"]["file_hash"] == "hash-2"
+    assert store.count() == 1
+
+
+def test_changed_email_no_longer_matches_old_value(store):
+    store.bulk_upsert([("candidate-1", {"email": "old@example.com"}, {"skill_keys": ["python"]})])
+    store.bulk_upsert([("candidate-1", {"email": "new@example.com"}, {})])
+
+    assert store.find_by_email("old@example.com") is None
+    assert store.find_by_email("new@example.com")["_id"] == "candidate-1"
+    assert [c["_id"] for c in store.find_by_skills(["Python"])] == ["candidate-1"]
+
+
+def test_find_by_skills_ranks_by_matches_and_supports_match_all(store):
+    store.upsert_resume("hash-1", resume("a@example.com", ["Python"]))
+    store.upsert_resume("hash-2", resume("b@example.com", ["Python", "Kubernetes"]))
+
+    assert [c["_id"] for c in store.find_by_skills(["python", "k8s"])] == ["b@example.com", "a@example.com"]
+    assert [c["_id"] for c in store.find_by_skills(["python", "k8s"], match_all=True)] == ["b@example.com"]
+    assert store.find_by_skills([" "]) == []
+
+
+def test_linkedin_profiles_are_found_by_normalized_url(store):
+    candidate_id = store.upsert_linkedin(
+        "http://linkedin.com/in/Jane/?trk=feed", sections={"About": "Hi"}, analyses={"About": "Good"}
+    )
+
+    found = store.find_by_linkedin("https://www.linkedin.com/in/jane")
+    assert found["_id"] == candidate_id
+    assert found["linkedin"]["sections"] == {"About": "Hi"}
+    assert found["linkedin"]["analyses"] == {"About": "Good"}
+
+
+def test_bulk_upsert_resumes(store):
+    ids = store.bulk_upsert_resumes([
+        {"file_hash": "hash-1", "data": resume("a@example.com", ["Go"])},
+        {"file_hash": "hash-2", "data": resume("b@example.com", ["Rust"]), "requisition": "REQ-9"},
+    ])
+
+    assert ids == ["a@example.com", "b@example.com"]
+    assert [c["_id"] for c in store.find_by_requisition("REQ-9")] == ["b@example.com"]
+    assert store.find_by_resume("hash-1")["_id"] == "a@example.com"
+
+
+def test_candidate_text_puts_skills_in_a_skills_section(store):
+    store.upsert_resume("hash-1", {**resume("a@example.com", ["MySQL", "AWS"]), "experience": [{"company": "Acme"}]})
+    store.upsert_linkedin("https://linkedin.com/in/a", sections={"About": "Data engineer"}, email="a@example.com")
+
+    text = candidate_text(store.get("a@example.com"))
+    assert text.splitlines() == ["Jane Doe", "a@example.com", "Acme", "Data engineer", "Skills", "MySQL, AWS"]
+    assert candidate_text({"_id": "empty"}) == ""
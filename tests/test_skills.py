@@ -0,0 +1,70 @@
+import pytest
+
+from scripts.skills import SkillIndex, normalize_skill, rank_candidates
+
+
+def matched(required, candidate_skills):
+    index = SkillIndex(required)
+    return {required[idx] for skill in candidate_skills for idx in index.match_skill(skill)}
+
+
+def test_dotnet_keeps_its_dot():
+    assert normalize_skill(".NET") == (".net",)
+    assert normalize_skill("dotnet") == (".net",)
+    assert normalize_skill("ASP.NET") == ("asp.net",)
+    assert normalize_skill("neural net") == ("neural", "net")
+
+
+@pytest.mark.parametrize("candidate", ["MySQL", "PostgreSQL", "sql"])
+def test_sql_matches_sql_dialects(candidate):
+    assert matched(["SQL"], [candidate]) == {"SQL"}
+
+
+@pytest.mark.parametrize("candidate", ["ASP.NET", ".NET Core", "dotnet"])
+def test_dotnet_matches_dotnet_frameworks(candidate):
+    assert matched([".NET"], [candidate]) == {".NET"}
+
+
+@pytest.mark.parametrize("candidate", ["neural net", "net revenue", "Networking"])
+def test_dotnet_does_not_match_the_word_net(candidate):
+    assert matched([".NET"], [candidate]) == set()
+
+
+def test_java_does_not_match_javascript():
+    assert matched(["Java"], ["JavaScript"]) == set()
+    assert matched(["JavaScript"], ["Java"]) == set()
+
+
+def test_short_skills_match_whole_tokens_only():
+    assert matched(["R", "Go"], ["React", "Golang", "Django"]) == {"Go"}
+    assert matched(["R"], ["R programming"]) == {"R"}
+
+
+def test_phrases_match_either_way():
+    assert matched(["machine learning"], ["ML"]) == {"machine learning"}
+    assert matched(["Python"], ["Python 3"]) == {"Python"}
+    assert matched(["Amazon Web Services"], ["AWS Lambda"]) == {"Amazon Web Services"}
+
+
+def test_skill_names_inside_words_only_count_in_the_skills_section():
+    index = SkillIndex(["AWS", "SQL"])
+
+    assert index.match_resume("Studied employment laws and NoSQL stores") == set()
+    assert index.match_resume("Experience\nStudied laws\nSkills\nMySQL, AWS") == {0, 1}
+
+
+def test_rank_candidates_scores_skill_lists_and_text():
+    result = rank_candidates(
+        [["MySQL", "ASP.NET"], "Built reports.\nSkills\nPostgreSQL, Tableau", ["neural net"]],
+        ["SQL", ".NET"],
+    )
+
+    assert result["matrix"].tolist() == [[True, True], [True, False], [False, False]]
+    assert result["scores"].tolist() == [1.0, 0.5, 0.0]
+    assert result["ranking"].tolist() == [0, 1, 2]
+
+
+@pytest.mark.parametrize("weights", [[1.0], [1.0, -1.0], [float("nan"), 1.0], [0.0, 0.0]])
+def test_rank_candidates_rejects_bad_weights(weights):
+    with pytest.raises(ValueError):
+        rank_candidates([["SQL"]], ["SQL", ".NET"], weights)